@@ -0,0 +1,248 @@
+"""
+Teste de carga do dashboard: várias sessões simuladas (AppTest do
+Streamlit) executando o script ao mesmo tempo, contra a API simulada de
+`benchmarks.mock_api` e um armazém vazio em diretório temporário.
+
+Cada sessão abre a página, busca os parâmetros de um intervalo de anos,
+carrega os dados e faz algumas interações (filtro por título e troca de
+página da tabela). Cada reexecução do script é cronometrada; o relatório
+traz p50/p95/p99 por ação, a vazão (reexecuções/s) e a memória em duas
+partes: a compartilhada (datasets do processo, contados uma vez) e a de
+cada sessão (o que ela guarda só para si no session_state e o crescimento
+da memória residente que sobra depois de descontar a compartilhada).
+
+Uso:
+    python -m benchmarks.carga --sessoes 50
+    python -m benchmarks.carga --sessoes 20 --interacoes 5 --latencia 0.3 --saida carga.json
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+from streamlit.runtime import Runtime
+from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+from streamlit.testing.v1 import AppTest, local_script_runner
+
+import leiloes
+from benchmarks.mock_api import MockTesouro
+from benchmarks.rajada import percentil
+from benchmarks.run import DIRETORIO_RESULTADOS, commit_atual
+from leiloes.compartilhado import DATASETS, memoria_sessao
+
+SCRIPT_PADRAO = Path(__file__).resolve().parent.parent / "dashboard_tesouro_v2.py"
+MB = 1024 * 1024
+
+
+def memoria_residente_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+
+
+def pico_memoria_mb():
+    # ru_maxrss vem em KB no Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def permitir_sessoes_simultaneas():
+    """
+    O AppTest foi feito para uma sessão por vez: a cada execução ele cria um
+    cache de bytecode novo e instala (e ao final remove) um Runtime global.
+    Aqui as sessões passam a compartilhar um único cache de bytecode e o
+    último Runtime instalado, como no servidor do Streamlit, onde todas as
+    sessões do processo usam o mesmo Runtime e o script é compilado uma vez.
+    Sem isso, execuções simultâneas falham com "Runtime hasn't been created!"
+    ou ao compilar o script em várias threads ao mesmo tempo.
+    """
+    cache_de_script = ScriptCache()
+    local_script_runner.ScriptCache = lambda: cache_de_script
+
+    instalado = {}
+
+    def instancia(cls):
+        if cls._instance is not None:
+            instalado["runtime"] = cls._instance
+        if "runtime" not in instalado:
+            raise RuntimeError("Runtime hasn't been created!")
+        return instalado["runtime"]
+
+    Runtime.instance = classmethod(instancia)
+    Runtime.exists = classmethod(lambda cls: cls._instance is not None or "runtime" in instalado)
+
+
+def executar_sessao(script, anos, interacoes, semente, timeout):
+    """
+    Roda o roteiro de uma sessão e retorna (AppTest, [(ação, segundos, erro)]).
+    O AppTest é devolvido vivo para que a memória da sessão entre na medição.
+    """
+    aleatorio = random.Random(semente)
+    medidas = []
+    app = AppTest.from_file(str(script), default_timeout=timeout)
+
+    def reexecutar(acao, preparar=None):
+        if preparar:
+            preparar()
+        inicio = time.perf_counter()
+        try:
+            app.run()
+            erro = "; ".join(str(excecao.value) for excecao in app.exception) or None
+        except Exception as e:
+            erro = f"{type(e).__name__}: {e}"
+        medidas.append((acao, time.perf_counter() - inicio, erro))
+        return erro is None
+
+    if not reexecutar("abertura"):
+        return app, medidas
+
+    inicio, fim = aleatorio.choice([(anos[0], anos[-1]), (anos[-1], anos[-1]), (anos[-2], anos[-1])])
+
+    def informar_anos():
+        app.sidebar.text_input[0].input(str(inicio))
+        app.sidebar.text_input[1].input(str(fim))
+        app.sidebar.button[0].click()
+
+    if not reexecutar("buscar_parametros", informar_anos):
+        return app, medidas
+    if not reexecutar("buscar_dados", lambda: app.sidebar.button[1].click()):
+        return app, medidas
+
+    for _ in range(interacoes):
+        titulos = app.sidebar.selectbox[2].options
+
+        def filtrar_titulo():
+            app.sidebar.selectbox[2].set_value(aleatorio.choice(titulos))
+            app.sidebar.button[1].click()
+
+        if not reexecutar("filtro_titulo", filtrar_titulo):
+            break
+        if app.get("number_input") and any(campo.key == "tabela_pagina" for campo in app.number_input):
+            reexecutar("paginacao", lambda: app.number_input(key="tabela_pagina").set_value(2))
+    return app, medidas
+
+
+def resumir_latencias(segundos):
+    return {
+        "reexecucoes": len(segundos),
+        "p50_ms": percentil(segundos, 50) * 1000,
+        "p95_ms": percentil(segundos, 95) * 1000,
+        "p99_ms": percentil(segundos, 99) * 1000,
+        "max_ms": max(segundos) * 1000,
+    }
+
+
+def rodar_carga(script, sessoes, concorrencia, interacoes, anos, registros_por_ano, latencia, timeout):
+    with MockTesouro(anos, registros_por_ano, latencia=latencia) as mock, \
+            tempfile.TemporaryDirectory() as diretorio:
+        # O script lê `leiloes.API_URL` a cada execução e grava o armazém em ./dados
+        leiloes.API_URL = mock.url
+        diretorio_original = os.getcwd()
+        os.chdir(diretorio)
+        permitir_sessoes_simultaneas()
+        try:
+            gc.collect()
+            memoria_antes = memoria_residente_mb()
+            inicio = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concorrencia, thread_name_prefix="sessao") as executor:
+                resultados = list(executor.map(
+                    lambda i: executar_sessao(script, list(anos), interacoes, i, timeout), range(sessoes)))
+            duracao = time.perf_counter() - inicio
+            gc.collect()
+            memoria_depois = memoria_residente_mb()
+            datasets = DATASETS.estatisticas()
+            bytes_sessoes = [memoria_sessao(app.session_state) for app, _ in resultados]
+        finally:
+            os.chdir(diretorio_original)
+        requisicoes = mock.requisicoes
+
+    medidas = [medida for _, medidas_sessao in resultados for medida in medidas_sessao]
+    por_acao = {}
+    for acao, segundos, _ in medidas:
+        por_acao.setdefault(acao, []).append(segundos)
+    erros = [erro for _, _, erro in medidas if erro]
+
+    return {
+        "sessoes": sessoes,
+        "concorrencia": concorrencia,
+        "reexecucoes": len(medidas),
+        "erros": len(erros),
+        "exemplos_erro": sorted(set(erros))[:5],
+        "duracao_s": duracao,
+        "vazao_reexecucoes_s": len(medidas) / duracao if duracao else None,
+        "latencia": resumir_latencias([segundos for _, segundos, _ in medidas]) if medidas else {},
+        "latencia_por_acao": {acao: resumir_latencias(segundos) for acao, segundos in por_acao.items()},
+        "memoria_antes_mb": memoria_antes,
+        "memoria_depois_mb": memoria_depois,
+        # Os datasets são compartilhados: entram uma vez só, fora da conta por sessão
+        "memoria_compartilhada_mb": datasets["bytes"] / MB,
+        "memoria_sessao_mb": sum(bytes_sessoes) / len(bytes_sessoes) / MB if bytes_sessoes else 0.0,
+        "memoria_por_sessao_mb": max(0.0, memoria_depois - memoria_antes - datasets["bytes"] / MB) / sessoes,
+        "pico_memoria_mb": pico_memoria_mb(),
+        "requisicoes_api": requisicoes,
+        "datasets": datasets,
+    }
+
+
+def imprimir(relatorio):
+    print(f"{'ação':<20} {'n':>5} {'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9} {'máx (ms)':>9}")
+    linhas = list(relatorio["latencia_por_acao"].items()) + [("total", relatorio["latencia"])]
+    for acao, medida in linhas:
+        if medida:
+            print(f"{acao:<20} {medida['reexecucoes']:>5} {medida['p50_ms']:>9.0f} {medida['p95_ms']:>9.0f} "
+                  f"{medida['p99_ms']:>9.0f} {medida['max_ms']:>9.0f}")
+    print(f"\n{relatorio['sessoes']} sessões ({relatorio['concorrencia']} simultâneas), "
+          f"{relatorio['reexecucoes']} reexecuções em {relatorio['duracao_s']:.1f} s "
+          f"= {relatorio['vazao_reexecucoes_s']:.1f} reexecuções/s; erros: {relatorio['erros']}")
+    print(f"Memória residente: {relatorio['memoria_antes_mb']:.0f} -> {relatorio['memoria_depois_mb']:.0f} MB "
+          f"(pico {relatorio['pico_memoria_mb']:.0f} MB); compartilhada (datasets): "
+          f"{relatorio['memoria_compartilhada_mb']:.1f} MB; por sessão: {relatorio['memoria_por_sessao_mb']:.2f} MB "
+          f"residente, {relatorio['memoria_sessao_mb']:.2f} MB no session_state; "
+          f"requisições à API: {relatorio['requisicoes_api']}")
+    for erro in relatorio["exemplos_erro"]:
+        print(f"  erro: {erro}", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--script", type=Path, default=SCRIPT_PADRAO, help="Script do dashboard a testar.")
+    parser.add_argument("--sessoes", type=int, default=50)
+    parser.add_argument("--concorrencia", type=int, help="Sessões simultâneas (padrão: todas).")
+    parser.add_argument("--interacoes", type=int, default=3, help="Filtros por sessão depois da carga.")
+    parser.add_argument("--anos", type=int, nargs=2, default=(2020, 2026), metavar=("INICIAL", "FINAL"))
+    parser.add_argument("--registros-por-ano", type=int, default=800)
+    parser.add_argument("--latencia", type=float, default=0.0, help="Atraso da API simulada, em segundos.")
+    parser.add_argument("--timeout", type=float, default=300, help="Tempo máximo de cada reexecução.")
+    parser.add_argument("--saida", help="Arquivo JSON de saída (padrão: benchmarks/resultados/carga-<data>.json).")
+    args = parser.parse_args(argv)
+
+    relatorio = {
+        "commit": commit_atual(),
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "script": str(args.script),
+        **rodar_carga(args.script, args.sessoes, args.concorrencia or args.sessoes, args.interacoes,
+                      range(args.anos[0], args.anos[1] + 1), args.registros_por_ano, args.latencia, args.timeout),
+    }
+    imprimir(relatorio)
+
+    saida = Path(args.saida) if args.saida else \
+        DIRETORIO_RESULTADOS / f"carga-{datetime.now():%Y%m%d-%H%M%S}-{relatorio['commit'] or 'local'}.json"
+    saida.parent.mkdir(parents=True, exist_ok=True)
+    with open(saida, "w", encoding="utf-8") as f:
+        json.dump(relatorio, f, indent=2, default=str)
+    print(f"Resultados gravados em {saida}", file=sys.stderr)
+    return 1 if relatorio["erros"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
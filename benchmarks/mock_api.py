@@ -0,0 +1,196 @@
+"""
+Servidor HTTP local que imita a API de resultados do Tesouro, servindo
+`registros` sintéticos (determinísticos) em tamanhos configuráveis.
+
+Uso isolado:
+    python -m benchmarks.mock_api --anos 2010-2026 --registros-por-ano 800 --porta 8765
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+TITULOS = {
+    "LTN": [1, 2, 3, 4],
+    "NTN-F": [4, 6, 8, 10],
+    "LFT": [2, 3, 5, 6],
+    "NTN-B": [3, 5, 10, 20, 30],
+}
+
+
+# -----------------------------------------------
+# GERAÇÃO DE REGISTROS SINTÉTICOS
+# -----------------------------------------------
+def gerar_registros(anos, registros_por_ano, semente=42):
+    """
+    Gera registros no formato da API (datas 'dd/mm/aaaa'), com leilões às
+    terças e quintas, os títulos de TITULOS e segunda volta ocasional.
+    """
+    rng = np.random.default_rng(semente)
+    registros = []
+    for ano in anos:
+        dias = pd.date_range(f"{ano}-01-01", f"{ano}-12-31", freq="D")
+        dias = dias[dias.dayofweek.isin([1, 3])]
+
+        n = registros_por_ano
+        datas = np.sort(rng.choice(dias.values, size=n))
+        titulos = rng.choice(list(TITULOS), size=n)
+        prazos = np.array([rng.choice(TITULOS[titulo]) for titulo in titulos])
+        vencimentos = pd.to_datetime([f"{ano + prazo}-{mes:02d}-01" for prazo, mes in
+                                      zip(prazos, rng.choice([1, 7], size=n))])
+        oferta = rng.integers(1_000, 1_500_000, size=n).astype(float)
+        aceita = np.floor(oferta * rng.uniform(0, 1, size=n))
+        segunda = np.where(rng.uniform(size=n) < 0.3, np.floor(aceita * 0.2), np.nan)
+        pu = rng.uniform(500, 4_500, size=n)
+        tipos = np.where(rng.uniform(size=n) < 0.9, "VENDA", "COMPRA")
+
+        df = pd.DataFrame({
+            "DATA": pd.DatetimeIndex(datas).strftime("%d/%m/%Y"),
+            "EDITAL": np.arange(n) // 4 + 1,
+            "TITULO": titulos,
+            "VENCIMENTO": vencimentos.strftime("%d/%m/%Y"),
+            "OFERTA": oferta,
+            "QUANTIDADE ACEITA": aceita,
+            "QUANTIDADE ACEITA SEGUNDA VOLTA": segunda,
+            "TAXA": np.round(rng.uniform(2, 15, size=n), 4),
+            "PU MEDIO": np.round(pu, 6),
+            "FINANCEIRO ACEITO": np.round(aceita * pu, 2),
+            "FINANCEIRO ACEITO SEGUNDA VOLTA": np.round(segunda * pu, 2),
+            "TIPO": tipos,
+        })
+        registros.extend(json.loads(df.to_json(orient="records")))
+    return registros
+
+
+# -----------------------------------------------
+# SERVIDOR
+# -----------------------------------------------
+class MockTesouro:
+    """
+    Servidor local (em thread) com a mesma interface da API: GET com `ano`
+    e `tipo` opcionais, gzip, ETag/304, latência injetável e falhas
+    injetáveis (`status_forcado`, ex.: 503 para simular a API fora do ar). Os corpos são
+    serializados e comprimidos uma única vez, para que o custo medido seja
+    o do cliente e não o do servidor.
+    """
+
+    def __init__(self, anos, registros_por_ano, latencia=0.0, semente=42):
+        self.latencia = latencia
+        self.status_forcado = None
+        self.requisicoes = 0
+        self._trava = threading.Lock()
+        self._respostas = {}
+
+        registros = gerar_registros(anos, registros_por_ano, semente)
+        por_ano = {}
+        for registro in registros:
+            por_ano.setdefault(int(registro["DATA"][-4:]), []).append(registro)
+        self._registros = {None: registros, **por_ano}
+        self._servidor = None
+
+    def _resposta(self, ano, tipo):
+        chave = (ano, tipo)
+        if chave not in self._respostas:
+            registros = self._registros.get(ano, [])
+            if tipo:
+                registros = [registro for registro in registros if registro["TIPO"] == tipo]
+            corpo = json.dumps({"registros": registros}).encode("utf-8")
+            etag = '"%s"' % hashlib.sha1(corpo).hexdigest()
+            self._respostas[chave] = (corpo, gzip.compress(corpo, compresslevel=5), etag)
+        return self._respostas[chave]
+
+    def _criar_handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with mock._trava:
+                    mock.requisicoes += 1
+                if mock.latencia:
+                    time.sleep(mock.latencia)
+                if mock.status_forcado:
+                    self.send_response(mock.status_forcado)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                parametros = parse_qs(urlparse(self.path).query)
+                ano = int(parametros["ano"][0]) if "ano" in parametros else None
+                tipo = parametros.get("tipo", [None])[0]
+                corpo, comprimido, etag = mock._resposta(ano, tipo)
+
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                self.send_response(200)
+                if "gzip" in (self.headers.get("Accept-Encoding") or ""):
+                    corpo = comprimido
+                    self.send_header("Content-Encoding", "gzip")
+                self.send_header("Content-Type", "application/json")
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(corpo)))
+                self.end_headers()
+                self.wfile.write(corpo)
+
+        return Handler
+
+    def iniciar(self, porta=0):
+        self._servidor = ThreadingHTTPServer(("127.0.0.1", porta), self._criar_handler())
+        self._servidor.daemon_threads = True
+        threading.Thread(target=self._servidor.serve_forever, daemon=True).start()
+        return self
+
+    @property
+    def url(self):
+        host, porta = self._servidor.server_address
+        return f"http://{host}:{porta}/resultados"
+
+    def parar(self):
+        if self._servidor is not None:
+            self._servidor.shutdown()
+            self._servidor.server_close()
+            self._servidor = None
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *excecao):
+        self.parar()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="API de resultados do Tesouro simulada localmente.")
+    parser.add_argument("--anos", default="2010-2026", help="Intervalo de anos (ex.: 2010-2026).")
+    parser.add_argument("--registros-por-ano", type=int, default=800)
+    parser.add_argument("--latencia", type=float, default=0.0, help="Atraso por requisição, em segundos.")
+    parser.add_argument("--porta", type=int, default=8765)
+    args = parser.parse_args(argv)
+
+    inicio, fim = (int(parte) for parte in args.anos.split("-"))
+    mock = MockTesouro(range(inicio, fim + 1), args.registros_por_ano, latencia=args.latencia)
+    mock.iniciar(args.porta)
+    print(f"Servindo em {mock.url}", flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        mock.parar()
+
+
+if __name__ == "__main__":
+    main()
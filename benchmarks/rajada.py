@@ -0,0 +1,77 @@
+"""
+Rajada de sessões concorrentes pedindo o mesmo ano ao mesmo tempo (como na
+saída de um resultado novo), contra a API simulada de `benchmarks.mock_api`.
+Compara quantas requisições chegam à API e a latência de cada sessão com e
+sem a coalescência de chamadas (`leiloes.cache.Coalescedor`).
+
+Uso:
+    python -m benchmarks.rajada --sessoes 50 --latencia 0.5
+"""
+import argparse
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.mock_api import MockTesouro
+from leiloes.armazem import Armazem
+from leiloes.cache import CacheLRU, Coalescedor
+from leiloes.ingestao import carregar_leiloes
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+def rajada(mock, ano, sessoes, coalescedor):
+    """
+    Dispara `sessoes` threads que pedem `ano` juntas (barreira) com cache e
+    armazém vazios. Retorna (requisições à API, latências em segundos, linhas).
+    """
+    with tempfile.TemporaryDirectory() as diretorio:
+        armazem = Armazem(diretorio)
+        cache = CacheLRU()
+        barreira = threading.Barrier(sessoes)
+        latencias = [None] * sessoes
+        linhas = [None] * sessoes
+
+        def sessao(i):
+            barreira.wait()
+            inicio = time.perf_counter()
+            df = carregar_leiloes(armazem, ano, base_url=mock.url, cache=cache, coalescedor=coalescedor)
+            latencias[i] = time.perf_counter() - inicio
+            linhas[i] = len(df)
+
+        requisicoes_antes = mock.requisicoes
+        threads = [threading.Thread(target=sessao, args=(i,)) for i in range(sessoes)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return mock.requisicoes - requisicoes_antes, latencias, linhas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessoes", type=int, default=50)
+    parser.add_argument("--latencia", type=float, default=0.5, help="Atraso da API simulada, em segundos.")
+    parser.add_argument("--registros-por-ano", type=int, default=800)
+    args = parser.parse_args(argv)
+
+    ano = 2024
+    with MockTesouro([ano], args.registros_por_ano, latencia=args.latencia) as mock:
+        print(f"{'modo':<14} {'requisições':>11} {'p50 (ms)':>9} {'p95 (ms)':>9} {'máx (ms)':>9}")
+        for modo, coalescedor in (("sem_coalescer", None), ("coalescido", Coalescedor())):
+            requisicoes, latencias, linhas = rajada(mock, ano, args.sessoes, coalescedor)
+            if len(set(linhas)) != 1:
+                print(f"{modo}: sessões receberam resultados diferentes: {sorted(set(linhas))}", file=sys.stderr)
+                return 1
+            print(f"{modo:<14} {requisicoes:>11} {statistics.median(latencias) * 1000:>9.0f} "
+                  f"{percentil(latencias, 95) * 1000:>9.0f} {max(latencias) * 1000:>9.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
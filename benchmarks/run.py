@@ -0,0 +1,194 @@
+"""
+Benchmarks offline do pipeline (busca, parse, transformação, filtros e
+gráficos) contra a API simulada de `benchmarks.mock_api`.
+
+Uso:
+    python -m benchmarks.run                          # todos os cenários
+    python -m benchmarks.run --cenarios um_ano dez_anos --repeticoes 3
+    python -m benchmarks.run --comparar antes.json depois.json
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks.mock_api import MockTesouro
+from leiloes.analitico import agregar_leiloes, resumir
+from leiloes.api import buscar_leiloes, normalizar_registros
+from leiloes.cliente import ClienteTesouro
+from leiloes.filtros import IndiceFiltros
+from leiloes.graficos import figura_financeiro, figura_taxas, figura_volume
+from leiloes.series import IndiceSeries
+from leiloes.validacao import validar_registros
+
+# Tamanhos: um ano, dez anos e 10x o histórico real (~25 anos de ~800 registros)
+CENARIOS = {
+    "um_ano": {"anos": range(2024, 2025), "registros_por_ano": 800},
+    "dez_anos": {"anos": range(2016, 2026), "registros_por_ano": 800},
+    "historico_10x": {"anos": range(2001, 2026), "registros_por_ano": 8000},
+}
+
+DIRETORIO_RESULTADOS = Path(__file__).parent / "resultados"
+
+
+def medir(funcao, repeticoes):
+    """
+    Executa `funcao` `repeticoes` vezes e retorna (estatísticas, último resultado).
+    """
+    tempos = []
+    resultado = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append(time.perf_counter() - inicio)
+    estatisticas = {
+        "mediana_s": statistics.median(tempos),
+        "min_s": min(tempos),
+        "max_s": max(tempos),
+        "repeticoes": repeticoes,
+    }
+    return estatisticas, resultado
+
+
+def combinacoes_de_filtro(df, quantidade=20):
+    """
+    Seleciona combinações de filtros reais (a partir de linhas do DataFrame).
+    """
+    amostra = df.sample(min(quantidade, len(df)), random_state=0)
+    return [
+        {"tipo": linha.TIPO, "data": linha.DATA, "titulo": linha.TITULO, "vencimento": None}
+        for linha in amostra.itertuples()
+    ] + [{"tipo": "VENDA"}, {"titulo": "LTN"}, {}]
+
+
+def registros_malformados(registros, a_cada=100):
+    """
+    Cópia dos registros com um erro a cada `a_cada` registros (data inválida,
+    taxa como texto, número no formato brasileiro ou campo renomeado), para
+    medir a validação fora do caminho feliz.
+    """
+    defeitos = (
+        lambda registro: {**registro, "DATA": "31/02/2024"},
+        lambda registro: {**registro, "TAXA": "n/d"},
+        lambda registro: {**registro, "OFERTA": "1.234,50"},
+        lambda registro: {**{chave: valor for chave, valor in registro.items() if chave != "TITULO"},
+                          "titulo": registro["TITULO"]},
+    )
+    return [defeitos[(i // a_cada) % len(defeitos)](registro) if i % a_cada == 0 else registro
+            for i, registro in enumerate(registros)]
+
+
+def rodar_cenario(anos, registros_por_ano, repeticoes):
+    resultados = {}
+    with MockTesouro(anos, registros_por_ano) as mock:
+        cliente = ClienteTesouro(mock.url)
+
+        resultados["busca_http"], corpo = medir(lambda: cliente.get().content, repeticoes)
+        resultados["parse_json"], dados = medir(lambda: json.loads(corpo), repeticoes)
+        registros = dados["registros"]
+        resultados["normalizacao"], df = medir(lambda: normalizar_registros(registros), repeticoes)
+        malformados = registros_malformados(registros)
+        resultados["normalizacao_malformados"], _ = medir(lambda: validar_registros(malformados), repeticoes)
+        resultados["ingestao_streaming"], _ = medir(lambda: buscar_leiloes(mock.url), repeticoes)
+        cliente.close()
+
+    resultados["indice_filtros"], indice = medir(lambda: IndiceFiltros(df).construir(), repeticoes)
+
+    filtros = combinacoes_de_filtro(indice.dados)
+    estatisticas, _ = medir(lambda: [indice.filtrar(**filtro) for filtro in filtros], repeticoes)
+    estatisticas = {chave: valor / len(filtros) if chave.endswith("_s") else valor
+                    for chave, valor in estatisticas.items()}
+    resultados["filter_data_por_consulta"] = estatisticas
+
+    resultados["agregacao"], agregados = medir(lambda: agregar_leiloes(df), repeticoes)
+    resultados["resumo_por_titulo"], _ = medir(lambda: resumir(agregados, ["TITULO"]), repeticoes)
+    resultados["indice_series"], series = medir(lambda: IndiceSeries(agregados).construir(), repeticoes)
+    titulo = series.titulos()[0]
+    vencimento = series.vencimentos(titulo)[0]
+    resultados["serie_mensal_movel"], _ = medir(
+        lambda: series.serie(titulo, vencimento, frequencia="MS", janela=6), repeticoes)
+
+    for nome_figura, construir in (("figura_volume", figura_volume),
+                                   ("figura_taxas", figura_taxas),
+                                   ("figura_financeiro", figura_financeiro)):
+        resultados[nome_figura], figura = medir(lambda: construir(indice.dados).to_json(), repeticoes)
+        resultados[nome_figura]["bytes_json"] = len(figura)
+
+    return {
+        "registros": len(registros),
+        "bytes_payload": len(corpo),
+        "memoria_df_bytes": int(df.memory_usage(deep=True).sum()),
+        "etapas": resultados,
+    }
+
+
+def commit_atual():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def comparar(antes, depois):
+    """
+    Imprime a razão depois/antes da mediana de cada etapa (> 1 = mais lento).
+    """
+    with open(antes, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(depois, encoding="utf-8") as f:
+        novo = json.load(f)
+
+    print(f"{'cenário':<15} {'etapa':<26} {'antes (ms)':>11} {'depois (ms)':>11} {'razão':>7}")
+    for cenario, dados in novo["cenarios"].items():
+        etapas_base = base["cenarios"].get(cenario, {}).get("etapas", {})
+        for etapa, medida in dados["etapas"].items():
+            if etapa not in etapas_base:
+                continue
+            t0 = etapas_base[etapa]["mediana_s"] * 1000
+            t1 = medida["mediana_s"] * 1000
+            razao = t1 / t0 if t0 else float("nan")
+            print(f"{cenario:<15} {etapa:<26} {t0:>11.2f} {t1:>11.2f} {razao:>7.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cenarios", nargs="*", choices=list(CENARIOS), default=list(CENARIOS))
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--saida", help="Arquivo JSON de saída (padrão: benchmarks/resultados/<data>.json).")
+    parser.add_argument("--comparar", nargs=2, metavar=("ANTES", "DEPOIS"))
+    args = parser.parse_args(argv)
+
+    if args.comparar:
+        comparar(*args.comparar)
+        return 0
+
+    relatorio = {
+        "commit": commit_atual(),
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "cenarios": {},
+    }
+    for nome in args.cenarios:
+        print(f"Rodando cenário {nome}...", file=sys.stderr)
+        relatorio["cenarios"][nome] = rodar_cenario(repeticoes=args.repeticoes, **CENARIOS[nome])
+
+    saida = Path(args.saida) if args.saida else \
+        DIRETORIO_RESULTADOS / f"{datetime.now():%Y%m%d-%H%M%S}-{relatorio['commit'] or 'local'}.json"
+    saida.parent.mkdir(parents=True, exist_ok=True)
+    with open(saida, "w", encoding="utf-8") as f:
+        json.dump(relatorio, f, indent=2)
+    print(f"Resultados gravados em {saida}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
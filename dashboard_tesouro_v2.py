@@ -1,8 +1,25 @@
-import requests
+import os
+from concurrent.futures import wait
+
 import pandas as pd
 import streamlit as st
-import plotly.express as px
-import plotly.graph_objects as go
+
+from leiloes import API_URL, Armazem, carregar_anos
+from leiloes.analitico import METRICAS, resumir
+from leiloes.aquecimento import iniciar_aquecedor
+from leiloes.cache import CACHE, COALESCEDOR
+from leiloes.cliente import cliente_compartilhado
+from leiloes.compartilhado import DATASETS, cabe_na_sessao, memoria_sessao, montar_dataset
+from leiloes.consulta import DISPONIVEL as SQL_DISPONIVEL, EXEMPLO as SQL_EXEMPLO, consultar, tabelas
+from leiloes.esquema import formatar_data
+from leiloes.exportacao import FORMATOS_DOWNLOAD, arquivo_download
+from leiloes.graficos import figura_financeiro, figura_historico_taxas, figura_taxas, figura_volume
+from leiloes.historico import publicar_se_desatualizado
+from leiloes.ingestao import INDISPONIVEL, OBSOLETO, REVALIDANDO, frescor
+from leiloes.metricas import REGISTRO, medir
+from leiloes.paginacao import TAMANHOS_PAGINA, paginar, total_paginas
+from leiloes.series import FREQUENCIAS
+from leiloes.validacao import QUARENTENA
 
 # -----------------------------------------------
 # CONFIGURAÇÕES INICIAIS E CONSTANTES
@@ -12,81 +29,53 @@ st.set_page_config(
     layout="wide"
 )
 
-API_URL = "https://apiapex.tesouro.gov.br/aria/v1/api-leiloes-pub/custom/resultados"
+# Verificação do certificado TLS da API (LEILOES_VERIFICAR_SSL: 1 verifica, 0 não)
+VERIFICAR_SSL = os.environ.get("LEILOES_VERIFICAR_SSL", "1") not in ("0", "false", "nao", "não")
+
+ARMAZEM = Armazem()
+# Histórico mapeado em memória, compartilhado pelos processos do host (republicado só se o armazém mudou)
+publicar_se_desatualizado(ARMAZEM)
+# Aquecedor do processo (iniciado só na primeira execução do script)
+AQUECEDOR = iniciar_aquecedor(ARMAZEM, API_URL, verify=VERIFICAR_SSL)
 
 
 # -----------------------------------------------
-# FUNÇÕES DE BUSCA E CACHE
+# FUNÇÕES DE BUSCA
 # -----------------------------------------------
-@st.cache_data
-def fetch_leilao_parameters(base_url, ano=None):
+def fetch_leilao_data(base_url, anos=None, progresso=None):
     """
-    Retorna listas únicas de DATA, TIPO, TITULO e VENCIMENTO para filtros.
+    Sincroniza o armazém local com a API (só o que pode ter mudado) e
+    retorna o DataFrame dos anos pedidos com COMPRA e VENDA, buscando os
+    anos em paralelo. Alimenta tanto os catálogos de filtros quanto o
+    dataset exibido. Retorna (dados, falhas).
+
+    Roda dentro da montagem compartilhada do dataset (em outra thread, e
+    talvez esperada por várias sessões), então não desenha nada na tela: o
+    progresso vai para `progresso(ano, concluidos, total, erro)` e os erros
+    voltam em `falhas`, exibidos por load_data.
     """
     try:
-        params = {"ano": ano} if ano else {}
-        response = requests.get(base_url, params=params,verify=False)
-        response.raise_for_status()
-        data = response.json()
-        registros = data.get("registros", [])
-
-        df = pd.DataFrame(registros)
-        if df.empty:
-            return [], [], [], []
-
-        datas_disponiveis = sorted(df["DATA"].unique())
-        tipos_disponiveis = sorted(df["TIPO"].unique())
-        titulos_disponiveis = sorted(df["TITULO"].unique())
-        vencimentos_disponiveis = sorted(df["VENCIMENTO"].unique())
-
-        return datas_disponiveis, tipos_disponiveis, titulos_disponiveis, vencimentos_disponiveis
+        return carregar_anos(ARMAZEM, anos, base_url=base_url, verify=VERIFICAR_SSL, progresso=progresso)
     except Exception as e:
-        st.error(f"Erro ao buscar parâmetros: {e}")
-        return [], [], [], []
+        # Serve o que houver no armazém local em vez de uma tela vazia
+        return ARMAZEM.ler(anos), {None: e}
 
 
-@st.cache_data
-def fetch_leilao_data(base_url, ano=None, tipo=None):
+def parse_anos(ano_inicial, ano_final):
     """
-    Busca os dados da API conforme ano e tipo (COMPRA ou VENDA).
-    Retorna um DataFrame já com colunas relevantes e cálculos de totais.
+    Converte os campos de ano do sidebar em uma tupla de anos (ou None para
+    todo o histórico). Levanta ValueError para entradas inválidas.
     """
-    try:
-        params = {"ano": ano, "tipo": tipo} if ano and tipo else \
-            {"ano": ano} if ano else \
-                {"tipo": tipo} if tipo else {}
-
-        response = requests.get(base_url, params=params, verify=False)
-        response.raise_for_status()
-        data = response.json()
-        registros = data.get("registros", [])
-
-        if not registros:
-            return pd.DataFrame()
-
-        df = pd.DataFrame(registros)[[
-            "DATA", "TITULO", "VENCIMENTO", "OFERTA", "QUANTIDADE ACEITA",
-            "QUANTIDADE ACEITA SEGUNDA VOLTA", "TAXA", "FINANCEIRO ACEITO",
-            "FINANCEIRO ACEITO SEGUNDA VOLTA", "TIPO"
-        ]]
-
-        # Ajuste de datas
-        df["DATA"] = pd.to_datetime(df["DATA"], dayfirst=True).dt.strftime('%d-%m-%Y')
-
-        # Preencher valores None com zero
-        df = df.fillna({
-            "QUANTIDADE ACEITA SEGUNDA VOLTA": 0,
-            "FINANCEIRO ACEITO SEGUNDA VOLTA": 0
-        })
-
-        # Calculando os totais
-        df["TOTAL QUANTIDADE ACEITA"] = df["QUANTIDADE ACEITA"] + df["QUANTIDADE ACEITA SEGUNDA VOLTA"]
-        df["TOTAL FINANCEIRO ACEITO"] = df["FINANCEIRO ACEITO"] + df["FINANCEIRO ACEITO SEGUNDA VOLTA"]
-
-        return df
-    except Exception as e:
-        st.error(f"Erro ao buscar dados: {e}")
-        return pd.DataFrame()
+    if not ano_inicial:
+        if ano_final:
+            raise ValueError("Informe o ano inicial.")
+        return None
+
+    inicio = int(ano_inicial)
+    fim = int(ano_final) if ano_final else inicio
+    if fim < inicio:
+        raise ValueError("O ano final deve ser maior ou igual ao inicial.")
+    return tuple(range(inicio, fim + 1))
 
 
 # -----------------------------------------------
@@ -100,121 +89,330 @@ def show_filters_sidebar():
     with st.sidebar.form("filtros"):
         st.header("Filtros de Dados")
         st.info(
-            "Insira o ano desejado e clique em **'Buscar Parâmetros'** para atualizar as opções. "
+            "Insira o ano (ou intervalo de anos) e clique em **'Buscar Parâmetros'** para atualizar as opções. "
             "Depois clique em **'Buscar Dados'** para carregar o dataset. "
             "Se não houver registros, ajuste os parâmetros."
         )
 
-        # Input para ano
-        ano_input = st.text_input("Ano desejado (ex: 2023):", max_chars=4)
+        # Inputs para o intervalo de anos
+        ano_inicial = st.text_input("Ano inicial (ex: 2023):", max_chars=4)
+        ano_final = st.text_input("Ano final (opcional, ex: 2026):", max_chars=4)
         try:
-            ano = int(ano_input) if ano_input else None
-        except ValueError:
-            st.warning("Por favor, insira apenas números para o ano.")
-            ano = None
+            anos = parse_anos(ano_inicial, ano_final)
+        except ValueError as e:
+            st.warning(f"Por favor, insira apenas anos válidos. {e}")
+            anos = None
 
         # Botão para buscar parâmetros
         buscar_parametros = st.form_submit_button("Buscar Parâmetros", type="primary")
 
-    # Se o usuário clicar em 'Buscar Parâmetros', chama a função de parâmetros
+    # Se o usuário clicar em 'Buscar Parâmetros', carrega os dados e deriva os catálogos
     if buscar_parametros:
-        with st.spinner("Buscando parâmetros..."):
-            datas_disponiveis, tipos_disponiveis, titulos_disponiveis, vencimentos_disponiveis = fetch_leilao_parameters(
-                API_URL, ano=ano)
-            st.session_state['datas_disponiveis'] = datas_disponiveis
-            st.session_state['tipos_disponiveis'] = tipos_disponiveis if tipos_disponiveis else ["COMPRA", "VENDA"]
-            st.session_state['titulos_disponiveis'] = titulos_disponiveis
-            st.session_state['vencimentos_disponiveis'] = vencimentos_disponiveis
-            st.session_state['ano'] = ano
+        datas_disponiveis, tipos_disponiveis, titulos_disponiveis, vencimentos_disponiveis = \
+            load_data(anos).catalogos
+        st.session_state['datas_disponiveis'] = datas_disponiveis
+        st.session_state['tipos_disponiveis'] = tipos_disponiveis if tipos_disponiveis else ["COMPRA", "VENDA"]
+        st.session_state['titulos_disponiveis'] = titulos_disponiveis
+        st.session_state['vencimentos_disponiveis'] = vencimentos_disponiveis
+        st.session_state['anos'] = anos
 
     # Carrega do session state
     datas_disponiveis = st.session_state.get('datas_disponiveis', [])
     tipos_disponiveis = st.session_state.get('tipos_disponiveis', ["COMPRA", "VENDA"])
     titulos_disponiveis = st.session_state.get('titulos_disponiveis', [])
     vencimentos_disponiveis = st.session_state.get('vencimentos_disponiveis', [])
-    ano = st.session_state.get('ano', None)
+    anos = st.session_state.get('anos', None)
 
     # Exibe mais um form para filtros complementares
     with st.sidebar.form("filtros_complementares"):
         tipo = st.selectbox("Selecione o Tipo de Leilão:", tipos_disponiveis)
-        data_leilao = st.selectbox("Selecione a Data do Leilão:", ["Todas"] + list(datas_disponiveis))
+        data_leilao = st.selectbox("Selecione a Data do Leilão:", ["Todas"] + list(datas_disponiveis),
+                                   format_func=formatar_data)
         titulo_selecionado = st.selectbox("Selecione o Título:", ["Todos"] + list(titulos_disponiveis))
-        vencimento = st.selectbox("Selecione o Vencimento:", ["Todos"] + list(vencimentos_disponiveis))
+        vencimento = st.selectbox("Selecione o Vencimento:", ["Todos"] + list(vencimentos_disponiveis),
+                                  format_func=formatar_data)
 
         buscar_dados = st.form_submit_button("Buscar Dados", type="primary")
 
-    return ano, tipo, data_leilao, titulo_selecionado, vencimento, buscar_dados
+    return anos, tipo, data_leilao, titulo_selecionado, vencimento, buscar_dados
 
 
-def load_data(ano, tipo):
+def show_cache_stats():
     """
-    Faz a chamada da API, armazena no session_state e retorna o DataFrame.
+    Exibe no sidebar os contadores do cache compartilhado do processo.
     """
-    if "dados_brutos" not in st.session_state or st.session_state.get(
-            'ano_ultimo_fetch') != ano or st.session_state.get('tipo_ultimo_fetch') != tipo:
-        # Só refaz a busca se não existir no session_state
-        # ou se for um ano/tipo diferente do último fetch
-        with st.spinner("Carregando dados..."):
-            data = fetch_leilao_data(API_URL, ano=ano, tipo=tipo)
-            st.session_state['dados_brutos'] = data
-            st.session_state['ano_ultimo_fetch'] = ano
-            st.session_state['tipo_ultimo_fetch'] = tipo
-    else:
-        data = st.session_state['dados_brutos']
+    with st.sidebar.expander("Estatísticas do cache"):
+        st.json({**CACHE.estatisticas(), **{f"coalescencia_{chave}": valor
+                                             for chave, valor in COALESCEDOR.estatisticas().items()}})
+        st.json({**DATASETS.estatisticas(), "sessao_bytes": memoria_sessao(st.session_state)})
+        st.json({f"disjuntor_{chave}": valor for chave, valor in
+                 cliente_compartilhado(API_URL, verify=VERIFICAR_SSL).disjuntor.estatisticas().items()})
+        if AQUECEDOR is not None:
+            ultima = AQUECEDOR.ultima_atualizacao
+            st.caption(
+                f"Aquecedor {'ativo' if AQUECEDOR.ativo else 'parado'} · "
+                f"última atualização: {f'{ultima:%d-%m-%Y %H:%M}' if ultima else '—'} · "
+                f"erros: {AQUECEDOR.erros}"
+            )
+        quarentena = QUARENTENA.estatisticas()
+        if quarentena["total"]:
+            st.json({f"quarentena_{chave}": valor for chave, valor in quarentena.items()})
+            st.dataframe(QUARENTENA.linhas().tail(100), hide_index=True)
 
-    return data
+
+def load_data(anos):
+    """
+    Retorna o Dataset compartilhado dos anos (COMPRA e VENDA, índices de
+    filtros, Resumo e Histórico de Taxas) e guarda na sessão só uma
+    referência a ele. O primeiro pedido de um intervalo de anos monta o
+    dataset; as demais sessões reaproveitam o mesmo objeto, sem cópias.
+    O tipo é aplicado depois, em filter_data, sem nova chamada à API.
+
+    A sessão troca de dataset quando o dela expira (ano corrente atualizado
+    pelo aquecedor ou pela revalidação) ou foi montado com anos que falharam.
+    """
+    dataset = st.session_state.get('dataset')
+    if (dataset is None or st.session_state.get('anos_ultimo_fetch') != anos
+            or dataset.expirado() or dataset.falhas):
+        # Só refaz a busca se nenhuma outra sessão já montou (ou está montando)
+        # um dataset válido desse intervalo
+        chave = (str(ARMAZEM.diretorio), API_URL, tuple(anos) if anos else None)
+        total = len(anos) if anos else 1
+        andamento = {"fracao": 0.0, "texto": f"Carregando dados (0/{total})..."}
+
+        def progresso(ano, concluidos, total, erro):
+            situacao = "falhou" if erro else "ok"
+            andamento["fracao"] = concluidos / total
+            andamento["texto"] = f"Ano {ano or 'todos'}: {situacao} ({concluidos}/{total})"
+
+        def montar():
+            dados, falhas = fetch_leilao_data(API_URL, anos=anos, progresso=progresso)
+            return montar_dataset(ARMAZEM, anos, dados, falhas, situacoes=frescor(ARMAZEM, anos, base_url=API_URL))
+
+        # A montagem roda fora da sessão: se o usuário interagir no meio, o
+        # Streamlit interrompe só esta espera, não a montagem das outras sessões
+        recarga = dataset is not None and st.session_state.get('anos_ultimo_fetch') == anos
+        futuro = DATASETS.montar_em_segundo_plano(chave, montar)
+        if not futuro.done():
+            barra = st.progress(0.0, text=andamento["texto"])
+            try:
+                while not wait([futuro], timeout=0.1).done:
+                    barra.progress(andamento["fracao"], text=andamento["texto"])
+            finally:
+                barra.empty()
+        dataset = futuro.result()
+        for ano, erro in dataset.falhas.items():
+            st.warning(f"Erro ao sincronizar {ano or 'o histórico'} com a API, usando dados locais: {erro}")
+        st.session_state['dataset'] = dataset
+        st.session_state['anos_ultimo_fetch'] = anos
+        if recarga:
+            # Datas e vencimentos novos passam a aparecer nos filtros
+            st.session_state['datas_disponiveis'], _, st.session_state['titulos_disponiveis'], \
+                st.session_state['vencimentos_disponiveis'] = dataset.catalogos
+
+    return dataset
+
+
+def filter_data(indice, tipo, data_leilao, titulo_selecionado, vencimento):
+    """
+    Aplica os filtros selecionados no sidebar usando o índice pré-montado
+    (sem varrer o DataFrame). Registros "zerados" já ficam fora do índice.
+    """
+    return indice.filtrar(
+        tipo=tipo or None,
+        data=None if data_leilao == "Todas" else data_leilao,
+        titulo=None if titulo_selecionado == "Todos" else titulo_selecionado,
+        vencimento=None if vencimento == "Todos" else vencimento,
+    )
 
 
-def filter_data(data, tipo, data_leilao, titulo_selecionado, vencimento):
+def show_freshness(dataset):
     """
-    Aplica os filtros selecionados no sidebar ao DataFrame.
+    Indicador de frescor dos dados exibidos (os do dataset na tela, no
+    momento em que ele foi montado): atualizados, sendo revalidados em
+    segundo plano ou servidos do armazém local enquanto a API falha.
     """
-    if data.empty:
-        return data
+    situacoes = dataset.situacoes
+    instantes = [info["atualizado_em"] for info in situacoes.values() if info["atualizado_em"]]
+    ultima = f"{max(instantes):%d-%m-%Y %H:%M}" if instantes else "desconhecida"
+    por_situacao = {}
+    for ano, info in situacoes.items():
+        por_situacao.setdefault(info["situacao"], []).append(str(ano or "todos"))
+
+    atrasados = por_situacao.get(OBSOLETO, []) + por_situacao.get(INDISPONIVEL, [])
+    if atrasados:
+        disjuntor = cliente_compartilhado(API_URL, verify=VERIFICAR_SSL).disjuntor.estado
+        motivo = " (API fora do ar: chamadas suspensas temporariamente)" if disjuntor != "fechado" else ""
+        st.warning(f"🔴 A API não respondeu para {', '.join(atrasados)}{motivo}: exibindo os dados salvos "
+                   f"localmente. Última atualização bem-sucedida: {ultima}.")
+    elif REVALIDANDO in por_situacao:
+        st.caption(f"🟡 Exibindo a última versão salva ({ultima}); atualizando em segundo plano.")
+    else:
+        st.caption(f"🟢 Dados atualizados · última consulta à API: {ultima}")
 
-    # Filtro de tipo
-    if tipo:
-        data = data[data["TIPO"] == tipo]
 
-    # Filtro de data (ajustar string)
-    if data_leilao != "Todas":
-        data_leilao = pd.to_datetime(data_leilao, dayfirst=True).strftime('%d-%m-%Y')
-        data = data[data["DATA"] == data_leilao]
+def show_data(data, agregados=None, series=None, tipo=None):
+    """
+    Exibe a tabela, gráficos, resumo por leilão e opções de download.
+    """
+    if data.empty:
+        st.warning("Nenhum dado encontrado para os filtros selecionados.")
+        return
+
+    st.success("Dados filtrados com sucesso!")
+    st.subheader("Dados Filtrados")
 
-    # Filtro de título
-    if titulo_selecionado != "Todos":
-        data = data[data["TITULO"] == titulo_selecionado]
+    with medir("render_tabela", linhas=len(data)):
+        render_table(data)
 
-    # Filtro de vencimento
-    if vencimento != "Todos":
-        data = data[data["VENCIMENTO"] == vencimento]
+    render_download(data)
 
-    # Remover registros "zerados"
-    data = data[(data["TOTAL QUANTIDADE ACEITA"] != 0) | (data["TOTAL FINANCEIRO ACEITO"] != 0)]
+    # Abas para diferentes gráficos
+    tab1, tab2, tab3, tab_resumo, tab_historico = st.tabs(
+        ["Volume Ofertado x Aceito", "Taxas de Corte", "Volume Financeiro Aceito", "Resumo", "Histórico de Taxas"]
+    )
+    graficos = [
+        (tab1, "Volume Ofertado x Aceito", figura_volume, "render_grafico_volume",
+         "Dados insuficientes para gerar o gráfico."),
+        (tab2, "Taxas de Corte", figura_taxas, "render_grafico_taxas",
+         "Dados insuficientes para gerar o gráfico de Taxas de Corte."),
+        (tab3, "Volume Financeiro Aceito", figura_financeiro, "render_grafico_financeiro",
+         "Dados insuficientes para gerar o gráfico de Volume Financeiro Aceito."),
+    ]
+
+    for tab, titulo, construir_figura, etapa, aviso in graficos:
+        with tab:
+            st.subheader(titulo)
+            with medir(etapa, linhas=len(data)):
+                fig = construir_figura(data)
+                if fig is not None:
+                    st.plotly_chart(fig)
+            if fig is None:
+                st.warning(aviso)
+
+    with tab_resumo:
+        st.subheader("Resumo por Leilão")
+        with medir("render_resumo"):
+            render_resumo(agregados)
+
+    with tab_historico:
+        st.subheader("Histórico de Taxas por Título")
+        render_historico(series, tipo, titulo_inicial=data["TITULO"].iloc[0])
+
+
+def render_historico(series, tipo, titulo_inicial=None):
+    """
+    Série da taxa de corte de um título (TITULO, VENCIMENTO) ao longo de todos
+    os anos do armazém, a partir do índice de séries pré-montado.
+    """
+    if series is None or not series.titulos():
+        st.warning("Dados insuficientes para gerar o histórico de taxas.")
+        return
 
-    return data
+    titulos = series.titulos()
+    col_titulo, col_vencimento, col_frequencia, col_janela = st.columns(4)
+    titulo = col_titulo.selectbox(
+        "Título", titulos, index=titulos.index(titulo_inicial) if titulo_inicial in titulos else 0,
+        key="historico_titulo",
+    )
+    vencimento = col_vencimento.selectbox(
+        "Vencimento", series.vencimentos(titulo), format_func=formatar_data, key="historico_vencimento"
+    )
+    frequencia = col_frequencia.selectbox("Frequência", list(FREQUENCIAS), key="historico_frequencia")
+    janela = col_janela.number_input("Média móvel (pontos)", min_value=1, max_value=52, value=4,
+                                     key="historico_janela")
+
+    with medir("render_historico"):
+        serie = series.serie(titulo, vencimento, tipo=tipo or None, frequencia=FREQUENCIAS[frequencia],
+                             janela=int(janela))
+        fig = figura_historico_taxas(serie, f"{titulo} {formatar_data(vencimento)}")
+        if fig is not None:
+            st.plotly_chart(fig)
+    if fig is None:
+        st.warning("Não há taxas para este título no armazém.")
 
 
-def show_data(data):
+def render_resumo(agregados):
     """
-    Exibe a tabela, gráficos e opções de download.
+    Métricas por título e por leilão, lidas da tabela de agregados
+    materializada (sem reprocessar os registros).
     """
-    if data.empty:
-        st.warning("Nenhum dado encontrado para os filtros selecionados.")
+    if agregados is None or agregados.empty:
+        st.warning("Dados insuficientes para gerar o resumo.")
         return
 
-    st.success("Dados filtrados com sucesso!")
-    st.subheader("Dados Filtrados")
+    formatos = {
+        "COBERTURA": st.column_config.NumberColumn("COBERTURA", format="%.2fx"),
+        "TAXA MEDIA PONDERADA": st.column_config.NumberColumn("TAXA MEDIA PONDERADA", format="%.4f"),
+        "PARTICIPACAO SEGUNDA VOLTA": st.column_config.NumberColumn("PARTICIPACAO SEGUNDA VOLTA", format="percent"),
+        "DATA": st.column_config.DateColumn("DATA", format="DD-MM-YYYY"),
+        "VENCIMENTO": st.column_config.DateColumn("VENCIMENTO", format="DD-MM-YYYY"),
+    }
+    volumes = ["OFERTA", "TOTAL QUANTIDADE ACEITA", "TOTAL FINANCEIRO ACEITO"]
+
+    st.markdown("**Por título**")
+    por_titulo = resumir(agregados, ["TITULO"])
+    st.dataframe(por_titulo[["TITULO", "REGISTROS"] + volumes + METRICAS], column_config=formatos,
+                 hide_index=True)
+
+    st.markdown("**Por leilão**")
+    por_leilao = agregados.sort_values(["DATA", "TITULO", "VENCIMENTO"], ascending=[False, True, True])
+    st.dataframe(por_leilao[["DATA", "TIPO", "TITULO", "VENCIMENTO"] + volumes + METRICAS],
+                 column_config=formatos, hide_index=True)
+
+
+def render_download(data):
+    """
+    Botão de download no formato escolhido. O arquivo só é gerado quando o
+    usuário clica, e fica no cache para a mesma combinação de filtros.
+    """
+    col_formato, col_botao = st.columns([2, 1], vertical_alignment="bottom")
+    formato = col_formato.selectbox(
+        "Formato do download",
+        list(FORMATOS_DOWNLOAD),
+        format_func=lambda chave: FORMATOS_DOWNLOAD[chave][0],
+        key="download_formato",
+    )
+    _, extensao, mime = FORMATOS_DOWNLOAD[formato]
+    col_botao.download_button(
+        label=f"Baixar dados ({FORMATOS_DOWNLOAD[formato][0]})",
+        data=lambda: arquivo_download(data, formato),
+        file_name=f"resultado_leiloes.{extensao}",
+        mime=mime,
+        on_click="ignore",
+    )
+
+
+def render_table(data):
+    """
+    Exibe a tabela somente leitura, paginada no servidor: só a página
+    visível (com a ordenação e as colunas escolhidas) é enviada ao navegador.
+    """
+    colunas = st.multiselect("Colunas exibidas:", list(data.columns), default=list(data.columns),
+                             key="tabela_colunas")
+
+    col_tamanho, col_ordem, col_sentido, col_pagina = st.columns(4)
+    tamanho_pagina = col_tamanho.selectbox("Linhas por página:", TAMANHOS_PAGINA, index=1, key="tabela_tamanho")
+    ordenar_por = col_ordem.selectbox("Ordenar por:", [None] + list(data.columns), key="tabela_ordem",
+                                      format_func=lambda coluna: "(ordem original)" if coluna is None else coluna)
+    crescente = col_sentido.radio("Sentido:", ["Crescente", "Decrescente"], key="tabela_sentido",
+                                  horizontal=True) == "Crescente"
+    paginas = total_paginas(len(data), tamanho_pagina)
+    pagina = col_pagina.number_input(f"Página (de {paginas}):", min_value=1, max_value=paginas, value=1, step=1,
+                                     key="tabela_pagina")
+
+    janela = paginar(data, pagina, tamanho_pagina, ordenar_por, crescente, colunas)
+    st.caption(f"{len(data)} registros · exibindo {len(janela)} na página {min(pagina, paginas)} de {paginas}")
 
     # Exemplo de formatação com st.data_editor
     st.data_editor(
-        data,
+        janela,
         disabled=True,
         hide_index=True,
         column_config={
-            "DATA": {"width": 150, "height": 400},
+            "DATA": st.column_config.DateColumn(width=150, format="DD-MM-YYYY"),
             "TITULO": {"width": 150, "height": 400},
-            "VENCIMENTO": {"width": 150, "height": 400},
+            "VENCIMENTO": st.column_config.DateColumn(width=150, format="DD-MM-YYYY"),
             "OFERTA": {"width": 150, "height": 400},
             "TAXA": {"width": 80, "height": 400},
             "TOTAL QUANTIDADE ACEITA": {"width": 150, "height": 400},
@@ -227,63 +425,80 @@ def show_data(data):
         }
     )
 
-    # Botão de download do CSV
-    csv_data = data.to_csv(index=False)
-    st.download_button(
-        label="Baixar dados em CSV",
-        data=csv_data,
-        file_name="resultado_leiloes.csv",
-        mime="text/csv"
-    )
 
-    # Abas para diferentes gráficos
-    tab1, tab2, tab3 = st.tabs(["Volume Ofertado x Aceito", "Taxas de Corte", "Volume Financeiro Aceito"])
-
-    with tab1:
-        st.subheader("Volume Ofertado x Aceito")
-        if "OFERTA" in data.columns and "TOTAL QUANTIDADE ACEITA" in data.columns:
-            fig = px.bar(
-                data,
-                x="TITULO",
-                y=["OFERTA", "TOTAL QUANTIDADE ACEITA"],
-                barmode="group",
-                labels={"value": "Quantidade", "variable": "Tipo"},
-                title="Volume Ofertado x Aceito por Título"
-            )
-            st.plotly_chart(fig)
-        else:
-            st.warning("Dados insuficientes para gerar o gráfico.")
-
-    with tab2:
-        st.subheader("Taxas de Corte")
-        if "TAXA" in data.columns and not data["TAXA"].isnull().all():
-            fig = go.Figure()
-            fig.add_trace(go.Scatter(
-                x=data["VENCIMENTO"],
-                y=data["TAXA"],
-                mode='lines+markers',
-                name='Taxa',
-                line=dict(shape='linear'),
-                marker=dict(size=10)
-            ))
-            fig.update_layout(title="Evolução das Taxas de Corte", xaxis_title="Vencimento", yaxis_title="Taxa (%)")
-            st.plotly_chart(fig)
-        else:
-            st.warning("Dados insuficientes para gerar o gráfico de Taxas de Corte.")
-
-    with tab3:
-        st.subheader("Volume Financeiro Aceito")
-        if "TOTAL FINANCEIRO ACEITO" in data.columns:
-            fig = px.bar(
-                data,
-                x="TITULO",
-                y="TOTAL FINANCEIRO ACEITO",
-                title="Volume Financeiro Aceito por Título",
-                labels={"TOTAL FINANCEIRO ACEITO": "R$ (Total)", "TITULO": "Título"}
-            )
-            st.plotly_chart(fig)
-        else:
-            st.warning("Dados insuficientes para gerar o gráfico de Volume Financeiro Aceito.")
+def show_sql_panel():
+    """
+    Painel de consultas SQL ad hoc sobre o armazém local (tabelas `leiloes`
+    e `agregados`), para perguntas que os filtros do sidebar não cobrem.
+    """
+    with st.expander("Consulta SQL (avançado)"):
+        if not SQL_DISPONIVEL:
+            st.caption("Instale o pacote `duckdb` para habilitar as consultas SQL.")
+            return
+
+        esquema = tabelas(ARMAZEM)
+        if not esquema:
+            st.caption("O armazém local ainda está vazio: busque algum ano primeiro.")
+            return
+        for tabela, colunas in esquema.items():
+            st.caption(f"**{tabela}**: " + ", ".join(coluna for coluna, _ in colunas))
+
+        with st.form("consulta_sql"):
+            sql = st.text_area("SQL", value=SQL_EXEMPLO, height=150)
+            executar = st.form_submit_button("Executar")
+
+        resultado = None
+        if executar:
+            st.session_state.pop('sql_resultado', None)
+            try:
+                resultado = consultar(ARMAZEM, sql)
+            except Exception as e:
+                st.error(f"Erro na consulta: {e}")
+            else:
+                # Resultados grandes não ficam na sessão (teto de memória por sessão)
+                if cabe_na_sessao(st.session_state, resultado):
+                    st.session_state['sql_resultado'] = resultado
+                else:
+                    st.caption("Resultado grande demais para ficar guardado na sessão: "
+                               "será descartado na próxima interação.")
+
+        resultado = resultado or st.session_state.get('sql_resultado')
+        if resultado is not None:
+            resultado, truncado = resultado
+            st.caption(f"{len(resultado)} linhas" + (" (resultado truncado)" if truncado else ""))
+            st.dataframe(resultado, hide_index=True)
+
+
+def show_diagnostics():
+    """
+    Painel de diagnóstico: tempo, linhas e bytes de cada etapa do pipeline
+    (agregados do processo e medições mais recentes).
+    """
+    with st.sidebar.expander("Diagnóstico", expanded=True):
+        agregados = REGISTRO.agregados()
+        if not agregados:
+            st.caption("Nenhuma medição ainda.")
+            return
+
+        resumo = pd.DataFrame([
+            {
+                "ETAPA": etapa,
+                "EXECUÇÕES": valores["contagem"],
+                "MÉDIA (ms)": 1000 * valores["segundos"] / valores["contagem"],
+                "MÁXIMO (ms)": 1000 * valores["max_segundos"],
+                "LINHAS": valores["linhas"],
+                "BYTES": valores["bytes"],
+                "ERROS": valores["erros"],
+            }
+            for etapa, valores in agregados.items()
+        ]).sort_values("MÉDIA (ms)", ascending=False)
+        st.dataframe(resumo, hide_index=True)
+
+        recentes = pd.DataFrame(REGISTRO.ultimas(30)[::-1])
+        recentes["ms"] = 1000 * recentes["segundos"]
+        colunas = [coluna for coluna in ["etapa", "ms", "linhas", "bytes", "ano"] if coluna in recentes.columns]
+        st.caption("Medições mais recentes")
+        st.dataframe(recentes[colunas], hide_index=True)
 
 
 # -----------------------------------------------
@@ -300,16 +515,29 @@ def main():
     )
 
     # Exibir filtros e capturar retornos
-    ano, tipo, data_leilao, titulo_selecionado, vencimento, buscar_dados = show_filters_sidebar()
+    anos, tipo, data_leilao, titulo_selecionado, vencimento, buscar_dados = show_filters_sidebar()
+    show_cache_stats()
+    diagnostico = st.sidebar.toggle("Mostrar diagnóstico")
 
-    # Se clicou em "Buscar Dados", carrega e processa
+    # Depois do primeiro "Buscar Dados", os dados continuam na tela nas
+    # reexecuções (paginação, ordenação etc.) com os últimos filtros enviados
     if buscar_dados:
-        # 1) Carrega ou obtém do cache
-        data_bruta = load_data(ano, tipo)
+        st.session_state['dados_buscados'] = True
+
+    if st.session_state.get('dados_buscados'):
+        # 1) Obtém o dataset compartilhado (junto com os índices)
+        dataset = load_data(anos)
         # 2) Aplica filtros locais
-        data_filtrada = filter_data(data_bruta.copy(), tipo, data_leilao, titulo_selecionado, vencimento)
-        # 3) Exibe resultado
-        show_data(data_filtrada)
+        data_filtrada = filter_data(dataset.indice, tipo, data_leilao, titulo_selecionado, vencimento)
+        agregados = filter_data(dataset.indice_agregados, tipo, data_leilao, titulo_selecionado, vencimento)
+        # 3) Exibe resultado (com o indicador de frescor)
+        show_freshness(dataset)
+        show_data(data_filtrada, agregados, dataset.indice_series, tipo)
+
+    show_sql_panel()
+
+    if diagnostico:
+        show_diagnostics()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,26 @@
+"""
+Ingestão e armazenamento dos resultados de leilões do Tesouro Nacional.
+
+Este pacote não depende do Streamlit: os dashboards apenas consomem
+as funções daqui.
+"""
+from leiloes.analitico import agregar_leiloes, carregar_agregados, resumir
+from leiloes.api import API_URL, buscar_leiloes, normalizar_registros
+from leiloes.armazem import Armazem, sincronizar
+from leiloes.filtros import IndiceFiltros
+from leiloes.ingestao import carregar_anos, carregar_leiloes, catalogos
+
+__all__ = [
+    "API_URL",
+    "Armazem",
+    "IndiceFiltros",
+    "agregar_leiloes",
+    "buscar_leiloes",
+    "carregar_agregados",
+    "carregar_anos",
+    "carregar_leiloes",
+    "catalogos",
+    "normalizar_registros",
+    "resumir",
+    "sincronizar",
+]
@@ -0,0 +1,5 @@
+import sys
+
+from leiloes.cli import main
+
+sys.exit(main())
@@ -0,0 +1,183 @@
+import numpy as np
+import pandas as pd
+
+from leiloes.cache import CACHE, ttl_para_ano
+from leiloes.esquema import tipar
+from leiloes.metricas import medir
+
+# -----------------------------------------------
+# AGREGADOS POR LEILÃO
+# -----------------------------------------------
+# Um leilão é uma (DATA, TIPO, TITULO, VENCIMENTO). As tabelas guardam só
+# componentes somáveis (somas e contagens), para que agregados parciais
+# possam ser combinados (atualização incremental, totais por título, por
+# mês...) sem voltar aos registros; as métricas são derivadas deles.
+CHAVES_LEILAO = ["DATA", "TIPO", "TITULO", "VENCIMENTO"]
+
+COMPONENTES = [
+    "REGISTROS",
+    "OFERTA",
+    "TOTAL QUANTIDADE ACEITA",
+    "QUANTIDADE ACEITA SEGUNDA VOLTA",
+    "TOTAL FINANCEIRO ACEITO",
+    "FINANCEIRO ACEITO SEGUNDA VOLTA",
+    "PESO TAXA",
+    "TAXA X PESO",
+    "SOMA TAXA",
+    "CONTAGEM TAXA",
+]
+
+METRICAS = ["COBERTURA", "TAXA MEDIA PONDERADA", "PARTICIPACAO SEGUNDA VOLTA"]
+
+
+def _dividir(numerador, denominador):
+    """
+    Divisão vetorizada que devolve NaN onde o denominador é zero.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        resultado = numerador / denominador.replace(0, np.nan)
+    return resultado
+
+
+def taxa_ponderada(componentes):
+    """
+    TAXA ponderada pelo TOTAL FINANCEIRO ACEITO a partir dos componentes
+    (média simples quando não há financeiro).
+    """
+    return _dividir(componentes["TAXA X PESO"], componentes["PESO TAXA"]).fillna(
+        _dividir(componentes["SOMA TAXA"], componentes["CONTAGEM TAXA"])
+    )
+
+
+def derivar_metricas(agregados):
+    """
+    Calcula as métricas a partir dos componentes somados:
+
+    - COBERTURA: OFERTA / TOTAL QUANTIDADE ACEITA;
+    - TAXA MEDIA PONDERADA: TAXA ponderada pelo TOTAL FINANCEIRO ACEITO
+      (média simples quando não há financeiro, como em `graficos.taxa_media_ponderada`);
+    - PARTICIPACAO SEGUNDA VOLTA: fração da quantidade aceita na segunda volta.
+    """
+    agregados = agregados.copy(deep=False)
+    agregados["COBERTURA"] = _dividir(agregados["OFERTA"], agregados["TOTAL QUANTIDADE ACEITA"])
+    agregados["TAXA MEDIA PONDERADA"] = taxa_ponderada(agregados)
+    agregados["PARTICIPACAO SEGUNDA VOLTA"] = _dividir(
+        agregados["QUANTIDADE ACEITA SEGUNDA VOLTA"], agregados["TOTAL QUANTIDADE ACEITA"]
+    )
+    return agregados
+
+
+def resumir(agregados, chaves):
+    """
+    Recombina agregados (de leilão ou já resumidos) pelas `chaves` pedidas,
+    somando os componentes e recalculando as métricas.
+    """
+    if agregados.empty:
+        return pd.DataFrame(columns=list(chaves) + COMPONENTES + METRICAS)
+
+    somas = agregados.groupby(list(chaves), observed=True, sort=True, dropna=False)[COMPONENTES].sum()
+    return derivar_metricas(somas.reset_index())
+
+
+def agregar_leiloes(df):
+    """
+    Agrega os registros normalizados por leilão (CHAVES_LEILAO), em uma única
+    passada vetorizada de groupby.
+    """
+    if df.empty:
+        return pd.DataFrame(columns=CHAVES_LEILAO + COMPONENTES + METRICAS)
+
+    with medir("agregacao", linhas=len(df)) as medicao:
+        taxa = df["TAXA"]
+        peso = df["TOTAL FINANCEIRO ACEITO"].where(taxa.notna(), 0).fillna(0)
+        componentes = df[CHAVES_LEILAO].assign(**{
+            "REGISTROS": 1,
+            "OFERTA": df["OFERTA"].fillna(0),
+            "TOTAL QUANTIDADE ACEITA": df["TOTAL QUANTIDADE ACEITA"].fillna(0),
+            "QUANTIDADE ACEITA SEGUNDA VOLTA": df["QUANTIDADE ACEITA SEGUNDA VOLTA"].fillna(0),
+            "TOTAL FINANCEIRO ACEITO": df["TOTAL FINANCEIRO ACEITO"].fillna(0),
+            "FINANCEIRO ACEITO SEGUNDA VOLTA": df["FINANCEIRO ACEITO SEGUNDA VOLTA"].fillna(0),
+            "PESO TAXA": peso,
+            "TAXA X PESO": taxa.fillna(0) * peso,
+            "SOMA TAXA": taxa.fillna(0),
+            "CONTAGEM TAXA": taxa.notna().astype("int64"),
+        })
+        agregados = tipar(resumir(componentes, CHAVES_LEILAO))
+        medicao["linhas_saida"] = len(agregados)
+    return agregados
+
+
+def combinar(agregados, novos):
+    """
+    Junta uma tabela de agregados já materializada com os agregados de
+    registros novos (o mesmo leilão em ambas é somado).
+    """
+    if agregados is None or agregados.empty:
+        return novos
+    if novos.empty:
+        return agregados
+    return tipar(resumir(pd.concat([agregados, novos], ignore_index=True), CHAVES_LEILAO))
+
+
+# -----------------------------------------------
+# TABELAS MATERIALIZADAS (UMA POR ANO, NO ARMAZÉM)
+# -----------------------------------------------
+def atualizar_agregados(armazem, ano, novos_registros, a_partir_de=None):
+    """
+    Atualiza a tabela de agregados do ano com os registros recém-gravados,
+    sem reler o ano inteiro. Com `a_partir_de`, os leilões gravados dessa
+    DATA em diante foram substituídos: os agregados dessas datas são
+    descartados e refeitos a partir de `novos_registros` (em vez de somados
+    de novo). Se a tabela ainda não existir, ela é criada a partir do ano
+    completo.
+    """
+    if not armazem.contem_agregados(ano):
+        return materializar_agregados(armazem, ano)
+
+    agregados = armazem.ler_agregados([ano])
+    if a_partir_de is not None and not agregados.empty:
+        agregados = agregados[agregados["DATA"] < a_partir_de]
+    agregados = combinar(agregados, agregar_leiloes(novos_registros))
+    armazem.gravar_agregados(ano, agregados)
+    return agregados
+
+
+def materializar_agregados(armazem, ano):
+    """
+    (Re)constrói a tabela de agregados do ano a partir dos registros gravados.
+    """
+    agregados = agregar_leiloes(armazem.ler([ano]))
+    armazem.gravar_agregados(ano, agregados)
+    return agregados
+
+
+def carregar_agregados(armazem, anos=None, cache=CACHE):
+    """
+    Retorna a tabela de agregados por leilão dos anos pedidos (ou de todos os
+    anos do armazém). Anos gravados antes da existência das tabelas são
+    materializados na primeira leitura.
+
+    Anos encerrados ficam no cache do processo; o ano corrente é sempre lido
+    do disco (poucas centenas de linhas), para refletir a última sincronização.
+    """
+    anos = sorted(set(anos)) if anos else armazem.anos()
+    partes = []
+    for ano in anos:
+        if not armazem.contem(ano):
+            continue
+        fechado = ttl_para_ano(ano, armazem=armazem) is None
+        chave = ("agregados", str(armazem.diretorio), ano)
+        agregados = cache.obter(chave) if cache is not None and fechado else None
+        if agregados is None:
+            if armazem.contem_agregados(ano):
+                agregados = armazem.ler_agregados([ano])
+            else:
+                agregados = materializar_agregados(armazem, ano)
+            if cache is not None and fechado:
+                cache.guardar(chave, agregados)
+        partes.append(agregados)
+
+    partes = [parte for parte in partes if not parte.empty]
+    if not partes:
+        return pd.DataFrame(columns=CHAVES_LEILAO + COMPONENTES + METRICAS)
+    return tipar(pd.concat(partes, ignore_index=True))
@@ -0,0 +1,115 @@
+import os
+
+import pandas as pd
+
+try:
+    import ijson
+except ImportError:  # sem ijson, o corpo é decodificado inteiro com response.json()
+    ijson = None
+
+from leiloes.cliente import cliente_compartilhado, validador_da_resposta
+from leiloes.esquema import tipar
+from leiloes.metricas import medir
+from leiloes.validacao import QUARENTENA, MapaCampos, validar_registros
+
+# -----------------------------------------------
+# CONSTANTES
+# -----------------------------------------------
+API_URL = "https://apiapex.tesouro.gov.br/aria/v1/api-leiloes-pub/custom/resultados"
+
+COLUNAS = [
+    "DATA", "TITULO", "VENCIMENTO", "OFERTA", "QUANTIDADE ACEITA",
+    "QUANTIDADE ACEITA SEGUNDA VOLTA", "TAXA", "FINANCEIRO ACEITO",
+    "FINANCEIRO ACEITO SEGUNDA VOLTA", "TIPO"
+]
+
+# Registros normalizados por vez na leitura em streaming
+TAMANHO_LOTE = int(os.environ.get("LEILOES_TAMANHO_LOTE", 5000))
+
+
+# -----------------------------------------------
+# BUSCA E NORMALIZAÇÃO
+# -----------------------------------------------
+def _iterar_registros(response):
+    """
+    Itera sobre os itens de `registros` à medida que o corpo chega, sem montar
+    o dicionário completo da resposta (quando o ijson está instalado).
+    """
+    if ijson is None:
+        yield from response.json().get("registros", [])
+        return
+
+    response.raw.decode_content = True
+    yield from ijson.items(response.raw, "registros.item", use_float=True)
+
+
+def buscar_leiloes(base_url=API_URL, ano=None, tipo=None, verify=True, validador=None, tamanho_lote=TAMANHO_LOTE):
+    """
+    Busca os registros da API em streaming e já devolve o DataFrame tipado.
+    Cada registro é reduzido aos campos do esquema (`leiloes.validacao`,
+    reconhecendo campos renomeados) assim que é lido, e os
+    lotes de `tamanho_lote` registros são normalizados um a um, de modo que
+    o pico de memória fica próximo do tamanho do DataFrame final.
+
+    Retorna (df, validador). Com `validador` de uma busca anterior, a
+    requisição é condicional: se a API responder 304, df é None e o
+    conteúdo já armazenado continua válido.
+    """
+    params = {}
+    if ano:
+        params["ano"] = ano
+    if tipo:
+        params["tipo"] = tipo
+
+    cliente = cliente_compartilhado(base_url, verify=verify)
+    with medir("api_requisicao", ano=ano) as medicao:
+        response = cliente.get(params, validador=validador, stream=True)
+        medicao["status"] = response.status_code
+
+    with response:
+        if response.status_code == 304:
+            return None, validador
+
+        with medir("api_leitura", ano=ano) as medicao:
+            campos = MapaCampos()
+            lotes = []
+            lote = []
+            for registro in _iterar_registros(response):
+                lote.append(campos.reduzir(registro))
+                if len(lote) >= tamanho_lote:
+                    lotes.append(normalizar_registros(lote))
+                    lote = []
+            if lote:
+                lotes.append(normalizar_registros(lote))
+
+            df = tipar(pd.concat(lotes, ignore_index=True)) if lotes else pd.DataFrame()
+            medicao["linhas"] = len(df)
+            medicao["bytes"] = response.raw.tell()
+        return df, validador_da_resposta(response)
+
+
+def normalizar_registros(registros):
+    """
+    Converte os registros da API em um DataFrame tipado (ver `leiloes.esquema`)
+    com as colunas relevantes e os totais de primeira e segunda volta.
+
+    A conversão é validada pelo esquema de `leiloes.validacao`: campos
+    ausentes ou renomeados não quebram a carga, e linhas malformadas vão
+    para a quarentena do processo (`QUARENTENA`) em vez de derrubar o ano.
+    """
+    if not registros:
+        return pd.DataFrame()
+
+    with medir("normalizacao", linhas=len(registros)) as medicao:
+        df, quarentena, relatorio = validar_registros(registros)
+        QUARENTENA.registrar(quarentena, relatorio)
+        medicao["quarentena"] = relatorio["quarentena"]
+        medicao["linhas_por_segundo"] = relatorio["linhas_por_segundo"]
+        if relatorio["erros_por_campo"]:
+            medicao["erros_por_campo"] = relatorio["erros_por_campo"]
+        if relatorio["campos_ausentes"]:
+            medicao["campos_ausentes"] = relatorio["campos_ausentes"]
+        if relatorio["campos_renomeados"]:
+            medicao["campos_renomeados"] = relatorio["campos_renomeados"]
+
+    return df
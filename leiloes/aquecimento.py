@@ -0,0 +1,135 @@
+import logging
+import os
+import threading
+from datetime import date, datetime
+
+from leiloes.api import API_URL
+from leiloes.cache import CACHE, TTL_ANO_CORRENTE
+from leiloes.ingestao import MAX_PARALELO, carregar_anos, carregar_leiloes
+from leiloes.metricas import medir
+
+logger = logging.getLogger("leiloes.aquecimento")
+
+# -----------------------------------------------
+# CONFIGURAÇÕES
+# -----------------------------------------------
+# LEILOES_AQUECIMENTO=0 desliga o aquecedor.
+ATIVO = os.environ.get("LEILOES_AQUECIMENTO", "1") not in ("0", "false", "nao", "não")
+# Quantos anos anteriores ao corrente são carregados na partida
+ANOS_RECENTES = int(os.environ.get("LEILOES_AQUECIMENTO_ANOS", 5))
+# Intervalo de atualização do ano corrente, em segundos. O padrão fica abaixo
+# do TTL do cache, para que a entrada seja trocada antes de expirar.
+INTERVALO = float(os.environ.get("LEILOES_AQUECIMENTO_INTERVALO", TTL_ANO_CORRENTE * 0.8))
+INTERVALO_DIA_LEILAO = float(os.environ.get("LEILOES_AQUECIMENTO_INTERVALO_LEILAO", 120))
+# Dias da semana com leilão (0 = segunda); o Tesouro costuma leiloar às terças e quintas.
+DIAS_LEILAO = {int(dia) for dia in os.environ.get("LEILOES_DIAS_LEILAO", "1,3").split(",") if dia.strip()}
+
+
+def dia_de_leilao(hoje=None, dias_leilao=DIAS_LEILAO):
+    return (hoje or date.today()).weekday() in dias_leilao
+
+
+# -----------------------------------------------
+# AQUECEDOR EM SEGUNDO PLANO
+# -----------------------------------------------
+class Aquecedor:
+    """
+    Thread daemon que, na partida, carrega o ano corrente e os `anos_recentes`
+    anteriores no armazém e no cache, e depois atualiza o ano corrente a cada
+    `intervalo` segundos (`intervalo_dia_leilao` em dia de leilão). Roda fora
+    da thread do script e nunca bloqueia uma sessão: quem pede dados enquanto
+    o aquecedor trabalha segue o caminho normal de `carregar_leiloes`.
+    """
+
+    def __init__(self, armazem, base_url=API_URL, verify=True, anos_recentes=ANOS_RECENTES,
+                 intervalo=INTERVALO, intervalo_dia_leilao=INTERVALO_DIA_LEILAO, cache=CACHE):
+        self.armazem = armazem
+        self.base_url = base_url
+        self.verify = verify
+        self.anos_recentes = anos_recentes
+        self.intervalo = intervalo
+        self.intervalo_dia_leilao = intervalo_dia_leilao
+        self.cache = cache
+        self.ultima_atualizacao = None
+        self.erros = 0
+        self._parar = threading.Event()
+        self._thread = None
+
+    def proximo_intervalo(self, hoje=None):
+        return self.intervalo_dia_leilao if dia_de_leilao(hoje) else self.intervalo
+
+    def aquecer(self):
+        """
+        Carga inicial: ano corrente e anos recentes, em paralelo.
+        """
+        ano_corrente = date.today().year
+        anos = range(ano_corrente - self.anos_recentes, ano_corrente + 1)
+        with medir("aquecimento", anos=len(anos)) as medicao:
+            _, falhas = carregar_anos(self.armazem, anos, base_url=self.base_url, verify=self.verify,
+                                      max_paralelo=MAX_PARALELO)
+            medicao["falhas"] = len(falhas)
+        self.ultima_atualizacao = datetime.now()
+        for ano, erro in falhas.items():
+            logger.warning("Aquecimento do ano %s falhou: %s", ano, erro)
+        self.erros += len(falhas)
+
+    def atualizar_ano_corrente(self):
+        """
+        Sincroniza o ano corrente e troca a entrada do cache pela versão nova.
+        """
+        ano = date.today().year
+        with medir("aquecimento_atualizacao", ano=ano) as medicao:
+            df = carregar_leiloes(self.armazem, ano, base_url=self.base_url, verify=self.verify,
+                                  cache=self.cache, atualizar=True)
+            medicao["linhas"] = len(df)
+        self.ultima_atualizacao = datetime.now()
+
+    def _executar(self):
+        try:
+            self.aquecer()
+        except Exception:
+            self.erros += 1
+            logger.exception("Falha no aquecimento inicial")
+
+        while not self._parar.wait(self.proximo_intervalo()):
+            try:
+                self.atualizar_ano_corrente()
+            except Exception as e:
+                self.erros += 1
+                logger.warning("Falha ao atualizar o ano corrente: %s", e)
+
+    def iniciar(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._parar.clear()
+            self._thread = threading.Thread(target=self._executar, name="leiloes-aquecedor", daemon=True)
+            self._thread.start()
+        return self
+
+    def parar(self, timeout=None):
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    @property
+    def ativo(self):
+        return self._thread is not None and self._thread.is_alive()
+
+
+_aquecedores = {}
+_trava_aquecedores = threading.Lock()
+
+
+def iniciar_aquecedor(armazem, base_url=API_URL, verify=True, **opcoes):
+    """
+    Inicia (uma única vez por processo) o aquecedor de (diretório, base_url,
+    verify) e o retorna. Pode ser chamada a cada reexecução do script.
+    Retorna None se o aquecedor estiver desligado (LEILOES_AQUECIMENTO=0).
+    """
+    if not ATIVO:
+        return None
+
+    chave = (str(armazem.diretorio), base_url, verify)
+    with _trava_aquecedores:
+        if chave not in _aquecedores:
+            _aquecedores[chave] = Aquecedor(armazem, base_url=base_url, verify=verify, **opcoes).iniciar()
+        return _aquecedores[chave]
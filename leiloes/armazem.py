@@ -0,0 +1,308 @@
+import json
+import os
+import re
+import tempfile
+import threading
+from collections import Counter
+from datetime import date, datetime
+from pathlib import Path
+
+import pandas as pd
+
+from leiloes.analitico import atualizar_agregados
+from leiloes.api import API_URL, buscar_leiloes
+from leiloes.esquema import tipar
+from leiloes.historico import ler_historico, publicar_se_desatualizado
+from leiloes.metricas import medir
+
+# -----------------------------------------------
+# CONSTANTES
+# -----------------------------------------------
+DIRETORIO_PADRAO = os.environ.get("LEILOES_DIRETORIO", "dados")
+
+_PADRAO_ARQUIVO = re.compile(r"^leiloes_(\d{4})\.parquet$")
+
+# Chave em sincronizacoes.json da última busca do histórico completo (sem filtro de ano)
+HISTORICO_COMPLETO = "historico_completo"
+
+# Uma trava por processo: sessões e threads paralelas gravam os mesmos
+# validadores.json e sincronizacoes.json
+_TRAVA_METADADOS = threading.Lock()
+
+
+# -----------------------------------------------
+# ARMAZÉM LOCAL (PARQUET POR ANO)
+# -----------------------------------------------
+class Armazem:
+    """
+    Armazém em disco dos registros normalizados, um arquivo Parquet por ano.
+    """
+
+    def __init__(self, diretorio=DIRETORIO_PADRAO):
+        self.diretorio = Path(diretorio)
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+
+    def caminho(self, ano):
+        return self.diretorio / f"leiloes_{ano}.parquet"
+
+    def anos(self):
+        """
+        Retorna os anos já gravados, em ordem crescente.
+        """
+        anos = []
+        for arquivo in self.diretorio.iterdir():
+            encontrado = _PADRAO_ARQUIVO.match(arquivo.name)
+            if encontrado:
+                anos.append(int(encontrado.group(1)))
+        return sorted(anos)
+
+    def contem(self, ano):
+        return self.caminho(ano).exists()
+
+    def assinatura(self, anos=None):
+        """
+        Retorna {ano: [mtime_ns, tamanho]} dos Parquet gravados (de todos os
+        anos ou só dos `anos`). Muda sempre que um ano é regravado: o que é
+        derivado dos arquivos vale enquanto a assinatura não mudar.
+        """
+        assinatura = {}
+        for ano in (self.anos() if anos is None else anos):
+            try:
+                info = self.caminho(ano).stat()
+            except FileNotFoundError:
+                continue
+            assinatura[str(ano)] = [info.st_mtime_ns, info.st_size]
+        return assinatura
+
+    def ler(self, anos=None):
+        """
+        Lê os anos pedidos (ou todos, se `anos` for None) em um único DataFrame.
+        Usa o histórico mapeado em memória quando ele está em dia com os
+        Parquet (ver `leiloes.historico`); senão, lê os Parquet.
+        """
+        anos = self.anos() if anos is None else [ano for ano in anos if self.contem(ano)]
+        if not anos:
+            return pd.DataFrame()
+
+        with medir("armazem_leitura", anos=len(anos)) as medicao:
+            df = ler_historico(self, anos)
+            medicao["origem"] = "historico" if df is not None else "parquet"
+            df = tipar(df) if df is not None else self.ler_parquet(anos)
+            medicao["linhas"] = len(df)
+        return df
+
+    def ler_parquet(self, anos):
+        """
+        Lê os anos pedidos direto dos arquivos Parquet.
+        """
+        anos = [ano for ano in anos if self.contem(ano)]
+        if not anos:
+            return pd.DataFrame()
+        with medir("parquet_leitura", anos=len(anos)) as medicao:
+            df = tipar(pd.concat([pd.read_parquet(self.caminho(ano)) for ano in anos], ignore_index=True))
+            medicao["linhas"] = len(df)
+            medicao["bytes"] = sum(self.caminho(ano).stat().st_size for ano in anos)
+        return df
+
+    def caminho_agregados(self, ano):
+        return self.diretorio / f"agregados_{ano}.parquet"
+
+    def contem_agregados(self, ano):
+        return self.caminho_agregados(ano).exists()
+
+    def ler_agregados(self, anos):
+        """
+        Lê as tabelas de agregados por leilão dos anos pedidos (ver `leiloes.analitico`).
+        """
+        anos = [ano for ano in anos if self.contem_agregados(ano)]
+        if not anos:
+            return pd.DataFrame()
+        return tipar(pd.concat([pd.read_parquet(self.caminho_agregados(ano)) for ano in anos], ignore_index=True))
+
+    def gravar_agregados(self, ano, agregados):
+        self._gravar_atomico(self.caminho_agregados(ano),
+                             lambda caminho: agregados.to_parquet(caminho, index=False))
+
+    def _gravar_atomico(self, destino, escrever):
+        """
+        Grava via arquivo temporário + rename, para nunca expor arquivo parcial.
+        """
+        fd, temporario = tempfile.mkstemp(dir=self.diretorio, suffix=".tmp")
+        os.close(fd)
+        try:
+            escrever(temporario)
+            os.replace(temporario, destino)
+        except BaseException:
+            os.remove(temporario)
+            raise
+
+    def gravar(self, ano, df):
+        """
+        Grava o DataFrame do ano de forma atômica.
+        """
+        self._gravar_atomico(self.caminho(ano), lambda caminho: df.to_parquet(caminho, index=False))
+
+    def _ler_metadados(self, nome):
+        arquivo = self.diretorio / nome
+        if not arquivo.exists():
+            return {}
+        with open(arquivo, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _atualizar_metadados(self, nome, ano, valor):
+        with _TRAVA_METADADOS:
+            metadados = self._ler_metadados(nome)
+            if valor:
+                metadados[str(ano)] = valor
+            else:
+                metadados.pop(str(ano), None)
+
+            def escrever(caminho):
+                with open(caminho, "w", encoding="utf-8") as f:
+                    json.dump(metadados, f)
+
+            self._gravar_atomico(self.diretorio / nome, escrever)
+
+    def validador(self, ano):
+        """
+        Retorna o ETag/Last-Modified da última resposta da API para o ano, se houver.
+        """
+        return self._ler_metadados("validadores.json").get(str(ano))
+
+    def gravar_validador(self, ano, validador):
+        self._atualizar_metadados("validadores.json", ano, validador)
+
+    def ultima_sincronizacao(self, ano):
+        """
+        Retorna o instante (datetime) da última resposta bem-sucedida da API
+        para o ano (200 ou 304), ou None.
+        """
+        instante = self._ler_metadados("sincronizacoes.json").get(str(ano))
+        return datetime.fromisoformat(instante) if instante else None
+
+    def registrar_sincronizacao(self, ano, instante=None):
+        self._atualizar_metadados("sincronizacoes.json", ano,
+                                  (instante or datetime.now()).isoformat(timespec="seconds"))
+
+    def historico_completo(self):
+        """
+        Indica se o histórico completo já foi buscado na API. Um armazém não
+        vazio pode ter só alguns anos (aquecedor, buscas por intervalo).
+        """
+        return self.ultima_sincronizacao(HISTORICO_COMPLETO) is not None
+
+    def ano_encerrado(self, ano):
+        """
+        Indica se o ano gravado está completo: só depois de uma sincronização
+        feita já no ano seguinte, quando os leilões dos últimos dias do ano
+        certamente foram publicados. Antes disso, o ano continua indo à API
+        mesmo depois da virada do calendário.
+        """
+        sincronizado = self.ultima_sincronizacao(ano)
+        return sincronizado is not None and sincronizado >= datetime(ano + 1, 1, 1) and self.contem(ano)
+
+    def ultima_data(self, ano=None):
+        """
+        Retorna a DATA mais recente gravada (no ano, se informado) ou None.
+        """
+        df = self.ler([ano] if ano else None)
+        if df.empty:
+            return None
+        return df["DATA"].max()
+
+
+# -----------------------------------------------
+# SINCRONIZAÇÃO INCREMENTAL
+# -----------------------------------------------
+def _linhas_diferentes(df, referencia):
+    """
+    Quantas linhas diferem entre `df` e `referencia` (comparação por valores,
+    linha a linha, contando repetições), nos dois sentidos: linhas novas ou
+    corrigidas em `df` e linhas de `referencia` que sumiram de `df`. Uma
+    correção conta uma vez só.
+    """
+    def assinaturas(tabela):
+        tabela = tabela.astype({coluna: str for coluna in tabela.columns
+                                if isinstance(tabela[coluna].dtype, pd.CategoricalDtype)})
+        return Counter(pd.util.hash_pandas_object(tabela, index=False).tolist())
+
+    recebidas = assinaturas(df)
+    gravadas = assinaturas(referencia[list(df.columns)])
+    return max(sum((recebidas - gravadas).values()), sum((gravadas - recebidas).values()))
+
+
+def _anexar_novos(armazem, ano, df_ano):
+    """
+    Atualiza o ano gravado com os leilões a partir da última DATA salva.
+    Resultados de datas anteriores não mudam e o que já está em disco é
+    mantido; os da última data são substituídos pelos recebidos, porque a
+    API pode completá-los depois (segunda volta, outro tipo de leilão no
+    mesmo dia) ou removê-los. Na tabela de agregados, só essas datas são
+    refeitas. Retorna quantos registros são novos, mudaram ou sumiram.
+    """
+    ultima = armazem.ultima_data(ano)
+    if ultima is None:
+        armazem.gravar(ano, df_ano.reset_index(drop=True))
+        atualizar_agregados(armazem, ano, df_ano)
+        return len(df_ano)
+
+    gravado = armazem.ler([ano])
+    recebidos = df_ano[df_ano["DATA"] >= ultima]
+    alterados = _linhas_diferentes(recebidos, gravado[gravado["DATA"] >= ultima])
+    if alterados:
+        armazem.gravar(ano, tipar(pd.concat([gravado[gravado["DATA"] < ultima], recebidos], ignore_index=True)))
+        atualizar_agregados(armazem, ano, recebidos, a_partir_de=ultima)
+    return alterados
+
+
+def anos_pendentes(armazem, anos):
+    """
+    Anos que precisam ir à API: os que ainda não estão no armazém, o ano
+    corrente e os anos passados ainda não encerrados (ver `Armazem.ano_encerrado`),
+    que ainda podem receber leilões.
+    """
+    return [ano for ano in anos if not armazem.ano_encerrado(ano)]
+
+
+def sincronizar(armazem, anos=None, base_url=API_URL, verify=True):
+    """
+    Atualiza o armazém buscando na API somente o que pode ter mudado.
+
+    Com `anos` informado, busca apenas os anos pendentes; sem `anos`, busca o
+    histórico completo uma única vez (mesmo que o armazém já tenha alguns
+    anos) e depois só os anos gravados e o ano corrente.
+    Retorna um dicionário {ano: quantidade de registros novos}.
+    """
+    novos_por_ano = {}
+
+    if anos is None:
+        if armazem.historico_completo():
+            anos = sorted(set(armazem.anos()) | {date.today().year})
+        else:
+            df, _ = buscar_leiloes(base_url, verify=verify)
+            if df.empty:
+                return novos_por_ano
+            for ano, df_ano in df.groupby(df["DATA"].dt.year):
+                novos_por_ano[int(ano)] = _anexar_novos(armazem, int(ano), df_ano)
+                armazem.registrar_sincronizacao(int(ano))
+            armazem.registrar_sincronizacao(HISTORICO_COMPLETO)
+            publicar_se_desatualizado(armazem)
+            return novos_por_ano
+
+    for ano in anos_pendentes(armazem, anos):
+        # Requisição condicional: se o ano não mudou, a API responde 304 sem corpo
+        validador = armazem.validador(ano) if armazem.contem(ano) else None
+        df_ano, validador = buscar_leiloes(base_url, ano=ano, verify=verify, validador=validador)
+        armazem.registrar_sincronizacao(ano)
+        if df_ano is None:
+            novos_por_ano[ano] = 0
+            continue
+
+        if not df_ano.empty:
+            novos_por_ano[ano] = _anexar_novos(armazem, ano, df_ano)
+            armazem.gravar_validador(ano, validador)
+
+    # Os demais processos passam a ler os registros novos do histórico mapeado
+    if any(novos_por_ano.values()):
+        publicar_se_desatualizado(armazem)
+    return novos_por_ano
@@ -0,0 +1,256 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+
+import pandas as pd
+
+# -----------------------------------------------
+# CONFIGURAÇÕES
+# -----------------------------------------------
+ORCAMENTO_MB = float(os.environ.get("LEILOES_CACHE_MB", 512))
+TTL_ANO_CORRENTE = float(os.environ.get("LEILOES_CACHE_TTL_ANO_CORRENTE", 600))
+
+
+def tamanho_em_bytes(valor):
+    """
+    Estima a memória ocupada por um valor guardado no cache.
+    """
+    if isinstance(valor, pd.DataFrame):
+        return int(valor.memory_usage(deep=True).sum())
+    if isinstance(valor, pd.Series):
+        return int(valor.memory_usage(deep=True))
+    if isinstance(valor, (bytes, bytearray, str)):
+        return len(valor)
+    return 0
+
+
+def ttl_para_ano(ano, hoje=None, armazem=None):
+    """
+    Anos encerrados não mudam mais e ficam em cache sem expirar (None);
+    o ano corrente (ou o histórico completo, `ano` None) expira após
+    TTL_ANO_CORRENTE segundos. Com `armazem`, um ano passado só conta como
+    encerrado depois de sincronizado já no ano seguinte (`Armazem.ano_encerrado`).
+    """
+    if not ano or ano >= (hoje or date.today()).year:
+        return TTL_ANO_CORRENTE
+    if armazem is not None and not armazem.ano_encerrado(ano):
+        return TTL_ANO_CORRENTE
+    return None
+
+
+# -----------------------------------------------
+# CACHE LRU COM ORÇAMENTO DE MEMÓRIA E TTL
+# -----------------------------------------------
+class CacheLRU:
+    """
+    Cache em memória, compartilhado pelo processo, limitado por um orçamento
+    em bytes com descarte LRU e TTL por entrada. Guarda contadores de
+    acertos, faltas, descartes e expirações.
+    """
+
+    def __init__(self, orcamento_bytes=int(ORCAMENTO_MB * 1024 * 1024), relogio=time.monotonic):
+        self.orcamento_bytes = orcamento_bytes
+        self._relogio = relogio
+        self._entradas = OrderedDict()  # chave -> (valor, tamanho, expira_em, guardado_em)
+        self._bytes = 0
+        self._trava = threading.RLock()
+        self.acertos = 0
+        self.faltas = 0
+        self.descartes = 0
+        self.expiracoes = 0
+        self.obsoletos = 0
+
+    def obter(self, chave, padrao=None, contar=True):
+        """
+        Retorna o valor da chave (marcando-o como usado) ou `padrao`.
+        Entradas expiradas contam como falta, mas continuam guardadas (até
+        serem substituídas ou descartadas pelo LRU) para `obter_com_frescor`.
+
+        Com `contar=False`, a consulta não entra nos contadores (para uma
+        segunda olhada na mesma chave, já contada por quem a consultou antes).
+        """
+        with self._trava:
+            entrada = self._entradas.get(chave)
+            if entrada is None:
+                self.faltas += contar
+                return padrao
+
+            valor, _, expira_em, _ = entrada
+            if expira_em is not None and self._relogio() >= expira_em:
+                self.expiracoes += contar
+                self.faltas += contar
+                return padrao
+
+            self._entradas.move_to_end(chave)
+            self.acertos += contar
+            return valor
+
+    def obter_com_frescor(self, chave):
+        """
+        Retorna (valor, expirado, guardado_em) ou None. Diferente de `obter`,
+        devolve também entradas expiradas, para servir o último valor bom
+        enquanto ele é revalidado (stale-while-revalidate). `guardado_em` é o
+        instante (time.time) em que o valor foi guardado.
+        """
+        with self._trava:
+            entrada = self._entradas.get(chave)
+            if entrada is None:
+                self.faltas += 1
+                return None
+
+            valor, _, expira_em, guardado_em = entrada
+            expirado = expira_em is not None and self._relogio() >= expira_em
+            self._entradas.move_to_end(chave)
+            if expirado:
+                self.obsoletos += 1
+            else:
+                self.acertos += 1
+            return valor, expirado, guardado_em
+
+    def espiar(self, chave):
+        """
+        Retorna (expirado, guardado_em) da entrada, ou None, sem contar como
+        acesso (para indicadores, sem mexer nos contadores nem na ordem LRU).
+        """
+        with self._trava:
+            entrada = self._entradas.get(chave)
+            if entrada is None:
+                return None
+            _, _, expira_em, guardado_em = entrada
+            return expira_em is not None and self._relogio() >= expira_em, guardado_em
+
+    def guardar(self, chave, valor, ttl=None):
+        """
+        Guarda o valor; `ttl` em segundos (None = sem expiração). Descarta as
+        entradas menos usadas até caber no orçamento. Valores maiores que o
+        orçamento inteiro não são guardados.
+        """
+        tamanho = tamanho_em_bytes(valor)
+        expira_em = self._relogio() + ttl if ttl is not None else None
+
+        with self._trava:
+            if chave in self._entradas:
+                self._remover(chave)
+            if tamanho > self.orcamento_bytes:
+                return valor
+
+            while self._entradas and self._bytes + tamanho > self.orcamento_bytes:
+                chave_antiga = next(iter(self._entradas))
+                self._remover(chave_antiga)
+                self.descartes += 1
+
+            self._entradas[chave] = (valor, tamanho, expira_em, time.time())
+            self._bytes += tamanho
+        return valor
+
+    def invalidar(self, chave=None):
+        """
+        Remove uma chave (ou tudo, se `chave` for None).
+        """
+        with self._trava:
+            if chave is None:
+                self._entradas.clear()
+                self._bytes = 0
+            elif chave in self._entradas:
+                self._remover(chave)
+
+    def _remover(self, chave):
+        _, tamanho, _, _ = self._entradas.pop(chave)
+        self._bytes -= tamanho
+
+    def estatisticas(self):
+        with self._trava:
+            consultas = self.acertos + self.faltas
+            return {
+                "entradas": len(self._entradas),
+                "bytes": self._bytes,
+                "orcamento_bytes": self.orcamento_bytes,
+                "acertos": self.acertos,
+                "faltas": self.faltas,
+                "taxa_acerto": self.acertos / consultas if consultas else 0.0,
+                "descartes": self.descartes,
+                "expiracoes": self.expiracoes,
+                "obsoletos_servidos": self.obsoletos,
+            }
+
+
+# Instância única do processo: as sessões do Streamlit compartilham o mesmo cache
+CACHE = CacheLRU()
+
+
+# -----------------------------------------------
+# COALESCÊNCIA DE CHAMADAS CONCORRENTES (SINGLE-FLIGHT)
+# -----------------------------------------------
+class _Chamada:
+    def __init__(self):
+        self.concluida = threading.Event()
+        self.resultado = None
+        self.erro = None
+        self.abandonada = False
+
+
+class Coalescedor:
+    """
+    Garante uma única execução em andamento por chave: quem chega enquanto
+    a chave já está sendo calculada espera essa execução e recebe o mesmo
+    resultado (ou a mesma exceção), em vez de repetir a chamada à API.
+
+    Só erros comuns (Exception) são repassados a quem espera. Se a execução
+    for interrompida por outra BaseException (KeyboardInterrupt, ou o
+    Streamlit parando a sessão que a iniciou), ela é abandonada: quem
+    esperava tenta de novo e um deles passa a executá-la.
+    """
+
+    def __init__(self):
+        self._trava = threading.Lock()
+        self._em_andamento = {}
+        self.execucoes = 0
+        self.coalescidas = 0
+
+    def executar(self, chave, funcao):
+        while True:
+            with self._trava:
+                chamada = self._em_andamento.get(chave)
+                lider = chamada is None
+                if lider:
+                    chamada = self._em_andamento[chave] = _Chamada()
+                    self.execucoes += 1
+                else:
+                    self.coalescidas += 1
+
+            if lider:
+                break
+            chamada.concluida.wait()
+            if chamada.abandonada:
+                continue
+            if chamada.erro is not None:
+                raise chamada.erro
+            return chamada.resultado
+
+        try:
+            chamada.resultado = funcao()
+        except Exception as e:
+            chamada.erro = e
+            raise
+        except BaseException:
+            chamada.abandonada = True
+            raise
+        finally:
+            with self._trava:
+                del self._em_andamento[chave]
+            chamada.concluida.set()
+        return chamada.resultado
+
+    def estatisticas(self):
+        with self._trava:
+            return {
+                "em_andamento": len(self._em_andamento),
+                "execucoes": self.execucoes,
+                "coalescidas": self.coalescidas,
+            }
+
+
+# Instância única do processo, usada nas faltas do cache
+COALESCEDOR = Coalescedor()
@@ -0,0 +1,165 @@
+"""
+Modo cassete do cliente HTTP: grava as respostas da API em disco
+(comprimidas, uma por conjunto de parâmetros) e depois as reproduz sem rede,
+de forma determinística e com latência injetável. Serve para medir
+desempenho e reproduzir problemas offline com payloads reais.
+
+Ativado por variáveis de ambiente (lidas pelo `ClienteTesouro`):
+
+    LEILOES_CASSETE=cassetes/               # diretório das gravações
+    LEILOES_CASSETE_MODO=reproduzir         # gravar | reproduzir | auto
+    LEILOES_CASSETE_LATENCIA=0.2            # atraso por resposta reproduzida, em segundos
+
+No modo `auto`, o que já foi gravado é reproduzido e o resto é gravado.
+"""
+import gzip
+import hashlib
+import io
+import json
+import os
+import time
+from pathlib import Path
+from urllib.parse import parse_qsl, urlsplit
+
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPResponse
+
+# -----------------------------------------------
+# CONFIGURAÇÕES
+# -----------------------------------------------
+DIRETORIO_CASSETE = os.environ.get("LEILOES_CASSETE")
+MODO_CASSETE = os.environ.get("LEILOES_CASSETE_MODO", "reproduzir")
+LATENCIA_CASSETE = float(os.environ.get("LEILOES_CASSETE_LATENCIA", 0))
+
+MODOS = ("gravar", "reproduzir", "auto")
+CABECALHOS_GRAVADOS = ("Content-Type", "ETag", "Last-Modified")
+
+
+class GravacaoAusente(LookupError):
+    """
+    No modo `reproduzir`, a requisição não tem gravação no cassete. Não é
+    erro de rede: não conta como falha da API no disjuntor do cliente.
+    """
+
+
+class Cassete:
+    """
+    Gravações em disco, uma por requisição (caminho da URL + parâmetros
+    ordenados; o host não entra na chave). Cada gravação tem um `.json`
+    com status e cabeçalhos e um `.gz` com o corpo.
+    """
+
+    def __init__(self, diretorio, modo=MODO_CASSETE, latencia=LATENCIA_CASSETE):
+        if modo not in MODOS:
+            raise ValueError(f"Modo de cassete desconhecido: {modo}. Use um de {', '.join(MODOS)}.")
+        self.diretorio = Path(diretorio)
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+        self.modo = modo
+        self.latencia = latencia
+
+    @staticmethod
+    def chave(url):
+        partes = urlsplit(url)
+        parametros = sorted(parse_qsl(partes.query, keep_blank_values=True))
+        identificador = json.dumps([partes.path, parametros])
+        return hashlib.sha1(identificador.encode("utf-8")).hexdigest()[:20]
+
+    def _arquivos(self, chave):
+        return self.diretorio / f"{chave}.json", self.diretorio / f"{chave}.gz"
+
+    def contem(self, url):
+        return self._arquivos(self.chave(url))[0].exists()
+
+    def ler(self, url):
+        """
+        Retorna (metadados, corpo comprimido) da gravação da URL.
+        """
+        meta, corpo = self._arquivos(self.chave(url))
+        with open(meta, encoding="utf-8") as f:
+            metadados = json.load(f)
+        return metadados, corpo.read_bytes()
+
+    def gravar(self, url, status, cabecalhos, corpo):
+        """
+        Grava a resposta (corpo já decodificado, comprimido aqui com gzip).
+        Os dois arquivos são escritos por rename atômico, corpo primeiro.
+        """
+        meta, arquivo_corpo = self._arquivos(self.chave(url))
+        partes = urlsplit(url)
+        metadados = {
+            "caminho": partes.path,
+            "parametros": sorted(parse_qsl(partes.query, keep_blank_values=True)),
+            "status": status,
+            "cabecalhos": {nome: cabecalhos[nome] for nome in CABECALHOS_GRAVADOS if nome in cabecalhos},
+            "gravado_em": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        for destino, conteudo in ((arquivo_corpo, gzip.compress(corpo, compresslevel=6, mtime=0)),
+                                  (meta, json.dumps(metadados, ensure_ascii=False, indent=1).encode("utf-8"))):
+            temporario = destino.with_suffix(destino.suffix + ".tmp")
+            temporario.write_bytes(conteudo)
+            os.replace(temporario, destino)
+
+
+class AdaptadorCassete(HTTPAdapter):
+    """
+    Adaptador do requests que grava e/ou reproduz as respostas do cassete.
+    Toda resposta entregue ao chamador vem da gravação (também no modo
+    `gravar`), então os dois modos se comportam igual: corpo gzip lido em
+    streaming e GET condicional respondido com 304 quando o ETag confere.
+    """
+
+    def __init__(self, cassete, **kwargs):
+        self.cassete = cassete
+        super().__init__(**kwargs)
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        gravado = self.cassete.contem(request.url)
+        if self.cassete.modo == "gravar" or (self.cassete.modo == "auto" and not gravado):
+            erro = self._gravar(request, timeout=timeout, verify=verify, cert=cert, proxies=proxies)
+            if erro is not None:
+                return erro
+        elif not gravado:
+            raise GravacaoAusente(f"Requisição sem gravação no cassete: {request.url}")
+        elif self.cassete.latencia:
+            time.sleep(self.cassete.latencia)
+        return self._reproduzir(request)
+
+    def _gravar(self, request, **kwargs):
+        """
+        Busca a resposta real e a grava. Respostas de erro não são gravadas:
+        são devolvidas como vieram, para o tratamento normal do cliente.
+        """
+        # A gravação é sempre a resposta completa: sem os cabeçalhos condicionais
+        original = request.copy()
+        for cabecalho in ("If-None-Match", "If-Modified-Since"):
+            original.headers.pop(cabecalho, None)
+        resposta = super().send(original, stream=False, **kwargs)
+        if resposta.status_code >= 400:
+            return resposta
+        self.cassete.gravar(request.url, resposta.status_code, resposta.headers, resposta.content)
+        return None
+
+    def _reproduzir(self, request):
+        metadados, corpo = self.cassete.ler(request.url)
+        cabecalhos = dict(metadados["cabecalhos"])
+        etag = cabecalhos.get("ETag")
+
+        if etag and request.headers.get("If-None-Match") == etag:
+            status, corpo, cabecalhos = 304, b"", {"ETag": etag}
+        else:
+            status = metadados["status"]
+            cabecalhos["Content-Encoding"] = "gzip"
+        cabecalhos["Content-Length"] = str(len(corpo))
+
+        bruto = HTTPResponse(body=io.BytesIO(corpo), headers=cabecalhos, status=status,
+                             preload_content=False, decode_content=True, request_url=request.url)
+        return self.build_response(request, bruto)
+
+
+def cassete_do_ambiente():
+    """
+    Retorna o Cassete configurado por LEILOES_CASSETE, ou None.
+    """
+    if not DIRETORIO_CASSETE:
+        return None
+    return Cassete(DIRETORIO_CASSETE, MODO_CASSETE, LATENCIA_CASSETE)
@@ -0,0 +1,157 @@
+"""
+Modo de linha de comando (sem Streamlit) para sincronizar e exportar os
+resultados de leilões, pensado para cron e pipelines de dados.
+
+Exemplos:
+    python -m leiloes exportar --anos 2010-2026 --formato parquet --saida leiloes.parquet
+    python -m leiloes exportar --anos 2024 --tipo VENDA --titulo LTN --formato csv --saida ltn.csv
+    python -m leiloes sincronizar --anos 2025 2026
+    python -m leiloes consultar "SELECT TITULO, avg(TAXA) FROM leiloes GROUP BY 1"
+"""
+import argparse
+import logging
+import sys
+
+import pandas as pd
+
+from leiloes.api import API_URL
+from leiloes.armazem import DIRETORIO_PADRAO, Armazem, sincronizar
+from leiloes.consulta import LIMITE_LINHAS, consultar
+from leiloes.esquema import FORMATO_DATA
+from leiloes.exportacao import FORMATOS, EscritorLotes
+from leiloes.filtros import IndiceFiltros
+from leiloes.ingestao import carregar_leiloes
+from leiloes.metricas import ARQUIVO_PROMETHEUS, REGISTRO
+
+logger = logging.getLogger("leiloes")
+
+
+def parse_anos(valores):
+    """
+    Aceita anos soltos ("2023 2024") e intervalos ("2010-2026").
+    Sem valores, retorna None (histórico completo).
+    """
+    if not valores:
+        return None
+
+    anos = set()
+    for valor in valores:
+        if "-" in valor:
+            inicio, fim = (int(parte) for parte in valor.split("-", 1))
+            if fim < inicio:
+                raise ValueError(f"Intervalo de anos inválido: {valor}")
+            anos.update(range(inicio, fim + 1))
+        else:
+            anos.add(int(valor))
+    return sorted(anos)
+
+
+def parse_data(texto):
+    """
+    Converte uma data no formato do dashboard ('%d-%m-%Y', aceitando '/') em Timestamp.
+    """
+    return pd.to_datetime(texto.replace("/", "-"), format=FORMATO_DATA)
+
+
+def gerar_lotes(armazem, anos, filtros, base_url=API_URL, verify=True):
+    """
+    Gera um DataFrame filtrado por ano, um de cada vez. Um ano que falhar na
+    API é exportado com o que houver no armazém local.
+    """
+    for ano in anos or [None]:
+        try:
+            df = carregar_leiloes(armazem, ano, base_url=base_url, verify=verify, cache=None)
+        except Exception as e:
+            logger.warning("Erro ao sincronizar %s com a API, usando dados locais: %s", ano or "o histórico", e)
+            df = armazem.ler([ano] if ano else None)
+
+        lote = IndiceFiltros(df).filtrar(**filtros)
+        logger.info("Ano %s: %d registros", ano or "todos", len(lote))
+        yield lote
+
+
+def comando_exportar(args):
+    armazem = Armazem(args.diretorio)
+    filtros = {
+        "tipo": args.tipo,
+        "data": parse_data(args.data) if args.data else None,
+        "titulo": args.titulo,
+        "vencimento": parse_data(args.vencimento) if args.vencimento else None,
+    }
+    lotes = gerar_lotes(armazem, parse_anos(args.anos), filtros, base_url=args.url, verify=not args.inseguro)
+
+    with EscritorLotes(args.saida, args.formato) as escritor:
+        for lote in lotes:
+            escritor.escrever(lote)
+
+    logger.info("%d registros gravados em %s", escritor.linhas, args.saida)
+    return 0
+
+
+def comando_sincronizar(args):
+    armazem = Armazem(args.diretorio)
+    novos = sincronizar(armazem, parse_anos(args.anos), base_url=args.url, verify=not args.inseguro)
+    for ano, quantidade in sorted(novos.items()):
+        logger.info("Ano %s: %d registros novos", ano, quantidade)
+    return 0
+
+
+def comando_consultar(args):
+    resultado, truncado = consultar(Armazem(args.diretorio), args.sql, limite=args.limite)
+    if args.saida:
+        with EscritorLotes(args.saida, args.formato) as escritor:
+            escritor.escrever(resultado)
+    else:
+        resultado.to_csv(sys.stdout, index=False, date_format=FORMATO_DATA)
+    if truncado:
+        logger.warning("Resultado truncado em %d linhas (use --limite).", args.limite)
+    return 0
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(prog="python -m leiloes", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--diretorio", default=DIRETORIO_PADRAO, help="Diretório do armazém local.")
+    parser.add_argument("--url", default=API_URL, help="URL da API de resultados.")
+    parser.add_argument("--inseguro", action="store_true", help="Não verifica o certificado TLS da API.")
+    parser.add_argument("-v", "--verboso", action="store_true")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    exportar = subparsers.add_parser("exportar", help="Exporta anos e filtros para Parquet, CSV ou JSON Lines.")
+    exportar.add_argument("--anos", nargs="*", help="Anos ou intervalos (ex.: 2023 2024 ou 2010-2026).")
+    exportar.add_argument("--tipo", choices=["COMPRA", "VENDA"])
+    exportar.add_argument("--data", help="Data do leilão (dd-mm-aaaa).")
+    exportar.add_argument("--titulo", help="Título (ex.: LTN).")
+    exportar.add_argument("--vencimento", help="Vencimento (dd-mm-aaaa).")
+    exportar.add_argument("--formato", choices=FORMATOS, default="parquet")
+    exportar.add_argument("--saida", required=True, help="Arquivo de saída.")
+    exportar.set_defaults(funcao=comando_exportar)
+
+    sincronizar_ = subparsers.add_parser("sincronizar", help="Atualiza o armazém local a partir da API.")
+    sincronizar_.add_argument("--anos", nargs="*", help="Anos ou intervalos (ex.: 2025 2026).")
+    sincronizar_.set_defaults(funcao=comando_sincronizar)
+
+    consultar_ = subparsers.add_parser("consultar", help="Executa uma consulta SQL sobre o armazém local.")
+    consultar_.add_argument("sql", help="Consulta SELECT sobre as tabelas leiloes e agregados.")
+    consultar_.add_argument("--limite", type=int, default=LIMITE_LINHAS, help="Máximo de linhas devolvidas.")
+    consultar_.add_argument("--formato", choices=FORMATOS, default="csv")
+    consultar_.add_argument("--saida", help="Arquivo de saída (padrão: CSV na saída padrão).")
+    consultar_.set_defaults(funcao=comando_consultar)
+
+    return parser
+
+
+def main(argv=None):
+    args = criar_parser().parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO if args.verboso else logging.WARNING,
+        format="%(asctime)s %(levelname)s %(message)s",
+        stream=sys.stderr,
+    )
+    try:
+        return args.funcao(args)
+    except Exception as e:
+        logger.error("%s", e)
+        return 1
+    finally:
+        if ARQUIVO_PROMETHEUS:
+            REGISTRO.gravar_prometheus(ARQUIVO_PROMETHEUS)
@@ -0,0 +1,217 @@
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from leiloes.cassete import AdaptadorCassete, cassete_do_ambiente
+
+# -----------------------------------------------
+# CONFIGURAÇÕES
+# -----------------------------------------------
+TIMEOUT_CONEXAO = float(os.environ.get("LEILOES_TIMEOUT_CONEXAO", 5))
+TIMEOUT_LEITURA = float(os.environ.get("LEILOES_TIMEOUT_LEITURA", 60))
+TENTATIVAS = int(os.environ.get("LEILOES_TENTATIVAS", 3))
+FATOR_BACKOFF = float(os.environ.get("LEILOES_FATOR_BACKOFF", 0.5))
+TAMANHO_POOL = int(os.environ.get("LEILOES_TAMANHO_POOL", 10))
+
+STATUS_REPETIVEIS = (429, 500, 502, 503, 504)
+
+# Disjuntor: após FALHAS_DISJUNTOR falhas seguidas, a API não é chamada por ESPERA_DISJUNTOR segundos
+FALHAS_DISJUNTOR = int(os.environ.get("LEILOES_DISJUNTOR_FALHAS", 5))
+ESPERA_DISJUNTOR = float(os.environ.get("LEILOES_DISJUNTOR_ESPERA", 30))
+
+
+# -----------------------------------------------
+# DISJUNTOR (CIRCUIT BREAKER)
+# -----------------------------------------------
+class CircuitoAberto(requests.ConnectionError):
+    """
+    A API falhou seguidamente e o disjuntor está aberto: a chamada nem é feita.
+    """
+
+
+class Disjuntor:
+    """
+    Disjuntor da API. Fechado, deixa tudo passar; depois de `limite_falhas`
+    falhas seguidas (erro de conexão, timeout ou status repetível), abre e
+    recusa as chamadas por `espera` segundos. Passada a espera, fica
+    meio-aberto: uma única chamada de teste passa; se der certo, fecha, e se
+    falhar, abre de novo.
+    """
+
+    FECHADO = "fechado"
+    ABERTO = "aberto"
+    MEIO_ABERTO = "meio_aberto"
+
+    def __init__(self, limite_falhas=FALHAS_DISJUNTOR, espera=ESPERA_DISJUNTOR, relogio=time.monotonic):
+        self.limite_falhas = limite_falhas
+        self.espera = espera
+        self._relogio = relogio
+        self._trava = threading.Lock()
+        self._falhas = 0
+        self._aberto_em = None
+        self._teste_em_andamento = False
+        self.aberturas = 0
+        self.recusadas = 0
+
+    @property
+    def estado(self):
+        with self._trava:
+            return self._estado()
+
+    def _estado(self):
+        if self._aberto_em is None:
+            return self.FECHADO
+        if self._relogio() - self._aberto_em < self.espera:
+            return self.ABERTO
+        return self.MEIO_ABERTO
+
+    def permitir(self):
+        """
+        Levanta CircuitoAberto se a chamada não deve ser feita agora.
+        """
+        with self._trava:
+            estado = self._estado()
+            if estado == self.FECHADO:
+                return
+            if estado == self.MEIO_ABERTO and not self._teste_em_andamento:
+                self._teste_em_andamento = True
+                return
+            self.recusadas += 1
+            restante = max(0.0, self.espera - (self._relogio() - self._aberto_em))
+        raise CircuitoAberto(f"API indisponível: disjuntor aberto (nova tentativa em {restante:.0f}s)")
+
+    def registrar_sucesso(self):
+        with self._trava:
+            self._falhas = 0
+            self._aberto_em = None
+            self._teste_em_andamento = False
+
+    def liberar_teste(self):
+        with self._trava:
+            self._teste_em_andamento = False
+
+    def registrar_falha(self):
+        with self._trava:
+            self._falhas += 1
+            if self._teste_em_andamento or self._falhas >= self.limite_falhas:
+                if self._aberto_em is None or self._teste_em_andamento:
+                    self.aberturas += 1
+                self._aberto_em = self._relogio()
+                self._teste_em_andamento = False
+
+    def estatisticas(self):
+        with self._trava:
+            return {
+                "estado": self._estado(),
+                "falhas_seguidas": self._falhas,
+                "aberturas": self.aberturas,
+                "recusadas": self.recusadas,
+            }
+
+
+# -----------------------------------------------
+# CLIENTE HTTP COMPARTILHADO
+# -----------------------------------------------
+class ClienteTesouro:
+    """
+    Cliente HTTP da API de leilões: uma sessão com pool de conexões
+    keep-alive, compressão gzip, timeouts limitados, novas tentativas com
+    backoff exponencial, GET condicional (ETag / If-Modified-Since), um
+    disjuntor que para de chamar a API depois de falhas seguidas e, se
+    configurado, o modo cassete (gravação e reprodução offline).
+    """
+
+    def __init__(self, base_url, verify=True, timeout=(TIMEOUT_CONEXAO, TIMEOUT_LEITURA),
+                 tentativas=TENTATIVAS, fator_backoff=FATOR_BACKOFF, tamanho_pool=TAMANHO_POOL, disjuntor=None,
+                 cassete=None):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.disjuntor = disjuntor or Disjuntor()
+
+        retry = Retry(
+            total=tentativas,
+            backoff_factor=fator_backoff,
+            status_forcelist=STATUS_REPETIVEIS,
+            allowed_methods=frozenset({"GET"}),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        # Com um cassete (ver `leiloes.cassete`), as respostas são gravadas e/ou reproduzidas do disco
+        cassete = cassete or cassete_do_ambiente()
+        if cassete is not None:
+            adapter = AdaptadorCassete(cassete, pool_connections=tamanho_pool, pool_maxsize=tamanho_pool,
+                                       max_retries=retry)
+        else:
+            adapter = HTTPAdapter(pool_connections=tamanho_pool, pool_maxsize=tamanho_pool, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.verify = verify
+        self.session.headers.update({"Accept": "application/json", "Accept-Encoding": "gzip, deflate"})
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def get(self, params=None, validador=None, **kwargs):
+        """
+        Faz o GET na URL base. `validador` é o dicionário devolvido por
+        `validador_da_resposta` numa busca anterior; quando informado, a
+        requisição é condicional e pode voltar 304 sem corpo.
+        """
+        headers = {}
+        if validador:
+            if validador.get("etag"):
+                headers["If-None-Match"] = validador["etag"]
+            if validador.get("last_modified"):
+                headers["If-Modified-Since"] = validador["last_modified"]
+
+        self.disjuntor.permitir()
+        try:
+            response = self.session.get(self.base_url, params=params or {}, headers=headers,
+                                        timeout=self.timeout, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            self.disjuntor.registrar_falha()
+            raise
+        except BaseException:
+            # Outros erros não dizem nada sobre a API, mas liberam a chamada de teste
+            self.disjuntor.liberar_teste()
+            raise
+
+        if response.status_code in STATUS_REPETIVEIS:
+            self.disjuntor.registrar_falha()
+        else:
+            self.disjuntor.registrar_sucesso()
+        response.raise_for_status()
+        return response
+
+    def close(self):
+        self.session.close()
+
+
+def validador_da_resposta(response):
+    """
+    Extrai ETag e Last-Modified da resposta (None se a API não enviar nenhum).
+    """
+    validador = {
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+    }
+    return validador if any(validador.values()) else None
+
+
+_clientes = {}
+_trava_clientes = threading.Lock()
+
+
+def cliente_compartilhado(base_url, verify=True):
+    """
+    Retorna o cliente do processo para (base_url, verify), criando-o na primeira
+    chamada. As reexecuções do script do Streamlit reaproveitam o mesmo pool.
+    """
+    chave = (base_url, verify)
+    with _trava_clientes:
+        if chave not in _clientes:
+            _clientes[chave] = ClienteTesouro(base_url, verify=verify)
+        return _clientes[chave]
@@ -0,0 +1,238 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from leiloes.analitico import carregar_agregados
+from leiloes.cache import Coalescedor, tamanho_em_bytes, ttl_para_ano
+from leiloes.filtros import IndiceFiltros
+from leiloes.ingestao import FRESCO, catalogos
+from leiloes.metricas import medir
+from leiloes.series import IndiceSeries
+
+# -----------------------------------------------
+# CONFIGURAÇÕES
+# -----------------------------------------------
+# Quantos datasets (intervalos de anos) o processo mantém vivos sem nenhuma sessão usando
+MAX_DATASETS = int(os.environ.get("LEILOES_MAX_DATASETS", 8))
+# Teto do que cada sessão guarda só para si (resultados de consulta etc.), fora os datasets compartilhados
+MEMORIA_SESSAO_MB = float(os.environ.get("LEILOES_MEMORIA_SESSAO_MB", 64))
+# Validade de um dataset montado com dados não atualizados (ano que falhou, em revalidação ou obsoleto)
+TTL_PROVISORIO = float(os.environ.get("LEILOES_DATASET_PROVISORIO_TTL", 30))
+# Montagens de datasets em andamento ao mesmo tempo (intervalos de anos diferentes)
+MAX_MONTAGENS = int(os.environ.get("LEILOES_MAX_MONTAGENS", 4))
+
+
+# -----------------------------------------------
+# DATASET COMPARTILHADO
+# -----------------------------------------------
+class Dataset:
+    """
+    Tudo o que uma sessão precisa para um intervalo de anos, montado uma vez
+    e compartilhado por todas as sessões: o índice de filtros (que guarda os
+    registros), os catálogos dos selectboxes e os índices das abas Resumo e
+    Histórico de Taxas (este cobre o armazém inteiro e é o mesmo objeto em
+    todos os datasets do armazém, ver `series_do_armazem`). `situacoes` é o frescor de cada ano no momento da
+    montagem (`leiloes.ingestao.frescor`), para o indicador da tela.
+
+    É somente leitura: as sessões guardam apenas uma referência a ele e os
+    próprios filtros. Os recortes de `indice.filtrar` são DataFrames novos
+    (e, com o Copy-on-Write do pandas, nunca alteram os dados compartilhados).
+    """
+
+    def __init__(self, anos, indice, indice_agregados, indice_series, catalogos, falhas=None, expira_em=None,
+                 situacoes=None):
+        self.anos = anos
+        self.indice = indice
+        self.indice_agregados = indice_agregados
+        self.indice_series = indice_series
+        self.catalogos = catalogos
+        self.falhas = falhas or {}
+        self.expira_em = expira_em
+        self.situacoes = situacoes or {}
+
+    def expirado(self, agora=None):
+        return self.expira_em is not None and (agora or time.monotonic()) >= self.expira_em
+
+    def provisorio(self):
+        """
+        Indica se algum ano falhou ou não estava atualizado na montagem.
+        """
+        return bool(self.falhas) or any(info["situacao"] != FRESCO for info in self.situacoes.values())
+
+    def tamanho_em_bytes(self, incluir_series=True):
+        total = self.indice.tamanho_em_bytes() + self.indice_agregados.tamanho_em_bytes()
+        return total + tamanho_em_bytes(self.indice_series.dados) if incluir_series else total
+
+
+# -----------------------------------------------
+# ÍNDICE DE SÉRIES POR ARMAZÉM
+# -----------------------------------------------
+# diretório do armazém -> (assinatura dos Parquet, IndiceSeries)
+_series = {}
+_trava_series = threading.Lock()
+
+
+def _assinatura_series(armazem):
+    agregados = {}
+    for arquivo in armazem.diretorio.glob("agregados_*.parquet"):
+        try:
+            info = arquivo.stat()
+        except FileNotFoundError:
+            continue
+        agregados[arquivo.name] = (info.st_mtime_ns, info.st_size)
+    return armazem.assinatura(), agregados
+
+
+def series_do_armazem(armazem):
+    """
+    Retorna o IndiceSeries de todo o histórico do armazém. É montado uma vez
+    e compartilhado por todos os datasets do armazém, qualquer que seja o
+    intervalo de anos; só é remontado quando algum Parquet (registros ou
+    agregados) é regravado.
+    """
+    diretorio = armazem.diretorio.resolve()
+    with _trava_series:
+        assinatura = _assinatura_series(armazem)
+        guardado = _series.get(diretorio)
+        if guardado is None or guardado[0] != assinatura:
+            guardado = _series[diretorio] = (assinatura, IndiceSeries(carregar_agregados(armazem)).construir())
+        return guardado[1]
+
+
+def montar_dataset(armazem, anos, dados, falhas=None, situacoes=None, relogio=time.monotonic):
+    """
+    Monta o Dataset a partir dos registros carregados (`carregar_anos`).
+    Os registros ficam só dentro do índice de filtros (sem os zerados);
+    o DataFrame recebido pode ser descartado em seguida.
+
+    O dataset expira com o TTL do ano mais recente ou, se for provisório
+    (ver `Dataset.provisorio`), após TTL_PROVISORIO segundos, para que as
+    sessões passem a ver a versão atualizada assim que ela existir.
+    """
+    with medir("montar_dataset", linhas=len(dados)) as medicao:
+        indice = IndiceFiltros(dados).construir()
+        dataset = Dataset(
+            anos=anos,
+            indice=indice,
+            indice_agregados=IndiceFiltros(carregar_agregados(armazem, anos)).construir(),
+            indice_series=series_do_armazem(armazem),
+            catalogos=catalogos(dados),
+            falhas=falhas,
+            situacoes=situacoes,
+        )
+        ttl = ttl_para_ano(max(anos) if anos else None, armazem=armazem)
+        if dataset.provisorio():
+            ttl = min(ttl, TTL_PROVISORIO) if ttl is not None else TTL_PROVISORIO
+        dataset.expira_em = relogio() + ttl if ttl is not None else None
+        medicao["bytes"] = dataset.tamanho_em_bytes()
+    return dataset
+
+
+class RegistroDatasets:
+    """
+    Datasets do processo por chave (diretório, URL, anos). Os `max_datasets`
+    usados mais recentemente ficam vivos mesmo sem sessões; os demais
+    continuam existindo enquanto alguma sessão os referenciar. Datasets
+    expirados (ano corrente) são remontados pela próxima sessão que pedir.
+    """
+
+    def __init__(self, max_datasets=MAX_DATASETS, relogio=time.monotonic):
+        self.max_datasets = max_datasets
+        self._relogio = relogio
+        self._datasets = OrderedDict()
+        self._trava = threading.Lock()
+        self._coalescedor = Coalescedor()
+
+    def obter(self, chave):
+        with self._trava:
+            dataset = self._datasets.get(chave)
+            if dataset is None:
+                return None
+            if dataset.expirado(self._relogio()):
+                del self._datasets[chave]
+                return None
+            self._datasets.move_to_end(chave)
+            return dataset
+
+    def obter_ou_montar(self, chave, montar):
+        """
+        Retorna o dataset da chave ou o monta com `montar()`. Sessões que
+        pedem a mesma chave enquanto ela está sendo montada esperam essa
+        montagem em vez de buscar e indexar tudo de novo.
+        """
+        dataset = self.obter(chave)
+        if dataset is not None:
+            return dataset
+        return self._coalescedor.executar(chave, lambda: self.obter(chave) or self.registrar(chave, montar()))
+
+    def montar_em_segundo_plano(self, chave, montar):
+        """
+        Como `obter_ou_montar`, mas a montagem roda numa thread do processo e
+        o retorno é um Future. Quem pediu pode acompanhar o progresso e até
+        desistir (a sessão do Streamlit reexecutada no meio) sem interromper
+        a montagem que as demais sessões estão esperando.
+        """
+        dataset = self.obter(chave)
+        if dataset is not None:
+            futuro = Future()
+            futuro.set_result(dataset)
+            return futuro
+        return _montagens.submit(self.obter_ou_montar, chave, montar)
+
+    def registrar(self, chave, dataset):
+        """
+        Registra o dataset, a menos que algum ano tenha falhado na API (o
+        próximo pedido tenta de novo em vez de herdar dados incompletos).
+        """
+        if dataset.falhas:
+            return dataset
+        with self._trava:
+            self._datasets[chave] = dataset
+            self._datasets.move_to_end(chave)
+            while len(self._datasets) > self.max_datasets:
+                self._datasets.popitem(last=False)
+        return dataset
+
+    def estatisticas(self):
+        with self._trava:
+            datasets = list(self._datasets.values())
+        # O índice de séries é um só por armazém: conta uma vez
+        series = {id(dataset.indice_series): dataset.indice_series for dataset in datasets}
+        return {
+            "datasets": len(datasets),
+            "bytes": sum(dataset.tamanho_em_bytes(incluir_series=False) for dataset in datasets)
+            + sum(tamanho_em_bytes(indice.dados) for indice in series.values()),
+            "montagens_coalescidas": self._coalescedor.coalescidas,
+        }
+
+
+_montagens = ThreadPoolExecutor(max_workers=MAX_MONTAGENS, thread_name_prefix="leiloes-dataset")
+
+# Instância única do processo: as sessões do Streamlit compartilham os mesmos datasets
+DATASETS = RegistroDatasets()
+
+
+# -----------------------------------------------
+# MEMÓRIA POR SESSÃO
+# -----------------------------------------------
+def memoria_sessao(estado):
+    """
+    Estima os bytes que uma sessão guarda só para si em `estado` (o
+    session_state), sem contar os datasets compartilhados.
+    """
+    total = 0
+    for valor in estado.values():
+        partes = valor if isinstance(valor, (tuple, list)) else (valor,)
+        total += sum(tamanho_em_bytes(parte) for parte in partes if not isinstance(parte, Dataset))
+    return total
+
+
+def cabe_na_sessao(estado, valor, limite_mb=MEMORIA_SESSAO_MB):
+    """
+    Indica se `valor` pode ser guardado na sessão sem passar do teto por sessão.
+    """
+    partes = valor if isinstance(valor, (tuple, list)) else (valor,)
+    adicional = sum(tamanho_em_bytes(parte) for parte in partes)
+    return memoria_sessao(estado) + adicional <= limite_mb * 1024 * 1024
@@ -0,0 +1,141 @@
+"""
+Consultas SQL ad hoc sobre o armazém local, com DuckDB (dependência opcional).
+
+As tabelas são visões sobre os próprios arquivos Parquet do armazém, então
+filtros e projeções descem até a leitura (predicate pushdown e leitura só
+das colunas usadas), sem carregar o histórico em memória:
+
+- `leiloes`: registros normalizados (`leiloes_<ano>.parquet`);
+- `agregados`: agregados por leilão (`agregados_<ano>.parquet`, ver `leiloes.analitico`).
+
+    consultar(armazem, '''
+        SELECT DATA, VENCIMENTO, TAXA, "TOTAL QUANTIDADE ACEITA" / OFERTA AS ACEITE
+        FROM leiloes
+        WHERE TITULO = 'LTN' AND TAXA > ? AND "TOTAL QUANTIDADE ACEITA" < 0.5 * OFERTA
+    ''', [12.5])
+"""
+import os
+import threading
+
+try:
+    import duckdb
+except ImportError:  # pragma: no cover - depende do ambiente
+    duckdb = None
+
+from leiloes.esquema import tipar
+from leiloes.metricas import medir
+
+# -----------------------------------------------
+# CONFIGURAÇÕES
+# -----------------------------------------------
+DISPONIVEL = duckdb is not None
+LIMITE_LINHAS = int(os.environ.get("LEILOES_SQL_LIMITE_LINHAS", 100_000))
+MEMORIA_MAXIMA = os.environ.get("LEILOES_SQL_MEMORIA", "1GB")
+
+# tabela -> prefixo dos arquivos no armazém
+TABELAS = {
+    "leiloes": "leiloes",
+    "agregados": "agregados",
+}
+
+EXEMPLO = """SELECT DATA, TITULO, VENCIMENTO, TAXA, OFERTA, "TOTAL QUANTIDADE ACEITA"
+FROM leiloes
+WHERE TITULO = 'LTN' AND TAXA > 10 AND "TOTAL QUANTIDADE ACEITA" < 0.5 * OFERTA
+ORDER BY DATA DESC"""
+
+
+def _conectar(armazem):
+    """
+    Abre uma conexão DuckDB em memória com uma visão por tabela do armazém.
+    Depois de criadas as visões, o acesso a arquivos fica restrito ao
+    diretório do armazém e a configuração é travada: a consulta não lê nem
+    grava nada fora dele.
+    """
+    diretorio = armazem.diretorio.resolve()
+    conexao = duckdb.connect(config={"memory_limit": MEMORIA_MAXIMA})
+    try:
+        for tabela, prefixo in TABELAS.items():
+            if any(diretorio.glob(f"{prefixo}_*.parquet")):
+                padrao = (diretorio / f"{prefixo}_*.parquet").as_posix().replace("'", "''")
+                conexao.execute(
+                    f"CREATE VIEW {tabela} AS SELECT * FROM read_parquet('{padrao}', union_by_name = true)"
+                )
+        conexao.execute(f"SET allowed_directories = ['{diretorio.as_posix()}/']")
+        conexao.execute("SET enable_external_access = false")
+        conexao.execute("SET lock_configuration = true")
+    except BaseException:
+        conexao.close()
+        raise
+    return conexao
+
+
+# diretório do armazém -> (assinatura dos Parquet, esquema)
+_esquemas = {}
+_trava_esquemas = threading.Lock()
+
+
+def _assinatura_tabelas(armazem):
+    """
+    Muda sempre que um Parquet do armazém (registros ou agregados) é gravado.
+    """
+    agregados = sorted(arquivo.name for arquivo in armazem.diretorio.glob(f"{TABELAS['agregados']}_*.parquet"))
+    return armazem.assinatura(), agregados
+
+
+def tabelas(armazem):
+    """
+    Retorna {tabela: [(coluna, tipo), ...]} das tabelas disponíveis no armazém.
+    O esquema é guardado por armazém e só é lido de novo no DuckDB quando os
+    arquivos mudam: o painel SQL pede o esquema a cada reexecução do script.
+    """
+    if not DISPONIVEL:
+        return {}
+    diretorio = armazem.diretorio.resolve()
+    assinatura = _assinatura_tabelas(armazem)
+    with _trava_esquemas:
+        guardado = _esquemas.get(diretorio)
+    if guardado and guardado[0] == assinatura:
+        return guardado[1]
+
+    conexao = _conectar(armazem)
+    try:
+        linhas = conexao.execute(
+            "SELECT table_name, column_name, data_type FROM information_schema.columns ORDER BY table_name"
+        ).fetchall()
+    finally:
+        conexao.close()
+
+    esquema = {}
+    for tabela, coluna, tipo in linhas:
+        esquema.setdefault(tabela, []).append((coluna, tipo))
+    with _trava_esquemas:
+        _esquemas[diretorio] = (assinatura, esquema)
+    return esquema
+
+
+def consultar(armazem, sql, parametros=None, limite=LIMITE_LINHAS):
+    """
+    Executa uma consulta SELECT (ou WITH ... SELECT) sobre o armazém e
+    retorna (DataFrame, truncado). Aceita parâmetros posicionais (`?`).
+    São devolvidas no máximo `limite` linhas; `truncado` indica que havia mais.
+    Outras instruções (CREATE, COPY, INSERT...) levantam ValueError.
+    """
+    if not DISPONIVEL:
+        raise RuntimeError("Consultas SQL precisam do pacote duckdb (pip install duckdb).")
+
+    conexao = _conectar(armazem)
+    try:
+        instrucoes = conexao.extract_statements(sql)
+        if len(instrucoes) != 1:
+            raise ValueError("Informe exatamente uma consulta.")
+        if instrucoes[0].type != duckdb.StatementType.SELECT:
+            raise ValueError("Apenas consultas SELECT são permitidas.")
+
+        with medir("consulta_sql") as medicao:
+            df = conexao.sql(sql, params=parametros).limit(limite + 1).df()
+            truncado = len(df) > limite
+            df = tipar(df.iloc[:limite])
+            medicao["linhas"] = len(df)
+    finally:
+        conexao.close()
+    return df, truncado
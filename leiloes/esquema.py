@@ -0,0 +1,63 @@
+import pandas as pd
+
+from leiloes.metricas import medir
+
+# -----------------------------------------------
+# ESQUEMA DAS COLUNAS
+# -----------------------------------------------
+# Datas ficam como datetime64 e texto repetido como categoria: a formatação
+# ('%d-%m-%Y', R$ etc.) acontece só na hora de exibir ou exportar.
+FORMATO_DATA = "%d-%m-%Y"
+
+COLUNAS_DATA = ["DATA", "VENCIMENTO"]
+COLUNAS_CATEGORIA = ["TITULO", "TIPO"]
+COLUNAS_QUANTIDADE = [
+    "OFERTA", "QUANTIDADE ACEITA", "QUANTIDADE ACEITA SEGUNDA VOLTA", "TOTAL QUANTIDADE ACEITA",
+]
+COLUNAS_FINANCEIRO = [
+    "FINANCEIRO ACEITO", "FINANCEIRO ACEITO SEGUNDA VOLTA", "TOTAL FINANCEIRO ACEITO",
+]
+# TAXA fica em float64, como os demais valores: em float32 a taxa 9.0711 volta
+# como 9.071100234985352 na exportação (CSV/JSON) e nas consultas SQL.
+COLUNAS_TAXA = ["TAXA"]
+
+TIPOS = {
+    **{coluna: "datetime64[ns]" for coluna in COLUNAS_DATA},
+    **{coluna: "category" for coluna in COLUNAS_CATEGORIA},
+    **{coluna: "float64" for coluna in COLUNAS_QUANTIDADE + COLUNAS_FINANCEIRO + COLUNAS_TAXA},
+}
+
+
+def tipar(df):
+    """
+    Converte as colunas presentes no DataFrame para os tipos do esquema.
+    Colunas que já estão no tipo certo não são copiadas.
+    """
+    if df.empty:
+        return df
+
+    df = df.copy(deep=False)
+    for coluna, tipo in TIPOS.items():
+        if coluna not in df.columns:
+            continue
+        if tipo.startswith("datetime"):
+            if not pd.api.types.is_datetime64_dtype(df[coluna]):
+                with medir("conversao_datas", coluna=coluna, linhas=len(df)):
+                    df[coluna] = pd.to_datetime(df[coluna], dayfirst=True)
+            df[coluna] = df[coluna].astype(tipo)
+        elif tipo == "category":
+            # Concatenar anos com categorias diferentes devolve texto; aqui a categoria é refeita
+            if not isinstance(df[coluna].dtype, pd.CategoricalDtype):
+                df[coluna] = df[coluna].astype("category")
+        else:
+            df[coluna] = pd.to_numeric(df[coluna]).astype(tipo)
+    return df
+
+
+def formatar_data(valor):
+    """
+    Formata uma data para exibição ('%d-%m-%Y'); outros valores passam direto.
+    """
+    if isinstance(valor, pd.Timestamp):
+        return valor.strftime(FORMATO_DATA)
+    return valor
@@ -0,0 +1,148 @@
+import gzip
+import io
+import json
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from leiloes.cache import CACHE
+from leiloes.esquema import COLUNAS_CATEGORIA, FORMATO_DATA
+from leiloes.metricas import medir
+
+# -----------------------------------------------
+# EXPORTAÇÃO EM LOTES
+# -----------------------------------------------
+FORMATOS = ("parquet", "csv", "json")
+
+
+def preparar_para_exportacao(df):
+    """
+    Troca categorias por texto simples, para que lotes com categorias
+    diferentes tenham sempre o mesmo esquema de saída.
+    """
+    colunas = [coluna for coluna in COLUNAS_CATEGORIA if coluna in df.columns]
+    return df.astype({coluna: object for coluna in colunas})
+
+
+def linhas_json(df):
+    """
+    Registros em JSON Lines, com cada número na menor representação que
+    volta ao mesmo float (137791838.66, e não 137791838.6599999964 como no
+    `to_json`, que grava um número fixo de casas decimais). Datas em ISO 8601
+    e valores ausentes como null.
+    """
+    registros = df.astype(object).where(df.notna(), None)
+    for coluna in df.columns:
+        if pd.api.types.is_datetime64_dtype(df[coluna]):
+            registros[coluna] = df[coluna].dt.strftime("%Y-%m-%dT%H:%M:%S.%f").str[:-3].astype(object) \
+                .where(df[coluna].notna(), None)
+    return "".join(json.dumps(registro, ensure_ascii=False, separators=(",", ":")) + "\n"
+                   for registro in registros.to_dict("records"))
+
+
+class EscritorLotes:
+    """
+    Grava DataFrames em lotes sucessivos em um único arquivo Parquet, CSV
+    ou JSON Lines, sem precisar manter o dataset inteiro em memória.
+    """
+
+    def __init__(self, caminho, formato):
+        if formato not in FORMATOS:
+            raise ValueError(f"Formato desconhecido: {formato}. Use um de {', '.join(FORMATOS)}.")
+        self.caminho = caminho
+        self.formato = formato
+        self.linhas = 0
+        self._parquet = None
+        self._esquema = None
+        self._arquivo = None
+
+    def escrever(self, df):
+        if df.empty:
+            return
+        df = preparar_para_exportacao(df)
+
+        if self.formato == "parquet":
+            tabela = pa.Table.from_pandas(df, schema=self._esquema, preserve_index=False)
+            if self._parquet is None:
+                self._esquema = tabela.schema
+                self._parquet = pq.ParquetWriter(self.caminho, self._esquema)
+            self._parquet.write_table(tabela)
+        else:
+            if self._arquivo is None:
+                self._arquivo = open(self.caminho, "w", encoding="utf-8", newline="")
+            if self.formato == "csv":
+                df.to_csv(self._arquivo, index=False, header=self.linhas == 0, date_format=FORMATO_DATA)
+            else:
+                self._arquivo.write(linhas_json(df))
+
+        self.linhas += len(df)
+
+    def fechar(self):
+        if self._parquet is not None:
+            self._parquet.close()
+        if self._arquivo is not None:
+            self._arquivo.close()
+        elif self._parquet is None and self.formato != "parquet":
+            # Nenhum lote: ainda assim cria o arquivo (vazio)
+            open(self.caminho, "w", encoding="utf-8").close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        self.fechar()
+
+
+def exportar_lotes(lotes, caminho, formato):
+    """
+    Grava um iterável de DataFrames em `caminho` e retorna o total de linhas.
+    """
+    with EscritorLotes(caminho, formato) as escritor:
+        for lote in lotes:
+            escritor.escrever(lote)
+    return escritor.linhas
+
+
+# -----------------------------------------------
+# ARQUIVOS PARA DOWNLOAD (SOB DEMANDA)
+# -----------------------------------------------
+# formato -> (rótulo, extensão, MIME)
+FORMATOS_DOWNLOAD = {
+    "csv": ("CSV", "csv", "text/csv"),
+    "csv.gz": ("CSV compactado (gzip)", "csv.gz", "application/gzip"),
+    "parquet": ("Parquet", "parquet", "application/vnd.apache.parquet"),
+}
+
+
+def serializar(df, formato):
+    """
+    Serializa o DataFrame no formato de download pedido e retorna os bytes.
+    """
+    if formato == "csv":
+        return df.to_csv(index=False, date_format=FORMATO_DATA).encode("utf-8")
+    if formato == "csv.gz":
+        return gzip.compress(df.to_csv(index=False, date_format=FORMATO_DATA).encode("utf-8"), compresslevel=6)
+    if formato == "parquet":
+        buffer = io.BytesIO()
+        preparar_para_exportacao(df).to_parquet(buffer, index=False)
+        return buffer.getvalue()
+    raise ValueError(f"Formato desconhecido: {formato}. Use um de {', '.join(FORMATOS_DOWNLOAD)}.")
+
+
+def arquivo_download(df, formato, cache=CACHE):
+    """
+    Retorna os bytes do arquivo de download, serializando só na primeira vez
+    para cada combinação de conteúdo e formato. A chave é o hash do conteúdo,
+    então o mesmo recorte (mesmos filtros e dados) é reaproveitado entre
+    sessões e uma atualização dos dados gera um arquivo novo.
+    """
+    chave = ("download", formato, len(df), int(pd.util.hash_pandas_object(df, index=False).sum()))
+    conteudo = cache.obter(chave) if cache is not None else None
+    if conteudo is None:
+        with medir("exportacao", formato=formato, linhas=len(df)) as medicao:
+            conteudo = serializar(df, formato)
+            medicao["bytes"] = len(conteudo)
+        if cache is not None:
+            cache.guardar(chave, conteudo)
+    return conteudo
@@ -0,0 +1,126 @@
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+from leiloes.metricas import medir
+
+# -----------------------------------------------
+# ÍNDICE DE FILTROS
+# -----------------------------------------------
+CHAVES = ("TIPO", "DATA", "TITULO", "VENCIMENTO")
+
+_VAZIO = np.empty(0, dtype=np.intp)
+
+
+def remover_zerados(df):
+    """
+    Remove registros sem quantidade nem financeiro aceitos.
+    """
+    return df[(df["TOTAL QUANTIDADE ACEITA"] != 0) | (df["TOTAL FINANCEIRO ACEITO"] != 0)]
+
+
+class IndiceFiltros:
+    """
+    Índice de posições por (TIPO, DATA, TITULO, VENCIMENTO), montado uma vez
+    por dataset carregado. Cada combinação de filtros vira uma busca em
+    dicionário e um fatiamento, em vez de uma sequência de máscaras sobre o
+    DataFrame inteiro. Os registros "zerados" já são removidos na construção.
+
+    Cada coluna-chave é fatorada em códigos inteiros; para um subconjunto de
+    chaves, os códigos são combinados em um único inteiro e as posições são
+    ordenadas por ele, de modo que cada grupo é uma fatia contígua.
+    """
+
+    def __init__(self, df):
+        self.dados = remover_zerados(df).reset_index(drop=True) if not df.empty else df
+        self._codigos = {}
+        self._indices = {}
+        if self.dados.empty:
+            return
+
+        for chave in CHAVES:
+            codigos, valores = pd.factorize(self.dados[chave])
+            self._codigos[chave] = (codigos.astype(np.int64), {valor: i for i, valor in enumerate(valores)})
+
+    def _indice(self, chaves):
+        """
+        Retorna (ordem, grupos) para um subconjunto de chaves, criado sob demanda:
+        `ordem` são as posições ordenadas pelo código combinado e `grupos`
+        mapeia código combinado -> (início, fim) em `ordem`.
+        """
+        indice = self._indices.get(chaves)
+        if indice is None:
+            combinado = np.zeros(len(self.dados), dtype=np.int64)
+            for chave in chaves:
+                codigos, mapa = self._codigos[chave]
+                combinado = combinado * (len(mapa) + 1) + (codigos + 1)
+
+            # int32 basta para as posições e ocupa metade da memória (15 índices por dataset)
+            ordem = np.argsort(combinado, kind="stable").astype(np.int32)
+            codigos_unicos, inicios = np.unique(combinado[ordem], return_index=True)
+            fins = np.append(inicios[1:], len(ordem))
+            grupos = dict(zip(codigos_unicos.tolist(), zip(inicios.tolist(), fins.tolist())))
+
+            indice = (ordem, grupos)
+            self._indices[chaves] = indice
+        return indice
+
+    def construir(self):
+        """
+        Monta de uma vez os índices de todas as combinações de filtros.
+        """
+        if not self.dados.empty:
+            with medir("indice_filtros", linhas=len(self.dados)):
+                for tamanho in range(1, len(CHAVES) + 1):
+                    for chaves in combinations(CHAVES, tamanho):
+                        self._indice(chaves)
+        return self
+
+    def tamanho_em_bytes(self):
+        """
+        Memória aproximada dos dados e dos arrays do índice.
+        """
+        total = int(self.dados.memory_usage(deep=True).sum()) if not self.dados.empty else 0
+        total += sum(codigos.nbytes for codigos, _ in self._codigos.values())
+        total += sum(ordem.nbytes for ordem, _ in self._indices.values())
+        return total
+
+    def posicoes(self, tipo=None, data=None, titulo=None, vencimento=None):
+        """
+        Retorna as posições (em `self.dados`) que atendem aos filtros.
+        Filtros None não restringem.
+        """
+        if self.dados.empty:
+            return _VAZIO
+
+        valores = {
+            "TIPO": tipo,
+            "DATA": pd.Timestamp(data) if data is not None else None,
+            "TITULO": titulo,
+            "VENCIMENTO": pd.Timestamp(vencimento) if vencimento is not None else None,
+        }
+        ativos = tuple(chave for chave in CHAVES if valores[chave] is not None)
+        if not ativos:
+            return np.arange(len(self.dados))
+
+        combinado = 0
+        for chave in ativos:
+            _, mapa = self._codigos[chave]
+            codigo = mapa.get(valores[chave])
+            if codigo is None:
+                return _VAZIO
+            combinado = combinado * (len(mapa) + 1) + (codigo + 1)
+
+        ordem, grupos = self._indice(ativos)
+        inicio, fim = grupos.get(combinado, (0, 0))
+        return ordem[inicio:fim]
+
+    def filtrar(self, tipo=None, data=None, titulo=None, vencimento=None):
+        """
+        Retorna o recorte do DataFrame para os filtros informados.
+        """
+        with medir("filtro") as medicao:
+            recorte = self.dados.iloc[self.posicoes(tipo, data, titulo, vencimento)]
+            medicao["linhas"] = len(recorte)
+        return recorte
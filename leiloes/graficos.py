@@ -0,0 +1,146 @@
+import os
+
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+
+# -----------------------------------------------
+# CONFIGURAÇÕES
+# -----------------------------------------------
+# Acima de LIMITE_SVG pontos o gráfico de taxas passa a usar WebGL (Scattergl);
+# MAX_PONTOS é o orçamento de pontos enviados ao navegador por gráfico.
+LIMITE_SVG = int(os.environ.get("LEILOES_GRAFICO_LIMITE_SVG", 1000))
+MAX_PONTOS = int(os.environ.get("LEILOES_GRAFICO_MAX_PONTOS", 5000))
+
+
+# -----------------------------------------------
+# AGREGAÇÕES
+# -----------------------------------------------
+def somar_por_titulo(data, colunas):
+    """
+    Soma as colunas por TITULO (uma linha por título, em vez de uma por registro).
+    """
+    return data.groupby("TITULO", observed=True, sort=True)[colunas].sum().reset_index()
+
+
+def taxa_media_ponderada(data, chaves):
+    """
+    TAXA média ponderada pelo TOTAL FINANCEIRO ACEITO em cada grupo de `chaves`.
+    Grupos sem financeiro aceito usam a média simples.
+    """
+    taxa = data["TAXA"]
+    peso = data["TOTAL FINANCEIRO ACEITO"].where(taxa.notna(), 0).fillna(0)
+    auxiliar = data[chaves].assign(
+        _PESO=peso,
+        _TAXA_X_PESO=taxa.fillna(0) * peso,
+        TAXA=taxa,
+    )
+    grupos = auxiliar.groupby(chaves, observed=True, sort=True)
+    somas = grupos[["_PESO", "_TAXA_X_PESO"]].sum()
+    media_simples = grupos["TAXA"].mean()
+
+    ponderada = somas["_TAXA_X_PESO"] / somas["_PESO"].replace(0, np.nan)
+    return ponderada.fillna(media_simples).rename("TAXA").reset_index()
+
+
+def limitar_pontos(df, max_pontos, grupo=None):
+    """
+    Reduz o DataFrame a no máximo `max_pontos` linhas, escolhendo linhas
+    igualmente espaçadas (por grupo, se informado) e mantendo as extremidades.
+    """
+    if len(df) <= max_pontos:
+        return df
+
+    if grupo is None:
+        return df.iloc[np.unique(np.linspace(0, len(df) - 1, max_pontos).astype(int))]
+
+    fracao = max_pontos / len(df)
+    partes = []
+    for _, parte in df.groupby(grupo, observed=True, sort=False):
+        n = max(2, int(len(parte) * fracao))
+        partes.append(limitar_pontos(parte, n))
+    return df.loc[np.concatenate([parte.index.values for parte in partes])]
+
+
+# -----------------------------------------------
+# FIGURAS DOS GRÁFICOS
+# -----------------------------------------------
+def figura_volume(data):
+    """
+    Gráfico de barras do volume ofertado x aceito por título, a partir das
+    somas por TITULO. Retorna None se faltarem colunas.
+    """
+    if "OFERTA" not in data.columns or "TOTAL QUANTIDADE ACEITA" not in data.columns:
+        return None
+
+    return px.bar(
+        somar_por_titulo(data, ["OFERTA", "TOTAL QUANTIDADE ACEITA"]),
+        x="TITULO",
+        y=["OFERTA", "TOTAL QUANTIDADE ACEITA"],
+        barmode="group",
+        labels={"value": "Quantidade", "variable": "Tipo"},
+        title="Volume Ofertado x Aceito por Título"
+    )
+
+
+def figura_taxas(data, max_pontos=MAX_PONTOS, limite_svg=LIMITE_SVG):
+    """
+    Gráfico das taxas de corte por vencimento, uma linha por título, com a
+    taxa média ponderada pelo financeiro de cada (TITULO, VENCIMENTO).
+    Usa WebGL acima de `limite_svg` pontos e nunca envia mais que
+    `max_pontos`. Retorna None sem taxas.
+    """
+    if "TAXA" not in data.columns or data["TAXA"].isnull().all():
+        return None
+
+    taxas = taxa_media_ponderada(data, ["TITULO", "VENCIMENTO"]).dropna(subset=["TAXA"])
+    taxas = limitar_pontos(taxas, max_pontos, grupo="TITULO")
+    dispersao = go.Scattergl if len(taxas) > limite_svg else go.Scatter
+
+    fig = go.Figure()
+    for titulo, serie in taxas.groupby("TITULO", observed=True, sort=True):
+        fig.add_trace(dispersao(
+            x=serie["VENCIMENTO"],
+            y=serie["TAXA"],
+            mode='lines+markers',
+            name=str(titulo),
+            line=dict(shape='linear'),
+            marker=dict(size=10 if len(taxas) <= limite_svg else 5)
+        ))
+    fig.update_layout(title="Evolução das Taxas de Corte", xaxis_title="Vencimento", yaxis_title="Taxa (%)")
+    return fig
+
+
+def figura_financeiro(data):
+    """
+    Gráfico de barras do volume financeiro aceito por título, a partir das
+    somas por TITULO. Retorna None se faltar a coluna.
+    """
+    if "TOTAL FINANCEIRO ACEITO" not in data.columns:
+        return None
+
+    return px.bar(
+        somar_por_titulo(data, ["TOTAL FINANCEIRO ACEITO"]),
+        x="TITULO",
+        y="TOTAL FINANCEIRO ACEITO",
+        title="Volume Financeiro Aceito por Título",
+        labels={"TOTAL FINANCEIRO ACEITO": "R$ (Total)", "TITULO": "Título"}
+    )
+
+
+def figura_historico_taxas(serie, nome, limite_svg=LIMITE_SVG):
+    """
+    Gráfico da taxa média ponderada de um título ao longo do tempo (saída de
+    `IndiceSeries.serie`), com a média móvel quando houver. Retorna None sem taxas.
+    """
+    if serie.empty or serie["TAXA MEDIA PONDERADA"].isnull().all():
+        return None
+
+    dispersao = go.Scattergl if len(serie) > limite_svg else go.Scatter
+    fig = go.Figure()
+    fig.add_trace(dispersao(x=serie.index, y=serie["TAXA MEDIA PONDERADA"], mode="lines+markers", name=nome))
+    if "TAXA MOVEL" in serie.columns:
+        fig.add_trace(dispersao(x=serie.index, y=serie["TAXA MOVEL"], mode="lines", name="Média móvel"))
+    fig.update_layout(title=f"Histórico da Taxa de Corte · {nome}", xaxis_title="Data do leilão",
+                      yaxis_title="Taxa (%)")
+    return fig
@@ -0,0 +1,209 @@
+"""
+Histórico mapeado em memória: todos os registros do armazém em um único
+arquivo Arrow IPC sem compressão (`historico.arrow`), aberto com mmap
+somente leitura.
+
+Vários processos do dashboard no mesmo host leem as mesmas páginas do
+page cache do sistema em vez de cada um decodificar os Parquet para a
+própria memória, e um processo novo já encontra o histórico pronto, sem
+chamar a API. Os DataFrames devolvidos por `ler_historico` são visões sobre
+o mapa (somente leitura; com o Copy-on-Write do pandas, qualquer alteração
+gera uma cópia privada).
+
+O arquivo é republicado a partir dos Parquet quando a sincronização grava
+registros novos, por troca atômica (arquivo temporário + rename): quem já
+tinha a versão anterior mapeada continua lendo-a até reabrir o arquivo.
+"""
+import json
+import os
+import threading
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+from leiloes.metricas import medir
+
+# -----------------------------------------------
+# CONFIGURAÇÕES
+# -----------------------------------------------
+ATIVO = os.environ.get("LEILOES_HISTORICO_MAPEADO", "1") not in ("0", "false", "nao", "não")
+NOME_ARQUIVO = "historico.arrow"
+
+_CHAVE_METADADOS = b"leiloes"
+
+
+def caminho_historico(armazem):
+    return armazem.diretorio / NOME_ARQUIVO
+
+
+def _tabela_arrow(df):
+    """
+    Converte o DataFrame tipado em tabela Arrow que volta ao pandas sem
+    cópia: NaN continua NaN (sem máscara de nulos) e as categorias viram
+    dicionários com os mesmos códigos do pandas.
+    """
+    colunas = []
+    for coluna in df.columns:
+        serie = df[coluna]
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            colunas.append(pa.DictionaryArray.from_arrays(
+                pa.array(serie.cat.codes.to_numpy(), mask=serie.isna().to_numpy()),
+                pa.array(serie.cat.categories.astype(str).to_numpy()),
+            ))
+        else:
+            colunas.append(pa.array(serie.to_numpy(), from_pandas=False))
+    return pa.Table.from_arrays(colunas, names=[str(coluna) for coluna in df.columns])
+
+
+def publicar_historico(armazem):
+    """
+    Grava o histórico do armazém (ordenado por DATA, um intervalo de linhas
+    por ano) e troca o arquivo publicado de forma atômica.
+    """
+    with medir("historico_publicacao") as medicao:
+        # A assinatura é lida antes dos dados: se um ano for regravado no meio, o histórico já nasce desatualizado
+        assinatura = armazem.assinatura()
+        df = armazem.ler_parquet([int(ano) for ano in assinatura])
+        if df.empty:
+            return None
+
+        df = df.sort_values("DATA", kind="stable").reset_index(drop=True)
+        anos = df["DATA"].dt.year.to_numpy()
+        intervalos = {}
+        for ano in assinatura:
+            posicoes = (anos == int(ano)).nonzero()[0]
+            intervalos[ano] = [int(posicoes[0]), int(posicoes[-1]) + 1] if len(posicoes) else [0, 0]
+
+        tabela = _tabela_arrow(df).replace_schema_metadata({
+            _CHAVE_METADADOS: json.dumps({"assinatura": assinatura, "anos": intervalos}),
+        })
+
+        def escrever(caminho):
+            with pa.OSFile(str(caminho), "wb") as arquivo, ipc.new_file(arquivo, tabela.schema) as escritor:
+                escritor.write_table(tabela)
+
+        armazem._gravar_atomico(caminho_historico(armazem), escrever)
+        medicao["linhas"] = len(df)
+        medicao["bytes"] = caminho_historico(armazem).stat().st_size
+    return caminho_historico(armazem)
+
+
+# -----------------------------------------------
+# LEITURA MAPEADA
+# -----------------------------------------------
+class HistoricoMapeado:
+    """
+    O arquivo publicado, mapeado uma vez por processo. A cada leitura, um
+    `stat` verifica se o arquivo foi trocado (outro inode) e, se foi, o
+    novo é mapeado; os DataFrames já entregues continuam apontando para o
+    mapa anterior, que o sistema mantém enquanto houver referência.
+    """
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._trava = threading.Lock()
+        self._identidade = None
+        self.tabela = None
+        self.assinatura = {}
+        self.intervalos = {}
+
+    def abrir(self):
+        """
+        Retorna a tabela mapeada (reabrindo se o arquivo mudou) ou None.
+        """
+        try:
+            info = os.stat(self.caminho)
+        except FileNotFoundError:
+            return None
+        identidade = (info.st_ino, info.st_mtime_ns, info.st_size)
+
+        with self._trava:
+            if identidade != self._identidade:
+                with medir("historico_mapeamento") as medicao:
+                    tabela = ipc.open_file(pa.memory_map(str(self.caminho), "r")).read_all()
+                    metadados = json.loads(tabela.schema.metadata[_CHAVE_METADADOS])
+                    self.tabela = tabela.replace_schema_metadata(None)
+                    self.assinatura = metadados["assinatura"]
+                    self.intervalos = metadados["anos"]
+                    self._identidade = identidade
+                    medicao["linhas"] = tabela.num_rows
+                    medicao["bytes"] = info.st_size
+            return self.tabela
+
+    def atualizado(self, armazem, anos=None):
+        """
+        Indica se o arquivo cobre os `anos` (ou todo o armazém) na versão gravada em Parquet.
+        """
+        if self.abrir() is None:
+            return False
+        atual = armazem.assinatura(anos)
+        return all(self.assinatura.get(ano) == valor for ano, valor in atual.items()) and (
+            anos is not None or set(atual) == set(self.assinatura))
+
+    def ler(self, armazem, anos):
+        """
+        Retorna os registros dos anos como visões sobre o mapa, ou None se o
+        arquivo não existir ou estiver desatualizado para algum dos anos.
+        Anos consecutivos saem de uma única fatia, sem cópia.
+        """
+        tabela = self.abrir()
+        if tabela is None or not self.atualizado(armazem, anos):
+            return None
+
+        fatias = []
+        for ano in sorted(anos):
+            inicio, fim = self.intervalos.get(str(ano), (0, 0))
+            if fatias and fatias[-1][1] == inicio:
+                fatias[-1][1] = fim
+            elif fim > inicio:
+                fatias.append([inicio, fim])
+        if not fatias:
+            return pd.DataFrame()
+
+        partes = [tabela.slice(inicio, fim - inicio).to_pandas(split_blocks=True) for inicio, fim in fatias]
+        return partes[0] if len(partes) == 1 else pd.concat(partes, ignore_index=True)
+
+
+_mapas = {}
+_trava_mapas = threading.Lock()
+_trava_publicacao = threading.Lock()
+
+
+def historico_do_armazem(armazem):
+    """
+    Retorna o HistoricoMapeado do processo para o diretório do armazém.
+    """
+    caminho = caminho_historico(armazem).resolve()
+    with _trava_mapas:
+        if caminho not in _mapas:
+            _mapas[caminho] = HistoricoMapeado(caminho)
+        return _mapas[caminho]
+
+
+def ler_historico(armazem, anos):
+    """
+    Registros dos anos lidos do histórico mapeado, ou None (desligado,
+    ainda não publicado ou desatualizado: leia os Parquet).
+    """
+    if not ATIVO:
+        return None
+    return historico_do_armazem(armazem).ler(armazem, anos)
+
+
+def publicar_se_desatualizado(armazem):
+    """
+    Republica o histórico se algum Parquet mudou desde a última publicação.
+    Threads que chegam juntas publicam uma vez só; entre processos, a troca
+    atômica garante que o último a publicar vence sem expor arquivo parcial.
+    Retorna True se publicou.
+    """
+    if not ATIVO or not armazem.anos():
+        return False
+    historico = historico_do_armazem(armazem)
+    if historico.atualizado(armazem):
+        return False
+    with _trava_publicacao:
+        if historico.atualizado(armazem):
+            return False
+        return publicar_historico(armazem) is not None
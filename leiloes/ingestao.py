@@ -0,0 +1,232 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date
+
+import pandas as pd
+
+from leiloes.api import API_URL
+from leiloes.armazem import sincronizar
+from leiloes.cache import CACHE, COALESCEDOR, ttl_para_ano
+from leiloes.cliente import CircuitoAberto
+from leiloes.esquema import tipar
+from leiloes.metricas import medir
+
+logger = logging.getLogger("leiloes.ingestao")
+
+# Limite de anos buscados em paralelo (não deve passar do pool do cliente HTTP)
+MAX_PARALELO = int(os.environ.get("LEILOES_MAX_PARALELO", 8))
+
+
+# -----------------------------------------------
+# REVALIDAÇÃO EM SEGUNDO PLANO (STALE-WHILE-REVALIDATE)
+# -----------------------------------------------
+_revalidacao = ThreadPoolExecutor(max_workers=2, thread_name_prefix="leiloes-revalidacao")
+_revalidando = set()
+_trava_revalidacao = threading.Lock()
+
+
+def revalidar_em_segundo_plano(chave, funcao):
+    """
+    Agenda `funcao` (que atualiza a entrada `chave` do cache) fora da thread
+    de quem pediu, no máximo uma vez por chave. Retorna False se a chave já
+    estava sendo revalidada.
+    """
+    with _trava_revalidacao:
+        if chave in _revalidando:
+            return False
+        _revalidando.add(chave)
+
+    def executar():
+        try:
+            funcao()
+        except CircuitoAberto as e:
+            logger.debug("Revalidação de %s adiada: %s", chave, e)
+        except Exception as e:
+            logger.warning("Falha ao revalidar %s: %s", chave, e)
+        finally:
+            with _trava_revalidacao:
+                _revalidando.discard(chave)
+
+    _revalidacao.submit(executar)
+    return True
+
+
+def em_revalidacao(chave):
+    with _trava_revalidacao:
+        return chave in _revalidando
+
+
+# -----------------------------------------------
+# INGESTÃO ÚNICA (DADOS + CATÁLOGOS)
+# -----------------------------------------------
+def chave_leiloes(armazem, base_url, ano):
+    return ("leiloes", str(armazem.diretorio), base_url, ano)
+
+
+def carregar_leiloes(armazem, ano=None, base_url=API_URL, verify=True, cache=CACHE, atualizar=False,
+                     coalescedor=COALESCEDOR, servir_obsoleto=True):
+    """
+    Sincroniza o armazém com a API e retorna o DataFrame normalizado do ano
+    (COMPRA e VENDA juntos). É a única porta de entrada dos dados: os
+    catálogos de filtros são derivados deste mesmo DataFrame.
+
+    O resultado fica no cache do processo: anos encerrados sem expiração e o
+    ano corrente com TTL curto (ver `leiloes.cache.ttl_para_ano`). O DataFrame
+    devolvido é compartilhado e não deve ser alterado por quem o recebe.
+
+    Com `atualizar`, ignora a entrada em cache e a substitui pela versão
+    recém-sincronizada (usado pelo aquecedor em segundo plano).
+
+    Faltas simultâneas da mesma chave passam pelo `coalescedor` (uma única
+    sincronização por vez); `coalescedor=None` desliga a coalescência.
+
+    Com `servir_obsoleto`, uma entrada expirada é devolvida na hora e
+    revalidada em segundo plano (stale-while-revalidate): quem pede não
+    espera a API, nem quando ela está lenta ou fora do ar. O mesmo vale para
+    o ano corrente já gravado no armazém quando o cache do processo ainda
+    está vazio: um processo novo começa sem nenhuma chamada à API.
+    """
+    chave = chave_leiloes(armazem, base_url, ano)
+    if cache is not None and not atualizar:
+        entrada = cache.obter_com_frescor(chave)
+        if entrada is not None:
+            df, expirado, _ = entrada
+            if not expirado:
+                return df
+            if servir_obsoleto:
+                revalidar_em_segundo_plano(chave, lambda: carregar_leiloes(
+                    armazem, ano, base_url=base_url, verify=verify, cache=cache, atualizar=True,
+                    coalescedor=coalescedor))
+                return df
+        elif servir_obsoleto and ttl_para_ano(ano, armazem=armazem) is not None and (
+                armazem.contem(ano) if ano else armazem.historico_completo()):
+            # Processo recém-iniciado: o que já está no armazém (histórico mapeado) é servido
+            # sem esperar a API, como entrada já expirada, e a revalidação segue em segundo plano
+            df = armazem.ler([ano] if ano else None)
+            cache.guardar(chave, df, ttl=0)
+            revalidar_em_segundo_plano(chave, lambda: carregar_leiloes(
+                armazem, ano, base_url=base_url, verify=verify, cache=cache, atualizar=True,
+                coalescedor=coalescedor))
+            return df
+
+    def sincronizar_e_ler():
+        # Quem perdeu a corrida para outra chamada já concluída acha o resultado no cache
+        # (a falta já foi contada na primeira consulta, acima)
+        if cache is not None and not atualizar:
+            df = cache.obter(chave, contar=False)
+            if df is not None:
+                return df
+
+        anos = [ano] if ano else None
+        with medir("sincronizacao", ano=ano):
+            sincronizar(armazem, anos, base_url=base_url, verify=verify)
+        df = armazem.ler(anos)
+
+        if cache is not None:
+            cache.guardar(chave, df, ttl=ttl_para_ano(ano, armazem=armazem))
+        return df
+
+    # Faltas simultâneas da mesma chave (várias sessões pedindo o mesmo ano)
+    # esperam uma única sincronização em vez de cada uma chamar a API
+    if coalescedor is None:
+        return sincronizar_e_ler()
+    return coalescedor.executar(chave, sincronizar_e_ler)
+
+
+def carregar_anos(armazem, anos=None, base_url=API_URL, verify=True, max_paralelo=MAX_PARALELO, progresso=None):
+    """
+    Carrega vários anos em paralelo (pool de threads limitado) e concatena
+    tudo em um único DataFrame, em ordem cronológica. Sem `anos`, carrega o
+    histórico completo.
+
+    Um ano que falhar na API não derruba os demais: usa-se o que houver dele
+    no armazém e o erro é devolvido em `falhas` ({ano: exceção}).
+    `progresso(ano, concluidos, total, erro)` é chamado na thread de quem
+    chamou a função, a cada ano concluído.
+    """
+    anos = sorted(set(anos)) if anos else [None]
+    partes = {}
+    falhas = {}
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_paralelo, len(anos)))) as executor:
+        futuros = {
+            executor.submit(carregar_leiloes, armazem, ano, base_url=base_url, verify=verify): ano
+            for ano in anos
+        }
+        for concluidos, futuro in enumerate(as_completed(futuros), start=1):
+            ano = futuros[futuro]
+            try:
+                partes[ano] = futuro.result()
+            except Exception as e:
+                falhas[ano] = e
+                partes[ano] = armazem.ler([ano] if ano else None)
+            if progresso:
+                progresso(ano, concluidos, len(anos), falhas.get(ano))
+
+    frames = [partes[ano] for ano in anos if not partes[ano].empty]
+    df = tipar(pd.concat(frames, ignore_index=True)) if frames else pd.DataFrame()
+    return df, falhas
+
+
+def catalogos(df):
+    """
+    Retorna listas únicas de DATA, TIPO, TITULO e VENCIMENTO para filtros.
+    DATA e VENCIMENTO vêm como Timestamps (formatados só na exibição).
+    """
+    if df.empty:
+        return [], [], [], []
+
+    datas_disponiveis = sorted(df["DATA"].dropna().unique())
+    tipos_disponiveis = sorted(df["TIPO"].dropna().unique())
+    titulos_disponiveis = sorted(df["TITULO"].dropna().unique())
+    vencimentos_disponiveis = sorted(df["VENCIMENTO"].dropna().unique())
+
+    return datas_disponiveis, tipos_disponiveis, titulos_disponiveis, vencimentos_disponiveis
+
+
+# -----------------------------------------------
+# FRESCOR DOS DADOS
+# -----------------------------------------------
+FRESCO = "fresco"
+REVALIDANDO = "revalidando"
+OBSOLETO = "obsoleto"
+INDISPONIVEL = "indisponivel"
+
+
+def frescor(armazem, anos, base_url=API_URL, cache=CACHE, hoje=None):
+    """
+    Situação dos dados de cada ano, para o indicador de frescor:
+    {ano: {"situacao": ..., "atualizado_em": datetime ou None}}.
+
+    - fresco: ano encerrado já gravado ou entrada válida no cache;
+    - revalidando: servindo a última versão boa enquanto a API é consultada;
+    - obsoleto: servindo a última versão gravada (a API falhou ou o cache expirou);
+    - indisponivel: ano sem nenhum dado local.
+
+    `atualizado_em` é a última resposta bem-sucedida da API para o ano.
+    """
+    ano_corrente = (hoje or date.today()).year
+    situacoes = {}
+    for ano in (anos or [None]):
+        chave = chave_leiloes(armazem, base_url, ano)
+        no_armazem = armazem.contem(ano) if ano else bool(armazem.anos())
+        entrada = cache.espiar(chave) if cache is not None else None
+
+        if ano and ano < ano_corrente and armazem.ano_encerrado(ano):
+            situacao = FRESCO
+        elif em_revalidacao(chave):
+            situacao = REVALIDANDO
+        elif entrada is not None and not entrada[0]:
+            situacao = FRESCO
+        elif no_armazem:
+            situacao = OBSOLETO
+        else:
+            situacao = INDISPONIVEL
+
+        situacoes[ano] = {
+            "situacao": situacao,
+            "atualizado_em": armazem.ultima_sincronizacao(ano) if ano else None,
+        }
+    return situacoes
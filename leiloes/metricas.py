@@ -0,0 +1,127 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+logger = logging.getLogger("leiloes.metricas")
+
+# -----------------------------------------------
+# CONFIGURAÇÕES
+# -----------------------------------------------
+# Se definido, as métricas agregadas são gravadas neste arquivo no formato
+# texto do Prometheus (para o textfile collector do node_exporter, por exemplo)
+ARQUIVO_PROMETHEUS = os.environ.get("LEILOES_METRICAS_ARQUIVO")
+INTERVALO_GRAVACAO = float(os.environ.get("LEILOES_METRICAS_INTERVALO", 5))
+MAX_RECENTES = 500
+
+
+# -----------------------------------------------
+# REGISTRO DE MEDIÇÕES
+# -----------------------------------------------
+class RegistroMetricas:
+    """
+    Guarda as medições das etapas do pipeline: agregados por etapa
+    (contagem, tempo total e máximo, linhas, bytes, erros) e as medições
+    mais recentes, para o painel de diagnóstico.
+    """
+
+    def __init__(self, max_recentes=MAX_RECENTES):
+        self._trava = threading.Lock()
+        self._agregados = {}
+        self._recentes = deque(maxlen=max_recentes)
+        self._ultima_gravacao = 0.0
+
+    def registrar(self, medicao):
+        with self._trava:
+            agregado = self._agregados.setdefault(medicao["etapa"], {
+                "contagem": 0, "segundos": 0.0, "max_segundos": 0.0, "linhas": 0, "bytes": 0, "erros": 0,
+            })
+            agregado["contagem"] += 1
+            agregado["segundos"] += medicao["segundos"]
+            agregado["max_segundos"] = max(agregado["max_segundos"], medicao["segundos"])
+            agregado["linhas"] += medicao.get("linhas") or 0
+            agregado["bytes"] += medicao.get("bytes") or 0
+            agregado["erros"] += 1 if medicao.get("erro") else 0
+            self._recentes.append(medicao)
+
+        if ARQUIVO_PROMETHEUS and time.monotonic() - self._ultima_gravacao >= INTERVALO_GRAVACAO:
+            self._ultima_gravacao = time.monotonic()
+            try:
+                self.gravar_prometheus(ARQUIVO_PROMETHEUS)
+            except OSError as e:
+                logger.warning("Não foi possível gravar as métricas em %s: %s", ARQUIVO_PROMETHEUS, e)
+
+    def ultimas(self, quantidade):
+        """
+        Retorna as `quantidade` medições mais recentes, da mais antiga à mais nova.
+        """
+        with self._trava:
+            return list(self._recentes)[-quantidade:]
+
+    def agregados(self):
+        with self._trava:
+            return {etapa: dict(valores) for etapa, valores in self._agregados.items()}
+
+    def texto_prometheus(self):
+        """
+        Exporta os agregados no formato texto do Prometheus.
+        """
+        agregados = self.agregados()
+        linhas = []
+        series = [
+            ("leiloes_etapa_segundos_total", "counter", "Tempo total gasto na etapa.", "segundos"),
+            ("leiloes_etapa_execucoes_total", "counter", "Execuções da etapa.", "contagem"),
+            ("leiloes_etapa_segundos_max", "gauge", "Maior duração observada da etapa.", "max_segundos"),
+            ("leiloes_etapa_linhas_total", "counter", "Linhas processadas pela etapa.", "linhas"),
+            ("leiloes_etapa_bytes_total", "counter", "Bytes processados pela etapa.", "bytes"),
+            ("leiloes_etapa_erros_total", "counter", "Execuções da etapa que terminaram em erro.", "erros"),
+        ]
+        for nome, tipo, ajuda, campo in series:
+            linhas.append(f"# HELP {nome} {ajuda}")
+            linhas.append(f"# TYPE {nome} {tipo}")
+            for etapa, valores in sorted(agregados.items()):
+                linhas.append(f'{nome}{{etapa="{etapa}"}} {valores[campo]}')
+        return "\n".join(linhas) + "\n"
+
+    def gravar_prometheus(self, caminho):
+        """
+        Grava o texto do Prometheus de forma atômica (temporário + rename).
+        """
+        diretorio = os.path.dirname(os.path.abspath(caminho))
+        fd, temporario = tempfile.mkstemp(dir=diretorio, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(self.texto_prometheus())
+        os.replace(temporario, caminho)
+
+
+REGISTRO = RegistroMetricas()
+
+
+@contextmanager
+def medir(etapa, registro=REGISTRO, **campos):
+    """
+    Mede a duração de uma etapa. O dicionário devolvido pode receber campos
+    extras durante a execução (por exemplo `linhas` e `bytes`); ao final, a
+    medição vai para o log estruturado (JSON) e para o registro de métricas.
+
+        with medir("filtro") as medicao:
+            df = ...
+            medicao["linhas"] = len(df)
+    """
+    medicao = {"etapa": etapa, **campos}
+    inicio = time.perf_counter()
+    try:
+        yield medicao
+    except BaseException:
+        medicao["erro"] = True
+        raise
+    finally:
+        medicao["segundos"] = time.perf_counter() - inicio
+        medicao["instante"] = time.time()
+        registro.registrar(medicao)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps(medicao, default=str, ensure_ascii=False))
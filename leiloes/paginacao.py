@@ -0,0 +1,35 @@
+import math
+
+# -----------------------------------------------
+# PAGINAÇÃO NO SERVIDOR
+# -----------------------------------------------
+TAMANHOS_PAGINA = (25, 50, 100, 250, 500)
+
+
+def total_paginas(linhas, tamanho_pagina):
+    return max(1, math.ceil(linhas / tamanho_pagina))
+
+
+def paginar(df, pagina=1, tamanho_pagina=TAMANHOS_PAGINA[1], ordenar_por=None, crescente=True, colunas=None):
+    """
+    Retorna só a janela visível do DataFrame: ordena (se pedido), fatia a
+    página (1-based, limitada ao total de páginas) e seleciona as colunas.
+    Apenas esse recorte precisa ser serializado para o navegador.
+    """
+    pagina = min(max(1, pagina), total_paginas(len(df), tamanho_pagina))
+    inicio = (pagina - 1) * tamanho_pagina
+    fim = inicio + tamanho_pagina
+
+    if ordenar_por:
+        # Ordena só a coluna escolhida e usa as posições; o DataFrame inteiro não é reordenado
+        ordem = (
+            df[ordenar_por]
+            .reset_index(drop=True)
+            .sort_values(ascending=crescente, kind="stable", na_position="last")
+            .index.to_numpy()
+        )
+        janela = df.iloc[ordem[inicio:fim]]
+    else:
+        janela = df.iloc[inicio:fim]
+
+    return janela[colunas] if colunas else janela
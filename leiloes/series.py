@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+
+from leiloes.analitico import COMPONENTES, derivar_metricas, taxa_ponderada
+from leiloes.metricas import medir
+
+# -----------------------------------------------
+# SÉRIES HISTÓRICAS DE TAXA POR TÍTULO
+# -----------------------------------------------
+# rótulo -> regra de reamostragem do pandas (None = um ponto por leilão)
+FREQUENCIAS = {
+    "Por leilão": None,
+    "Semanal": "W",
+    "Mensal": "MS",
+}
+
+CHAVES_SERIE = ("TITULO", "VENCIMENTO")
+
+
+class IndiceSeries:
+    """
+    Índice das séries de cada título (TITULO, VENCIMENTO) sobre a tabela de
+    agregados por leilão (`leiloes.analitico`). A tabela é ordenada uma vez
+    por (TITULO, VENCIMENTO, DATA), de modo que a série de um título é uma
+    fatia contígua, localizada por busca em dicionário.
+
+    Reamostragem e janelas móveis são feitas sobre os componentes somáveis,
+    então a taxa semanal/mensal/móvel continua ponderada pelo financeiro.
+    """
+
+    def __init__(self, agregados):
+        self.dados = agregados
+        self._fatias = {}
+        self._vencimentos = {}
+
+    def construir(self):
+        with medir("indice_series", linhas=len(self.dados)) as medicao:
+            if self.dados.empty:
+                return self
+
+            self.dados = self.dados.sort_values(list(CHAVES_SERIE) + ["DATA"], kind="stable").reset_index(drop=True)
+            codigos, chaves = pd.factorize(pd.MultiIndex.from_frame(self.dados[list(CHAVES_SERIE)]), sort=False)
+            limites = np.flatnonzero(np.diff(codigos)) + 1
+            inicios = np.concatenate([[0], limites])
+            fins = np.concatenate([limites, [len(codigos)]])
+            for (titulo, vencimento), inicio, fim in zip(chaves[codigos[inicios]], inicios, fins):
+                self._fatias[(titulo, vencimento)] = (int(inicio), int(fim))
+                self._vencimentos.setdefault(titulo, []).append(vencimento)
+            medicao["series"] = len(self._fatias)
+        return self
+
+    def titulos(self):
+        return sorted(self._vencimentos)
+
+    def vencimentos(self, titulo):
+        return self._vencimentos.get(titulo, [])
+
+    def serie(self, titulo, vencimento, tipo=None, frequencia=None, janela=None):
+        """
+        Retorna a série de taxas do título, indexada por DATA: componentes
+        somados por leilão (ou por período de `frequencia`), as métricas de
+        `analitico.derivar_metricas` e, com `janela`, a TAXA MOVEL ponderada
+        dos últimos `janela` pontos. Períodos sem leilão são descartados.
+        """
+        inicio, fim = self._fatias.get((titulo, pd.Timestamp(vencimento)), (0, 0))
+        fatia = self.dados.iloc[inicio:fim]
+        if tipo:
+            fatia = fatia[fatia["TIPO"] == tipo]
+        if fatia.empty:
+            return pd.DataFrame(columns=COMPONENTES)
+
+        componentes = fatia.groupby("DATA", sort=True)[COMPONENTES].sum()
+        if frequencia:
+            componentes = componentes.resample(frequencia).sum()
+            componentes = componentes[componentes["REGISTROS"] > 0]
+
+        serie = derivar_metricas(componentes)
+        if janela and janela > 1:
+            serie["TAXA MOVEL"] = taxa_ponderada(componentes.rolling(janela, min_periods=1).sum())
+        return serie
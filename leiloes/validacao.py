@@ -0,0 +1,244 @@
+import logging
+import os
+import threading
+import time
+import unicodedata
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from leiloes.esquema import tipar
+
+logger = logging.getLogger("leiloes.validacao")
+
+# -----------------------------------------------
+# ESQUEMA DO PAYLOAD DA API
+# -----------------------------------------------
+# campo -> (tipo, obrigatório, valor padrão para ausentes)
+# Linhas sem um campo obrigatório, ou com valor que não pôde ser convertido,
+# vão para a quarentena; campos com padrão são preenchidos.
+CAMPOS = {
+    "DATA": ("data", True, None),
+    "TITULO": ("texto", True, None),
+    "VENCIMENTO": ("data", True, None),
+    "OFERTA": ("numero", False, None),
+    "QUANTIDADE ACEITA": ("numero", False, 0),
+    "QUANTIDADE ACEITA SEGUNDA VOLTA": ("numero", False, 0),
+    "TAXA": ("numero", False, None),
+    "FINANCEIRO ACEITO": ("numero", False, 0),
+    "FINANCEIRO ACEITO SEGUNDA VOLTA": ("numero", False, 0),
+    "TIPO": ("texto", True, None),
+}
+
+# Formatos de data tentados em ordem (cada passada só nas linhas que sobraram)
+FORMATOS_DATA_API = ("%d/%m/%Y", "%d-%m-%Y", "ISO8601")
+
+MAX_QUARENTENA = int(os.environ.get("LEILOES_MAX_QUARENTENA", 1000))
+
+
+def nome_canonico(nome):
+    """
+    Nome do campo do esquema correspondente a `nome` (ignorando caixa,
+    acentos, '_' e espaços extras), ou None se não for um campo conhecido.
+    """
+    texto = unicodedata.normalize("NFKD", str(nome)).encode("ascii", "ignore").decode("ascii")
+    texto = " ".join(texto.replace("_", " ").upper().split())
+    return texto if texto in CAMPOS else None
+
+
+class MapaCampos(dict):
+    """
+    Cache de nome recebido -> nome canônico (ou None), para reduzir cada
+    registro aos campos do esquema sem normalizar o mesmo nome duas vezes.
+    """
+
+    def __missing__(self, nome):
+        canonico = self[nome] = nome_canonico(nome)
+        return canonico
+
+    def reduzir(self, registro):
+        return {canonico: valor for nome, valor in registro.items() if (canonico := self[nome])}
+
+
+# -----------------------------------------------
+# CONVERSÕES VETORIZADAS
+# -----------------------------------------------
+# Número como texto no formato brasileiro: vírgula decimal, ponto (opcional) nos milhares
+_NUMERO_BRASILEIRO = r"[-+]?(?:\d+|\d{1,3}(?:\.\d{3})+)(?:,\d+)?"
+
+
+def _converter_numero(serie):
+    """
+    O formato é decidido por coluna: se algum texto da coluna tem vírgula
+    decimal, ela toda está no formato brasileiro ("1.234,56", e "1.234" é
+    mil duzentos e trinta e quatro); senão, o ponto é o separador decimal
+    ("6.125" é uma taxa). Textos fora do formato da coluna ficam vazios e a
+    linha vai para a quarentena.
+    """
+    if pd.api.types.is_numeric_dtype(serie):
+        return serie.astype("float64")
+
+    convertida = pd.to_numeric(serie, errors="coerce")
+    if pd.api.types.infer_dtype(serie, skipna=True) not in ("string", "mixed", "mixed-integer"):
+        return convertida.astype("float64")
+
+    # Só os valores recebidos como texto (números já vêm convertidos acima)
+    texto = serie.str.strip()
+    e_texto = texto.notna()
+    if not texto.str.contains(",", regex=False).fillna(False).astype(bool).any():
+        return convertida.astype("float64")
+
+    brasileiros = texto.str.fullmatch(_NUMERO_BRASILEIRO).fillna(False).astype(bool)
+    convertida[e_texto] = np.nan
+    convertida[brasileiros] = pd.to_numeric(
+        texto[brasileiros].str.replace(".", "", regex=False).str.replace(",", ".", regex=False),
+        errors="coerce")
+    return convertida.astype("float64")
+
+
+def _converter_data(serie):
+    if pd.api.types.is_datetime64_dtype(serie):
+        return serie.astype("datetime64[ns]")
+
+    # Poucas datas distintas se repetem em milhares de registros: cada uma é convertida uma vez só
+    codigos, distintas = pd.factorize(serie.where(serie.notna(), None).astype("string").str.strip())
+    texto = pd.Series(distintas, dtype="string")
+    convertidas = pd.Series(pd.NaT, index=texto.index, dtype="datetime64[ns]")
+    pendentes = texto.notna()
+    for formato in FORMATOS_DATA_API:
+        if not pendentes.any():
+            break
+        convertidas[pendentes] = pd.to_datetime(texto[pendentes], format=formato, errors="coerce")
+        pendentes = pendentes & convertidas.isna()
+
+    # Código -1 (ausente) cai no NaT acrescentado ao final
+    valores = np.append(convertidas.to_numpy(), np.datetime64("NaT", "ns"))
+    return pd.Series(valores[codigos], index=serie.index, dtype="datetime64[ns]")
+
+
+def _converter_texto(serie):
+    texto = serie.where(serie.notna(), None).astype("string").str.strip()
+    return texto.mask(texto == "")
+
+
+CONVERSORES = {"numero": _converter_numero, "data": _converter_data, "texto": _converter_texto}
+
+
+# -----------------------------------------------
+# VALIDAÇÃO
+# -----------------------------------------------
+def validar_registros(registros):
+    """
+    Converte os registros da API (lista de dicts ou DataFrame) conforme
+    CAMPOS, coluna a coluna e de forma vetorizada, e separa as linhas
+    malformadas. Campos renomeados (caixa, acentos, '_') são reconhecidos;
+    campos ausentes viram colunas vazias em vez de KeyError.
+
+    Retorna (df, quarentena, relatorio):
+    - df: linhas válidas, tipadas, com os padrões de CAMPOS e os totais;
+    - quarentena: linhas recusadas com os valores originais e o MOTIVO;
+    - relatorio: linhas, válidas, em quarentena, erros por campo, campos
+      ausentes e renomeados e a vazão (linhas/s).
+    """
+    inicio = time.perf_counter()
+    bruto = registros if isinstance(registros, pd.DataFrame) else pd.DataFrame(registros)
+
+    renomeados = {}
+    colunas = {}
+    for nome in bruto.columns:
+        canonico = nome_canonico(nome)
+        if canonico:
+            colunas.setdefault(canonico, []).append(nome)
+            if canonico != nome:
+                renomeados[nome] = canonico
+    ausentes = [campo for campo in CAMPOS if campo not in colunas]
+    if "DATA" in ausentes and len(bruto):
+        raise ValueError("Os registros da API não trazem o campo DATA.")
+
+    df = pd.DataFrame(index=bruto.index)
+    erros = pd.Series("", index=bruto.index, dtype=object)
+    erros_por_campo = {}
+    for campo, (tipo, obrigatorio, padrao) in CAMPOS.items():
+        if campo not in colunas:
+            vazia = CONVERSORES[tipo](pd.Series(np.nan, index=bruto.index, dtype=object))
+            df[campo] = vazia if padrao is None else vazia.fillna(padrao)
+            continue
+
+        nomes = colunas[campo]
+        # O mesmo campo com dois nomes (registros de antes e depois da mudança): vale o primeiro preenchido
+        original = bruto[nomes[0]]
+        for nome in nomes[1:]:
+            original = original.where(original.notna(), bruto[nome])
+        convertida = CONVERSORES[tipo](original)
+        if tipo == "texto":
+            # Texto vazio não é erro de conversão; só conta se o campo for obrigatório
+            invalidas = pd.Series(False, index=bruto.index)
+        else:
+            invalidas = convertida.isna() & original.notna()
+        if obrigatorio:
+            invalidas |= convertida.isna()
+        quantidade = int(invalidas.sum())
+        if quantidade:
+            erros_por_campo[campo] = quantidade
+            erros[invalidas] = erros[invalidas] + campo + "; "
+        df[campo] = convertida if padrao is None else convertida.fillna(padrao)
+
+    malformadas = (erros != "").to_numpy()
+    quarentena = bruto[malformadas].assign(MOTIVO=erros[malformadas].str.rstrip("; ").str.replace(
+        ";", ",", regex=False)) if malformadas.any() else pd.DataFrame()
+
+    df = df[~malformadas].reset_index(drop=True)
+    df["TOTAL QUANTIDADE ACEITA"] = df["QUANTIDADE ACEITA"] + df["QUANTIDADE ACEITA SEGUNDA VOLTA"]
+    df["TOTAL FINANCEIRO ACEITO"] = df["FINANCEIRO ACEITO"] + df["FINANCEIRO ACEITO SEGUNDA VOLTA"]
+    df = tipar(df)
+
+    segundos = time.perf_counter() - inicio
+    relatorio = {
+        "linhas": len(bruto),
+        "validas": len(df),
+        "quarentena": len(quarentena),
+        "erros_por_campo": erros_por_campo,
+        "campos_ausentes": ausentes,
+        "campos_renomeados": renomeados,
+        "linhas_por_segundo": len(bruto) / segundos if segundos else None,
+    }
+    return df, quarentena, relatorio
+
+
+# -----------------------------------------------
+# QUARENTENA DO PROCESSO
+# -----------------------------------------------
+class RegistroQuarentena:
+    """
+    Guarda as últimas linhas recusadas pela validação (no máximo
+    `max_linhas`) e os totais de erros por campo, para o diagnóstico.
+    """
+
+    def __init__(self, max_linhas=MAX_QUARENTENA):
+        self._trava = threading.Lock()
+        self._linhas = deque(maxlen=max_linhas)
+        self.erros_por_campo = {}
+        self.total = 0
+
+    def registrar(self, quarentena, relatorio):
+        if quarentena.empty and not relatorio["erros_por_campo"]:
+            return
+        with self._trava:
+            self.total += len(quarentena)
+            for campo, quantidade in relatorio["erros_por_campo"].items():
+                self.erros_por_campo[campo] = self.erros_por_campo.get(campo, 0) + quantidade
+            self._linhas.extend(quarentena.astype(object).where(quarentena.notna(), None).to_dict("records"))
+        logger.warning("%d registros em quarentena (erros por campo: %s)", len(quarentena),
+                       relatorio["erros_por_campo"])
+
+    def linhas(self):
+        with self._trava:
+            return pd.DataFrame(list(self._linhas))
+
+    def estatisticas(self):
+        with self._trava:
+            return {"total": self.total, "erros_por_campo": dict(self.erros_por_campo)}
+
+
+QUARENTENA = RegistroQuarentena()
@@ -0,0 +1,19 @@
+import pytest
+
+
+class Relogio:
+    """
+    Relógio manual para os componentes que recebem `relogio` (cache, disjuntor,
+    registro de datasets): o teste avança o tempo atribuindo `agora`.
+    """
+
+    def __init__(self):
+        self.agora = 0.0
+
+    def __call__(self):
+        return self.agora
+
+
+@pytest.fixture
+def relogio():
+    return Relogio()
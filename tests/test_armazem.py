@@ -0,0 +1,135 @@
+"""
+Armazém local e sincronização incremental contra a API simulada de `benchmarks.mock_api`.
+"""
+from datetime import date, datetime
+
+import pandas as pd
+import pytest
+
+from benchmarks.mock_api import MockTesouro
+from leiloes.analitico import CHAVES_LEILAO, agregar_leiloes
+from leiloes.armazem import Armazem, anos_pendentes, sincronizar
+from leiloes.cache import ttl_para_ano
+
+ANO_PASSADO = date.today().year - 1
+
+
+@pytest.fixture
+def armazem(tmp_path):
+    return Armazem(tmp_path)
+
+
+@pytest.fixture
+def mock():
+    with MockTesouro([ANO_PASSADO, ANO_PASSADO + 1], 40) as servidor:
+        yield servidor
+
+
+# -----------------------------------------------
+# ANOS ENCERRADOS
+# -----------------------------------------------
+def test_ano_passado_so_encerra_depois_de_sincronizado_no_ano_seguinte(armazem, mock):
+    sincronizar(armazem, [ANO_PASSADO], base_url=mock.url)
+    armazem.registrar_sincronizacao(ANO_PASSADO, datetime(ANO_PASSADO, 12, 30, 18))
+
+    assert not armazem.ano_encerrado(ANO_PASSADO)
+    assert anos_pendentes(armazem, [ANO_PASSADO]) == [ANO_PASSADO]
+    assert ttl_para_ano(ANO_PASSADO, armazem=armazem) is not None
+
+    sincronizar(armazem, [ANO_PASSADO], base_url=mock.url)
+    assert armazem.ano_encerrado(ANO_PASSADO)
+    assert anos_pendentes(armazem, [ANO_PASSADO]) == []
+    assert ttl_para_ano(ANO_PASSADO, armazem=armazem) is None
+
+
+def test_ano_corrente_nunca_encerra(armazem, mock):
+    sincronizar(armazem, [ANO_PASSADO + 1], base_url=mock.url)
+    assert not armazem.ano_encerrado(ANO_PASSADO + 1)
+    assert anos_pendentes(armazem, [ANO_PASSADO + 1]) == [ANO_PASSADO + 1]
+
+
+def test_ano_fora_do_armazem_nao_esta_encerrado(armazem):
+    armazem.registrar_sincronizacao(ANO_PASSADO - 5)
+    assert not armazem.ano_encerrado(ANO_PASSADO - 5)
+
+
+# -----------------------------------------------
+# SINCRONIZAÇÃO INCREMENTAL
+# -----------------------------------------------
+def publicar(mock, ano, registros):
+    """Troca os registros que a API simulada devolve para o ano."""
+    mock._registros[ano] = registros
+    mock._respostas.clear()
+
+
+def ultimos(registros):
+    """Índices dos registros da última DATA (os registros vêm ordenados por data)."""
+    ultima = registros[-1]["DATA"]
+    return [i for i, registro in enumerate(registros) if registro["DATA"] == ultima]
+
+
+def assert_agregados_em_dia(armazem, ano):
+    gravados = armazem.ler_agregados([ano]).sort_values(CHAVES_LEILAO, ignore_index=True)
+    refeitos = agregar_leiloes(armazem.ler_parquet([ano])).sort_values(CHAVES_LEILAO, ignore_index=True)
+    pd.testing.assert_frame_equal(gravados, refeitos, check_dtype=False, check_categorical=False)
+
+
+def test_ano_sem_mudanca_responde_304(armazem, mock):
+    assert sincronizar(armazem, [ANO_PASSADO + 1], base_url=mock.url) == {ANO_PASSADO + 1: 40}
+    requisicoes = mock.requisicoes
+
+    assert sincronizar(armazem, [ANO_PASSADO + 1], base_url=mock.url) == {ANO_PASSADO + 1: 0}
+    assert mock.requisicoes == requisicoes + 1
+    assert len(armazem.ler([ANO_PASSADO + 1])) == 40
+
+
+def test_leiloes_novos_sao_anexados(armazem, mock):
+    ano = ANO_PASSADO + 1
+    registros = list(mock._registros[ano])
+    corte = ultimos(registros)[0]
+    publicar(mock, ano, registros[:corte])
+    sincronizar(armazem, [ano], base_url=mock.url)
+
+    publicar(mock, ano, registros)
+    assert sincronizar(armazem, [ano], base_url=mock.url) == {ano: 40 - corte}
+    assert len(armazem.ler([ano])) == 40
+    assert_agregados_em_dia(armazem, ano)
+
+
+def test_correcao_na_ultima_data_substitui_os_registros(armazem, mock):
+    ano = ANO_PASSADO + 1
+    sincronizar(armazem, [ano], base_url=mock.url)
+    registros = [dict(registro) for registro in mock._registros[ano]]
+    indice = ultimos(registros)[0]
+    registros[indice]["QUANTIDADE ACEITA SEGUNDA VOLTA"] = 123.0
+    publicar(mock, ano, registros)
+
+    assert sincronizar(armazem, [ano], base_url=mock.url) == {ano: 1}
+    gravado = armazem.ler_parquet([ano])
+    assert len(gravado) == 40
+    assert (gravado["QUANTIDADE ACEITA SEGUNDA VOLTA"] == 123.0).sum() == 1
+    assert_agregados_em_dia(armazem, ano)
+    assert sincronizar(armazem, [ano], base_url=mock.url) == {ano: 0}
+
+
+def test_registro_removido_da_ultima_data_sai_do_armazem(armazem, mock):
+    ano = ANO_PASSADO + 1
+    sincronizar(armazem, [ano], base_url=mock.url)
+    registros = list(mock._registros[ano])
+    removido = ultimos(registros)[-1]
+    publicar(mock, ano, registros[:removido] + registros[removido + 1:])
+
+    assert sincronizar(armazem, [ano], base_url=mock.url) == {ano: 1}
+    assert len(armazem.ler_parquet([ano])) == 39
+    assert_agregados_em_dia(armazem, ano)
+    assert sincronizar(armazem, [ano], base_url=mock.url) == {ano: 0}
+
+
+def test_historico_completo_e_buscado_uma_vez(armazem, mock):
+    sincronizar(armazem, [ANO_PASSADO + 1], base_url=mock.url)
+    assert not armazem.historico_completo()
+
+    novos = sincronizar(armazem, base_url=mock.url)
+    assert novos[ANO_PASSADO] == 40
+    assert armazem.historico_completo()
+    assert armazem.anos() == [ANO_PASSADO, ANO_PASSADO + 1]
@@ -0,0 +1,92 @@
+"""
+Cache LRU do processo: orçamento em bytes, descarte LRU, TTL e contadores.
+"""
+from benchmarks.mock_api import MockTesouro
+from leiloes.armazem import Armazem
+from leiloes.cache import CacheLRU
+from leiloes.ingestao import carregar_leiloes
+
+
+def test_obter_devolve_o_valor_guardado():
+    cache = CacheLRU(orcamento_bytes=1024)
+    cache.guardar("a", b"x" * 10)
+    assert cache.obter("a") == b"x" * 10
+    assert cache.obter("b", "padrao") == "padrao"
+    estatisticas = cache.estatisticas()
+    assert (estatisticas["acertos"], estatisticas["faltas"]) == (1, 1)
+
+
+def test_descarta_o_menos_usado_ao_passar_do_orcamento():
+    cache = CacheLRU(orcamento_bytes=250)
+    cache.guardar("a", b"x" * 100)
+    cache.guardar("b", b"x" * 100)
+    cache.obter("a")
+    cache.guardar("c", b"x" * 100)
+
+    assert cache.obter("b") is None
+    assert cache.obter("a") is not None
+    assert cache.obter("c") is not None
+    assert cache.estatisticas()["descartes"] == 1
+    assert cache.estatisticas()["bytes"] <= 250
+
+
+def test_valor_maior_que_o_orcamento_nao_e_guardado():
+    cache = CacheLRU(orcamento_bytes=50)
+    cache.guardar("a", b"x" * 100)
+    assert cache.obter("a") is None
+    assert cache.estatisticas()["entradas"] == 0
+
+
+def test_entrada_expirada_conta_como_falta_mas_continua_disponivel(relogio):
+    cache = CacheLRU(orcamento_bytes=1024, relogio=relogio)
+    cache.guardar("a", b"x", ttl=10)
+    relogio.agora = 9
+    assert cache.obter("a") == b"x"
+
+    relogio.agora = 10
+    assert cache.obter("a") is None
+    valor, expirado, _ = cache.obter_com_frescor("a")
+    assert (valor, expirado) == (b"x", True)
+    estatisticas = cache.estatisticas()
+    assert (estatisticas["expiracoes"], estatisticas["obsoletos_servidos"]) == (1, 1)
+
+
+def test_espiar_nao_mexe_na_ordem_nem_nos_contadores():
+    cache = CacheLRU(orcamento_bytes=250)
+    cache.guardar("a", b"x" * 100)
+    cache.guardar("b", b"x" * 100)
+    assert cache.espiar("a")[0] is False
+    cache.guardar("c", b"x" * 100)
+
+    assert cache.espiar("a") is None
+    assert cache.estatisticas()["acertos"] == 0
+
+
+def test_obter_sem_contar():
+    cache = CacheLRU(orcamento_bytes=1024)
+    cache.guardar("a", b"x")
+    assert cache.obter("a", contar=False) == b"x"
+    assert cache.obter("b", contar=False) is None
+    estatisticas = cache.estatisticas()
+    assert (estatisticas["acertos"], estatisticas["faltas"]) == (0, 0)
+
+
+def test_invalidar():
+    cache = CacheLRU(orcamento_bytes=1024)
+    cache.guardar("a", b"x")
+    cache.guardar("b", b"x")
+    cache.invalidar("a")
+    assert cache.obter("a") is None
+    cache.invalidar()
+    assert cache.estatisticas()["entradas"] == 0
+    assert cache.estatisticas()["bytes"] == 0
+
+
+def test_carregar_leiloes_a_frio_conta_uma_falta(tmp_path):
+    cache = CacheLRU(orcamento_bytes=64 * 1024 * 1024)
+    with MockTesouro([2020], 10) as mock:
+        df = carregar_leiloes(Armazem(tmp_path), 2020, base_url=mock.url, cache=cache)
+        assert carregar_leiloes(Armazem(tmp_path), 2020, base_url=mock.url, cache=cache) is df
+
+    estatisticas = cache.estatisticas()
+    assert (estatisticas["acertos"], estatisticas["faltas"]) == (1, 1)
@@ -0,0 +1,65 @@
+"""
+Modo cassete do cliente HTTP: gravação contra a API simulada de
+`benchmarks.mock_api` e reprodução offline.
+"""
+import time
+
+import pytest
+
+from benchmarks.mock_api import MockTesouro
+from leiloes.cassete import Cassete, GravacaoAusente
+from leiloes.cliente import ClienteTesouro, Disjuntor, validador_da_resposta
+
+
+@pytest.fixture
+def mock():
+    with MockTesouro([2024], 20) as servidor:
+        yield servidor
+
+
+def cliente_para(url, cassete):
+    return ClienteTesouro(url, fator_backoff=0, disjuntor=Disjuntor(limite_falhas=1), cassete=cassete)
+
+
+def test_gravar_e_reproduzir_sem_rede(mock, tmp_path):
+    gravado = cliente_para(mock.url, Cassete(tmp_path, "gravar")).get({"ano": 2024})
+    assert mock.requisicoes == 1
+
+    cliente = cliente_para(mock.url, Cassete(tmp_path, "reproduzir"))
+    reproduzido = cliente.get({"ano": 2024})
+    assert reproduzido.status_code == 200
+    assert reproduzido.json() == gravado.json()
+    assert validador_da_resposta(reproduzido) == validador_da_resposta(gravado)
+    assert mock.requisicoes == 1
+
+
+def test_reproducao_responde_304_com_o_etag_gravado(mock, tmp_path):
+    cliente_para(mock.url, Cassete(tmp_path, "gravar")).get({"ano": 2024})
+
+    cliente = cliente_para(mock.url, Cassete(tmp_path, "reproduzir"))
+    validador = validador_da_resposta(cliente.get({"ano": 2024}))
+    response = cliente.get({"ano": 2024}, validador=validador)
+    assert response.status_code == 304
+    assert response.content == b""
+    assert mock.requisicoes == 1
+
+
+def test_reproducao_injeta_a_latencia(mock, tmp_path):
+    cliente_para(mock.url, Cassete(tmp_path, "gravar")).get({"ano": 2024})
+
+    cliente = cliente_para(mock.url, Cassete(tmp_path, "reproduzir", latencia=0.2))
+    inicio = time.perf_counter()
+    cliente.get({"ano": 2024})
+    assert time.perf_counter() - inicio >= 0.2
+
+
+def test_gravacao_ausente_nao_conta_como_falha_da_api(mock, tmp_path):
+    cliente = cliente_para(mock.url, Cassete(tmp_path, "reproduzir"))
+    for _ in range(2):
+        with pytest.raises(GravacaoAusente):
+            cliente.get({"ano": 2024})
+
+    estatisticas = cliente.disjuntor.estatisticas()
+    assert estatisticas["falhas_seguidas"] == 0
+    assert estatisticas["estado"] == "fechado"
+    assert mock.requisicoes == 0
@@ -0,0 +1,111 @@
+"""
+Cliente HTTP contra a API simulada de `benchmarks.mock_api`.
+"""
+import time
+
+import pytest
+import requests
+
+from benchmarks.mock_api import MockTesouro
+from leiloes.api import buscar_leiloes
+from leiloes.cliente import CircuitoAberto, ClienteTesouro, Disjuntor, validador_da_resposta
+
+
+@pytest.fixture
+def mock():
+    with MockTesouro([2024], 20) as servidor:
+        yield servidor
+
+
+def cliente_para(mock, **kwargs):
+    kwargs.setdefault("fator_backoff", 0)
+    kwargs.setdefault("disjuntor", Disjuntor(limite_falhas=100))
+    return ClienteTesouro(mock.url, **kwargs)
+
+
+# -----------------------------------------------
+# CLIENTE
+# -----------------------------------------------
+def test_get_devolve_registros_do_ano(mock):
+    response = cliente_para(mock).get({"ano": 2024})
+    assert response.status_code == 200
+    assert len(response.json()["registros"]) == 20
+    assert mock.requisicoes == 1
+
+
+def test_status_repetivel_e_tentado_de_novo(mock):
+    mock.status_forcado = 503
+    cliente = cliente_para(mock, tentativas=2)
+    with pytest.raises(requests.HTTPError):
+        cliente.get({"ano": 2024})
+    assert mock.requisicoes == 3
+    assert cliente.disjuntor.estatisticas()["falhas_seguidas"] == 1
+
+
+def test_status_nao_repetivel_nao_e_tentado_de_novo(mock):
+    mock.status_forcado = 404
+    cliente = cliente_para(mock, tentativas=2)
+    with pytest.raises(requests.HTTPError):
+        cliente.get({"ano": 2024})
+    assert mock.requisicoes == 1
+    assert cliente.disjuntor.estatisticas()["falhas_seguidas"] == 0
+
+
+def test_backoff_espera_entre_as_tentativas(mock):
+    mock.status_forcado = 503
+    cliente = cliente_para(mock, tentativas=2, fator_backoff=0.1)
+    inicio = time.perf_counter()
+    with pytest.raises(requests.HTTPError):
+        cliente.get({"ano": 2024})
+    # urllib3: sem espera antes da 1ª nova tentativa, 0.1 * 2 antes da 2ª
+    assert time.perf_counter() - inicio >= 0.2
+
+
+def test_timeout_de_leitura_conta_como_falha(mock):
+    mock.latencia = 0.5
+    cliente = cliente_para(mock, tentativas=1, timeout=(1, 0.1))
+    with pytest.raises((requests.ConnectionError, requests.Timeout)):
+        cliente.get({"ano": 2024})
+    assert mock.requisicoes == 2
+    assert cliente.disjuntor.estatisticas()["falhas_seguidas"] == 1
+
+
+def test_get_condicional_responde_304(mock):
+    cliente = cliente_para(mock)
+    validador = validador_da_resposta(cliente.get({"ano": 2024}))
+    assert validador["etag"]
+
+    response = cliente.get({"ano": 2024}, validador=validador)
+    assert response.status_code == 304
+    assert response.content == b""
+
+
+def test_buscar_leiloes_com_validador_atual_devolve_none(mock):
+    df, validador = buscar_leiloes(mock.url, ano=2024)
+    assert len(df) == 20
+
+    df, novo_validador = buscar_leiloes(mock.url, ano=2024, validador=validador)
+    assert df is None
+    assert novo_validador == validador
+
+
+def test_buscar_leiloes_com_validador_antigo_devolve_registros(mock):
+    _, validador = buscar_leiloes(mock.url, ano=2024)
+    mock._registros[2024] = mock._registros[2024][:10]
+    mock._respostas.clear()
+
+    df, novo_validador = buscar_leiloes(mock.url, ano=2024, validador=validador)
+    assert len(df) == 10
+    assert novo_validador != validador
+
+
+def test_disjuntor_aberto_nao_chama_a_api(mock):
+    mock.status_forcado = 503
+    cliente = cliente_para(mock, tentativas=0, disjuntor=Disjuntor(limite_falhas=2, espera=60))
+    for _ in range(2):
+        with pytest.raises(requests.HTTPError):
+            cliente.get({"ano": 2024})
+
+    with pytest.raises(CircuitoAberto):
+        cliente.get({"ano": 2024})
+    assert mock.requisicoes == 2
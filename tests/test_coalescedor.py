@@ -0,0 +1,98 @@
+"""
+Coalescência de chamadas concorrentes (uma execução em andamento por chave).
+"""
+import threading
+
+import pytest
+
+from leiloes.cache import Coalescedor
+
+
+def executar_em_paralelo(coalescedor, quantidade, funcao):
+    """
+    Dispara `quantidade` threads na mesma chave com `funcao` bloqueada até
+    todas estarem esperando; retorna (resultados, erros).
+    """
+    liberar = threading.Event()
+    resultados, erros = [], []
+
+    def chamar():
+        try:
+            resultados.append(coalescedor.executar("chave", lambda: (liberar.wait(5), funcao())[1]))
+        except Exception as e:
+            erros.append(e)
+
+    threads = [threading.Thread(target=chamar) for _ in range(quantidade)]
+    for thread in threads:
+        thread.start()
+    while coalescedor.estatisticas()["coalescidas"] < quantidade - 1:
+        threading.Event().wait(0.01)
+    liberar.set()
+    for thread in threads:
+        thread.join(5)
+    return resultados, erros
+
+
+def test_chamadas_simultaneas_executam_uma_vez():
+    coalescedor = Coalescedor()
+    chamadas = []
+    resultados, erros = executar_em_paralelo(coalescedor, 8, lambda: chamadas.append(1) or object())
+
+    assert erros == []
+    assert len(chamadas) == 1
+    assert len({id(resultado) for resultado in resultados}) == 1
+    assert coalescedor.estatisticas() == {"em_andamento": 0, "execucoes": 1, "coalescidas": 7}
+
+
+def test_erro_e_repassado_a_todos_que_esperavam():
+    coalescedor = Coalescedor()
+
+    def falhar():
+        raise ValueError("API fora do ar")
+
+    resultados, erros = executar_em_paralelo(coalescedor, 4, falhar)
+    assert resultados == []
+    assert len(erros) == 4
+    assert all(isinstance(erro, ValueError) for erro in erros)
+
+
+def test_chamada_seguinte_executa_de_novo():
+    coalescedor = Coalescedor()
+    assert coalescedor.executar("chave", lambda: 1) == 1
+    assert coalescedor.executar("chave", lambda: 2) == 2
+    with pytest.raises(KeyError):
+        coalescedor.executar("chave", lambda: {}["x"])
+    assert coalescedor.estatisticas()["execucoes"] == 3
+
+
+class Interrompida(BaseException):
+    """Como a RerunException/StopException do Streamlit."""
+
+
+def test_interrupcao_do_lider_nao_e_repassada_a_quem_espera():
+    coalescedor = Coalescedor()
+    liberar = threading.Event()
+    resultados = []
+
+    def lider():
+        liberar.wait(5)
+        raise Interrompida()
+
+    def chamar_lider():
+        with pytest.raises(Interrompida):
+            coalescedor.executar("chave", lider)
+
+    thread_lider = threading.Thread(target=chamar_lider)
+    thread_lider.start()
+    while coalescedor.estatisticas()["em_andamento"] == 0:
+        threading.Event().wait(0.01)
+    thread_espera = threading.Thread(target=lambda: resultados.append(coalescedor.executar("chave", lambda: "ok")))
+    thread_espera.start()
+    while coalescedor.estatisticas()["coalescidas"] == 0:
+        threading.Event().wait(0.01)
+    liberar.set()
+    thread_lider.join(5)
+    thread_espera.join(5)
+
+    assert resultados == ["ok"]
+    assert coalescedor.estatisticas()["execucoes"] == 2
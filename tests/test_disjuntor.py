@@ -0,0 +1,68 @@
+"""
+Disjuntor da API (fechado, aberto e meio-aberto), com relógio manual.
+"""
+import pytest
+
+from leiloes.cliente import CircuitoAberto, Disjuntor
+
+
+def test_disjuntor_abre_depois_do_limite_de_falhas(relogio):
+    disjuntor = Disjuntor(limite_falhas=3, espera=10, relogio=relogio)
+    for _ in range(2):
+        disjuntor.registrar_falha()
+    assert disjuntor.estado == Disjuntor.FECHADO
+
+    disjuntor.registrar_falha()
+    assert disjuntor.estado == Disjuntor.ABERTO
+    with pytest.raises(CircuitoAberto):
+        disjuntor.permitir()
+    assert disjuntor.estatisticas()["recusadas"] == 1
+
+
+def test_sucesso_zera_as_falhas_seguidas(relogio):
+    disjuntor = Disjuntor(limite_falhas=2, relogio=relogio)
+    disjuntor.registrar_falha()
+    disjuntor.registrar_sucesso()
+    disjuntor.registrar_falha()
+    assert disjuntor.estado == Disjuntor.FECHADO
+
+
+def test_meio_aberto_deixa_passar_uma_chamada_de_teste(relogio):
+    disjuntor = Disjuntor(limite_falhas=1, espera=10, relogio=relogio)
+    disjuntor.registrar_falha()
+    relogio.agora = 10
+    assert disjuntor.estado == Disjuntor.MEIO_ABERTO
+
+    disjuntor.permitir()
+    with pytest.raises(CircuitoAberto):
+        disjuntor.permitir()
+
+    disjuntor.registrar_sucesso()
+    assert disjuntor.estado == Disjuntor.FECHADO
+    disjuntor.permitir()
+
+
+def test_falha_no_teste_reabre_o_disjuntor(relogio):
+    disjuntor = Disjuntor(limite_falhas=3, espera=10, relogio=relogio)
+    for _ in range(3):
+        disjuntor.registrar_falha()
+    relogio.agora = 10
+    disjuntor.permitir()
+
+    disjuntor.registrar_falha()
+    assert disjuntor.estado == Disjuntor.ABERTO
+    assert disjuntor.estatisticas()["aberturas"] == 2
+
+    relogio.agora = 19
+    assert disjuntor.estado == Disjuntor.ABERTO
+    relogio.agora = 20
+    assert disjuntor.estado == Disjuntor.MEIO_ABERTO
+
+
+def test_liberar_teste_permite_nova_chamada_de_teste(relogio):
+    disjuntor = Disjuntor(limite_falhas=1, espera=10, relogio=relogio)
+    disjuntor.registrar_falha()
+    relogio.agora = 10
+    disjuntor.permitir()
+    disjuntor.liberar_teste()
+    disjuntor.permitir()
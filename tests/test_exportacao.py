@@ -0,0 +1,44 @@
+"""
+Exportação em lotes (Parquet, CSV e JSON Lines).
+"""
+import json
+
+import numpy as np
+import pandas as pd
+
+from leiloes.exportacao import EscritorLotes
+
+
+def lote():
+    return pd.DataFrame({
+        "DATA": pd.to_datetime(["2024-01-02", "2024-01-04"]),
+        "TITULO": pd.Categorical(["LTN", "NTN-B"]),
+        "TAXA": [9.0711, np.nan],
+        "FINANCEIRO ACEITO": [137791838.66, 0.1 + 0.2],
+    })
+
+
+def test_json_lines_sem_ruido_de_ponto_flutuante(tmp_path):
+    caminho = tmp_path / "leiloes.jsonl"
+    with EscritorLotes(caminho, "json") as escritor:
+        escritor.escrever(lote())
+        escritor.escrever(lote())
+
+    linhas = caminho.read_text(encoding="utf-8").splitlines()
+    assert len(linhas) == 4
+    assert linhas[0].endswith('"FINANCEIRO ACEITO":137791838.66}')
+    registros = [json.loads(linha) for linha in linhas]
+    assert registros[0] == {"DATA": "2024-01-02T00:00:00.000", "TITULO": "LTN", "TAXA": 9.0711,
+                            "FINANCEIRO ACEITO": 137791838.66}
+    assert registros[1]["TAXA"] is None
+    assert registros[1]["FINANCEIRO ACEITO"] == 0.1 + 0.2
+
+
+def test_csv_e_parquet_guardam_os_mesmos_valores(tmp_path):
+    for formato in ("csv", "parquet"):
+        with EscritorLotes(tmp_path / f"leiloes.{formato}", formato) as escritor:
+            escritor.escrever(lote())
+
+    assert "137791838.66" in (tmp_path / "leiloes.csv").read_text(encoding="utf-8")
+    lido = pd.read_parquet(tmp_path / "leiloes.parquet")
+    assert lido["FINANCEIRO ACEITO"].tolist() == [137791838.66, 0.1 + 0.2]
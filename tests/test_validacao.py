@@ -0,0 +1,141 @@
+"""
+Validação dos registros da API: conversões, quarentena e campos renomeados ou ausentes.
+"""
+import pandas as pd
+import pytest
+
+from leiloes.validacao import validar_registros
+
+
+def registro(**campos):
+    base = {
+        "DATA": "02/01/2024",
+        "TITULO": "LTN",
+        "VENCIMENTO": "01/01/2026",
+        "OFERTA": 1000.0,
+        "QUANTIDADE ACEITA": 800.0,
+        "QUANTIDADE ACEITA SEGUNDA VOLTA": 100.0,
+        "TAXA": 10.5,
+        "FINANCEIRO ACEITO": 700_000.0,
+        "FINANCEIRO ACEITO SEGUNDA VOLTA": 90_000.0,
+        "TIPO": "VENDA",
+    }
+    base.update(campos)
+    return base
+
+
+def test_registros_validos_sao_tipados_e_totalizados():
+    df, quarentena, relatorio = validar_registros([registro(), registro(TIPO="COMPRA")])
+
+    assert quarentena.empty
+    assert (relatorio["linhas"], relatorio["validas"], relatorio["quarentena"]) == (2, 2, 0)
+    assert df["DATA"].iloc[0] == pd.Timestamp("2024-01-02")
+    assert df["TOTAL QUANTIDADE ACEITA"].tolist() == [900.0, 900.0]
+    assert df["TOTAL FINANCEIRO ACEITO"].tolist() == [790_000.0, 790_000.0]
+    assert isinstance(df["TITULO"].dtype, pd.CategoricalDtype)
+
+
+def test_datas_em_outros_formatos():
+    df, quarentena, _ = validar_registros([registro(DATA="2024-01-03"), registro(DATA="04-01-2024")])
+    assert quarentena.empty
+    assert df["DATA"].tolist() == [pd.Timestamp("2024-01-03"), pd.Timestamp("2024-01-04")]
+
+
+def test_linhas_malformadas_vao_para_a_quarentena():
+    df, quarentena, relatorio = validar_registros([
+        registro(),
+        registro(DATA="31/02/2024"),
+        registro(TITULO=None),
+        registro(OFERTA="muito"),
+    ])
+
+    assert len(df) == 1
+    assert quarentena["MOTIVO"].tolist() == ["DATA", "TITULO", "OFERTA"]
+    assert quarentena["OFERTA"].iloc[2] == "muito"
+    assert relatorio["erros_por_campo"] == {"DATA": 1, "TITULO": 1, "OFERTA": 1}
+
+
+def test_varios_erros_na_mesma_linha():
+    _, quarentena, _ = validar_registros([registro(VENCIMENTO="x", TAXA="y")])
+    assert quarentena["MOTIVO"].tolist() == ["VENCIMENTO, TAXA"]
+
+
+def test_campos_renomeados_sao_reconhecidos():
+    original = registro()
+    renomeado = {"data": original.pop("DATA"), "Título": original.pop("TITULO"),
+                 "quantidade_aceita": original.pop("QUANTIDADE ACEITA"), **original}
+    df, quarentena, relatorio = validar_registros([renomeado])
+
+    assert quarentena.empty
+    assert df["TITULO"].tolist() == ["LTN"]
+    assert df["QUANTIDADE ACEITA"].tolist() == [800.0]
+    assert relatorio["campos_renomeados"] == {
+        "data": "DATA", "Título": "TITULO", "quantidade_aceita": "QUANTIDADE ACEITA"}
+
+
+def test_mesmo_campo_com_dois_nomes_usa_o_primeiro_preenchido():
+    antigo = registro(TAXA=None)
+    novo = registro()
+    del novo["TAXA"]
+    novo["Taxa"] = 11.0
+    df, _, _ = validar_registros([antigo, novo])
+    assert df["TAXA"].isna().tolist() == [True, False]
+    assert df["TAXA"].iloc[1] == 11.0
+
+
+def test_campos_ausentes_viram_colunas_vazias_ou_padrao():
+    original = registro()
+    for campo in ("OFERTA", "TAXA", "QUANTIDADE ACEITA SEGUNDA VOLTA", "FINANCEIRO ACEITO SEGUNDA VOLTA"):
+        del original[campo]
+    df, quarentena, relatorio = validar_registros([original])
+
+    assert quarentena.empty
+    assert df["OFERTA"].isna().all() and df["TAXA"].isna().all()
+    assert df["QUANTIDADE ACEITA SEGUNDA VOLTA"].tolist() == [0.0]
+    assert df["TOTAL QUANTIDADE ACEITA"].tolist() == [800.0]
+    assert set(relatorio["campos_ausentes"]) == {
+        "OFERTA", "TAXA", "QUANTIDADE ACEITA SEGUNDA VOLTA", "FINANCEIRO ACEITO SEGUNDA VOLTA"}
+
+
+def test_campo_obrigatorio_ausente_vira_coluna_vazia():
+    original = registro()
+    del original["TIPO"]
+    df, quarentena, relatorio = validar_registros([original])
+    assert quarentena.empty
+    assert df["TIPO"].isna().all()
+    assert relatorio["campos_ausentes"] == ["TIPO"]
+
+
+def test_sem_data_levanta_erro():
+    original = registro()
+    del original["DATA"]
+    with pytest.raises(ValueError):
+        validar_registros([original])
+
+
+# -----------------------------------------------
+# NÚMEROS COMO TEXTO
+# -----------------------------------------------
+def test_numeros_com_ponto_decimal():
+    df, quarentena, _ = validar_registros([registro(TAXA="6.125"), registro(TAXA="12.5"), registro(TAXA=" 7 ")])
+    assert quarentena.empty
+    assert df["TAXA"].tolist() == [6.125, 12.5, 7.0]
+
+
+def test_coluna_no_formato_brasileiro():
+    df, quarentena, _ = validar_registros([
+        registro(OFERTA="1.234,56"), registro(OFERTA="0,5"), registro(OFERTA="1.234"), registro(OFERTA=10.0)])
+    assert quarentena.empty
+    assert df["OFERTA"].tolist() == [1234.56, 0.5, 1234.0, 10.0]
+
+
+def test_formato_misturado_na_coluna_vai_para_a_quarentena():
+    df, quarentena, _ = validar_registros([registro(TAXA="6,5"), registro(TAXA="6.25"), registro(TAXA="1,234.5")])
+    assert df["TAXA"].tolist() == [6.5]
+    assert quarentena["TAXA"].tolist() == ["6.25", "1,234.5"]
+    assert quarentena["MOTIVO"].tolist() == ["TAXA", "TAXA"]
+
+
+def test_relatorio_traz_a_vazao():
+    _, _, relatorio = validar_registros([registro()] * 100)
+    assert relatorio["linhas_por_segundo"] > 0